@@ -1,207 +1,611 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import base64
 import cv2
 import numpy as np
 import os
 import time
 from utils.osc_handler import OSCHandler
-from ml.classifier import GestureClassifier
+from ml.gesture_bank import NEUTRAL_LABEL
+from api_common import (ClientSession, GestureModels, SessionStore, UploadError,
+                        ENCODED_TYPES, GESTURE_CONFIDENCE, LANDMARKS_TYPE, MAX_UPLOAD_BYTES, RAW_TYPE,
+                        SESSION_HEADER, decode_data_url, landmarks_from_bytes, landmarks_from_json,
+                        raw_frame_shape)
 from utils.gesture_Detection import GestureDetector
+from utils.detector_pool import DetectorPool, PoolExhausted
+from utils.frame_buffers import FramePool
+from utils.landmarks import LandmarkFrame
+from pipeline import LatestFrameQueue
+from utils.tracing import tracer
+from utils.log import (add_arguments as add_log_arguments, configure as configure_logging,
+                       get_frame_logger, get_logger)
+import argparse
+import functools
+import json
 import logging
-import traceback
+import threading
+import uuid
 
 # Suppress MediaPipe warnings
 logging.getLogger('mediapipe').setLevel(logging.ERROR)
 
+# Module-level setup below already logs, so the level comes from the environment
+# first; --log-level/--quiet reconfigure it when run as a script
+configure_logging(os.environ.get("AEROMIX_LOG_LEVEL", "info"), quiet=os.environ.get("AEROMIX_QUIET") == "1")
+log = get_logger(__name__)
+frame_log = get_frame_logger(__name__)
+
 osc_handler = OSCHandler(receive_port=5025, send_port=5026)
 app = Flask(__name__)
 CORS(app)
 
-# Initialize GestureDetector once at startup
+# Pool of GestureDetectors, so concurrent requests neither wait on one
+# MediaPipe tracker nor feed each other's frames into it. One detector is
+# created at startup, the rest on demand up to the pool size.
+DETECTOR_POOL_SIZE = int(os.environ.get("AEROMIX_DETECTOR_POOL_SIZE", "4"))
+detector_pool = DetectorPool(GestureDetector, size=DETECTOR_POOL_SIZE)
 try:
-    gesture_detector = GestureDetector()
-    print("[INFO] GestureDetector initialized at startup")
-except Exception as e:
-    print(f"[ERROR] Failed to initialize GestureDetector: {e}")
-    print("[ERROR] Stack trace:")
-    traceback.print_exc()
-    gesture_detector = None
-
-# Track the last detected gesture and timestamp for cooldown
-last_gesture = None
-last_gesture_time = 0
-COOLDOWN_SECONDS = 1.0
-
-class SoundController:
-    def __init__(self):
-        self.volume = 0.7
-        self.bass = 0.5
-        self.tempo = 1.0
-        self.pitch = 1.0
-        self.osc_handler = osc_handler
-
-    def adjust_volume(self, delta):
-        self.volume = max(0.0, min(1.0, self.volume + delta))
-        print(f"[DEBUG] Volume adjusted to: {self.volume}")
-
-    def adjust_bass(self, delta):
-        self.bass = max(0.0, min(1.0, self.bass + delta))
-        print(f"[DEBUG] Bass adjusted to: {self.bass}")
-
-    def adjust_tempo(self, delta):
-        self.tempo = max(0.5, min(2.0, self.tempo + delta))
-        print(f"[DEBUG] Tempo adjusted to: {self.tempo}")
-
-    def adjust_pitch(self, delta):
-        self.pitch = max(0.5, min(2.0, self.pitch + delta))
-        print(f"[DEBUG] Pitch adjusted to: {self.pitch}")
-
-    def process_gesture(self, gesture):
-        print(f"[DEBUG] Processing gesture: {gesture}")
-        if gesture == "volume_up":
-            self.adjust_volume(0.1)
-        elif gesture == "volume_down":
-            self.adjust_volume(-0.1)
-        elif gesture == "tempo_up":
-            self.adjust_tempo(0.1)
-        elif gesture == "tempo_down":
-            self.adjust_tempo(-0.1)
-        elif gesture == "bass_up":
-            self.adjust_bass(0.1)
-        elif gesture == "bass_down":
-            self.adjust_bass(-0.1)
-        elif gesture == "pitch_up":
-            self.adjust_pitch(0.1)
-        elif gesture == "pitch_down":
-            self.adjust_pitch(-0.1)
-
-sound_controller = SoundController()
-
-# Load gesture models
+    detector_pool.prewarm(1)
+    log.info("GestureDetector initialized at startup (pool size %d)", DETECTOR_POOL_SIZE)
+except Exception:
+    log.exception("Failed to initialize GestureDetector")
+    detector_pool = None
+
+# Each client has its own sound state and cooldown, kept in a lock-striped
+# store and dropped after AEROMIX_SESSION_IDLE_SECONDS without requests
+client_sessions = SessionStore(
+    functools.partial(ClientSession, osc_handler),
+    shards=int(os.environ.get("AEROMIX_SESSION_SHARDS", "16")),
+    idle_timeout=float(os.environ.get("AEROMIX_SESSION_IDLE_SECONDS", "600")),
+)
+get_client_session = client_sessions.get
+
+
+def session_id_for(data=None):
+    """Client session from the X-Session-ID header or a session_id field, else the remote address"""
+    session_id = request.headers.get(SESSION_HEADER)
+    if not session_id and data:
+        session_id = data.get("session_id")
+    return str(session_id or request.remote_addr)
+
+
+# Load gesture models, sharing one per-frame feature cache between them
 model_dir = "model/trained"
-gesture_classifiers = {}
-if os.path.exists(model_dir):
-    for filename in os.listdir(model_dir):
-        if filename.endswith("_model.pkl"):
-            gesture_name = filename.replace("_model.pkl", "")
-            model_path = os.path.join(model_dir, filename)
-            gesture_classifiers[gesture_name] = GestureClassifier(model_path)
-            print(f"[DEBUG] Loaded model for gesture: {gesture_name}")
-else:
-    print(f"[ERROR] Model directory {model_dir} does not exist")
+gesture_models = GestureModels(model_dir, use_gesture_bank=os.environ.get("AEROMIX_GESTURE_BANK", "0") == "1")
+feature_cache = gesture_models.feature_cache
+gesture_classifiers = gesture_models.classifiers
+gesture_bank = gesture_models.bank
+classify_landmarks = gesture_models.classify
 
 @app.route('/api/gesture', methods=['POST'])
 def process_gesture():
     data = request.json
     gesture = data.get('gesture')
-    print(f"[DEBUG] Received gesture command: {gesture}")
-    sound_controller.process_gesture(gesture)
+    session = get_client_session(session_id_for(data))
+    log.debug("Received gesture command: %s", gesture)
+    with session.lock:
+        session.sound.process_gesture(gesture)
+        state = session.state()
     return jsonify({
         "status": "success",
         "gesture": gesture,
-        "state": {
-            "volume": sound_controller.volume,
-            "bass": sound_controller.bass,
-            "tempo": sound_controller.tempo,
-            "pitch": sound_controller.pitch
-        }
+        "state": state
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Rolling latency histograms (count, mean, p50/p95/p99, max) per traced stage"""
+    return jsonify(tracer.snapshot())
+
+@app.route('/api/metrics/detector-pool', methods=['GET'])
+def get_detector_pool_metrics():
+    """Detector pool usage: detectors created, checkouts, session affinity, resets and waits"""
+    if detector_pool is None:
+        return jsonify({"error": "GestureDetector not initialized"}), 503
+    return jsonify(detector_pool.stats())
+
+@app.route('/api/metrics/sessions', methods=['GET'])
+def get_session_metrics():
+    """Live client sessions, their spread over shards, and how many were created and evicted"""
+    return jsonify(client_sessions.stats())
+
 @app.route('/api/state', methods=['GET'])
 def get_state():
-    print("[DEBUG] State requested")
-    return jsonify({
-        "volume": sound_controller.volume,
-        "bass": sound_controller.bass,
-        "tempo": sound_controller.tempo,
-        "pitch": sound_controller.pitch
-    })
+    session_id = session_id_for(request.args)
+    log.debug("State requested (session %s)", session_id)
+    return jsonify(get_client_session(session_id).state())
+
+def recognize_frame(img, session_id):
+    """Detect and classify one decoded BGR frame for a client session; returns (response body, status)"""
+    # Check if GestureDetector is initialized
+    if detector_pool is None:
+        frame_log.error("GestureDetector not initialized")
+        return {"status": "success", "gestures": []}, 200
+
+    # Detect landmarks with a pooled detector, preferably the one this session used last.
+    # The session lock is not held yet: waiting for a detector must not block the
+    # session's other requests, such as /api/state
+    log.debug("Calling detect_landmarks...")
+    with tracer.span("detector_checkout"):
+        detector = detector_pool.acquire(session_id)
+    try:
+        with tracer.span("detect"):
+            landmarks, _ = detector.detect_landmarks(img, annotate=False)
+    finally:
+        detector_pool.release(detector, session_id)
+    log.debug("Landmarks: %s", landmarks)
+    session = get_client_session(session_id)
+    with session.lock:
+        return recognize_landmarks(landmarks, session, session_id)
+
+def fire_gesture(session, session_id, gesture_name, current_time):
+    """Trigger a recognized gesture unless the session's cooldown holds it back; returns whether it fired"""
+    if not session.try_fire(gesture_name, current_time):
+        return False
+    log.info("Detected gesture: %s (session %s)", gesture_name, session_id)
+    with tracer.span("process_gesture"):
+        session.sound.process_gesture(gesture_name)
+    # Request arrival to audio action
+    tracer.end_frame("end_to_end")
+    return True
+
+def recognize_landmarks(landmarks, session, session_id):
+    """Classify a LandmarkFrame and apply the session's cooldown; the caller holds session.lock"""
+    if not landmarks.has_hands:
+        log.debug("No hands detected in frame")
+        return {"status": "success", "gestures": []}, 200
+
+    # Classify gestures
+    detected_gestures = []
+    if not gesture_classifiers and gesture_bank is None:
+        frame_log.error("No gesture classifiers loaded")
+        return {"error": "No gesture classifiers loaded"}, 500
+
+    current_time = time.time()
+    for gesture_name, prediction, confidence in classify_landmarks(landmarks):
+        if prediction == gesture_name and confidence > GESTURE_CONFIDENCE:
+            if fire_gesture(session, session_id, gesture_name, current_time):
+                detected_gestures.append(gesture_name)
+        elif confidence < 0.65:
+            log.debug("Low confidence: %.2f, returning NO_GESTURE", confidence)
+
+    log.debug("Returning response: {'status': 'success', 'gestures': %s}", detected_gestures)
+    return {"status": "success", "gestures": detected_gestures}, 200
 
 @app.route('/api/gesture-frame', methods=['POST'])
 def gesture_frame():
-    global last_gesture, last_gesture_time
-
-    print("[DEBUG] /api/gesture-frame called")
+    tracer.begin_frame()
+    log.debug("/api/gesture-frame called")
     data = request.json
     frame_data = data.get('frame')
     if not frame_data:
-        print("[ERROR] No frame data found in request")
+        frame_log.error("No frame data found in request")
         return jsonify({"error": "No frame data"}), 400
 
     try:
         # Decode the frame
-        imgstr = frame_data.split(',')[1]
-        img_bytes = base64.b64decode(imgstr)
-        nparr = np.frombuffer(img_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        with tracer.span("decode"):
+            img = decode_data_url(frame_data)
         if img is None:
-            print("[ERROR] Failed to decode image")
+            frame_log.error("Failed to decode image")
             return jsonify({"error": "Failed to decode image"}), 500
-        print("[DEBUG] Frame decoded successfully, shape:", img.shape)
-
-        # Check if GestureDetector is initialized
-        if gesture_detector is None:
-            print("[ERROR] GestureDetector not initialized")
-            return jsonify({"status": "success", "gestures": []})
-
-        # Detect landmarks using the global GestureDetector
-        print("[DEBUG] Calling detect_landmarks...")
-        landmarks_dict, _ = gesture_detector.detect_landmarks(img)
-        print(f"[DEBUG] Landmarks dictionary: {landmarks_dict}")
-
-        # Convert landmarks_dict to the format expected by GestureClassifier (list of lists)
-        landmarks = []
-        for hand in ['left_hand', 'right_hand']:
-            if landmarks_dict[hand]:
-                hand_landmarks = [
-                    type('Landmark', (), {'x': lm['x'], 'y': lm['y'], 'z': lm['z']})
-                    for lm in landmarks_dict[hand]
-                ]
-                landmarks.append(hand_landmarks)
-                break  # Use the first detected hand
-
-        if not landmarks:
-            print("[DEBUG] No hands detected in frame")
-            return jsonify({"status": "success", "gestures": []})
-        print(f"[DEBUG] Converted landmarks: {len(landmarks)} hands detected, each with {len(landmarks[0]) if landmarks else 0} landmarks")
-
-        # Classify gestures
-        detected_gestures = []
-        if not gesture_classifiers:
-            print("[ERROR] No gesture classifiers loaded")
-            return jsonify({"error": "No gesture classifiers loaded"}), 500
+        log.debug("Frame decoded successfully, shape: %s", img.shape)
+        body, status = recognize_frame(img, session_id_for(data))
+        return jsonify(body), status
+    except PoolExhausted as e:
+        frame_log.warning("%s", e)
+        return jsonify({"error": "Server busy, try again"}), 503
+    except Exception as e:
+        frame_log.exception("Gesture processing error")
+        return jsonify({"error": str(e)}), 500
+
+# Binary uploads: the request body is read straight into reusable buffers
+upload_buffers = threading.local()  # Per request thread: growable bytearray for encoded images
+raw_frame_pool = FramePool()
+
+
+def read_request_body(view):
+    """Fill the memoryview from the request stream; returns the number of bytes read"""
+    stream = request.stream
+    readinto = getattr(stream, "readinto", None)
+    filled = 0
+    while filled < len(view):
+        if readinto is not None:
+            count = readinto(view[filled:])
+        else:
+            chunk = stream.read(len(view) - filled)
+            count = len(chunk)
+            view[filled:filled + count] = chunk
+        if not count:
+            break
+        filled += count
+    return filled
+
+
+def encoded_upload_buffer(length):
+    buffer = getattr(upload_buffers, "buffer", None)
+    if buffer is None or len(buffer) < length:
+        # Grow in powers of two so a client's frames settle on one buffer
+        buffer = upload_buffers.buffer = bytearray(1 << max(length - 1, 1).bit_length())
+    return buffer
+
+
+def decode_binary_upload():
+    """
+    Decode the request body into a BGR frame. Returns (frame, pooled): pooled
+    frames are raw uploads that go back to raw_frame_pool after use.
+    """
+    length = request.content_length
+    if not length:
+        raise UploadError("Content-Length required")
+    if length > MAX_UPLOAD_BYTES:
+        raise UploadError(f"Upload larger than {MAX_UPLOAD_BYTES} bytes", 413)
+    content_type = (request.mimetype or "").lower()
+
+    if content_type == RAW_TYPE:
+        shape = raw_frame_shape(request.headers.get("X-Frame-Width"), request.headers.get("X-Frame-Height"), length)
+        frame = raw_frame_pool.acquire(shape)
+        if read_request_body(memoryview(frame).cast("B")) != length:
+            raw_frame_pool.release(frame)
+            raise UploadError("Request body ended early")
+        return frame, True
+
+    if content_type not in ENCODED_TYPES:
+        raise UploadError(f"Unsupported content type {content_type or 'none'}, "
+                          f"send {', '.join(ENCODED_TYPES)} or {RAW_TYPE}", 415)
+    view = memoryview(encoded_upload_buffer(length))[:length]
+    if read_request_body(view) != length:
+        raise UploadError("Request body ended early")
+    img = cv2.imdecode(np.frombuffer(view, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise UploadError("Failed to decode image")
+    return img, False
+
+@app.route('/api/gesture-frame/binary', methods=['POST'])
+def gesture_frame_binary():
+    """
+    /api/gesture-frame for a request body of raw image bytes: an encoded image
+    (Content-Type image/jpeg, image/png or image/webp) or an uncompressed BGR
+    frame (application/octet-stream with X-Frame-Width/X-Frame-Height).
+    The session comes from the X-Session-ID header.
+    """
+    tracer.begin_frame()
+    try:
+        with tracer.span("decode"):
+            img, pooled = decode_binary_upload()
+        try:
+            body, status = recognize_frame(img, session_id_for())
+        finally:
+            if pooled:
+                raw_frame_pool.release(img)
+        return jsonify(body), status
+    except UploadError as e:
+        frame_log.error("Rejected upload: %s", e)
+        return jsonify({"error": str(e)}), e.status
+    except PoolExhausted as e:
+        frame_log.warning("%s", e)
+        return jsonify({"error": "Server busy, try again"}), 503
+    except Exception as e:
+        frame_log.exception("Gesture processing error")
+        return jsonify({"error": str(e)}), 500
+
+# Landmark-only ingestion for clients that run MediaPipe Hands themselves:
+# no image decode and no server-side detection
+def landmarks_from_binary():
+    """
+    LandmarkFrame from a body of little-endian float32 values, 21 x 3 per hand,
+    with handedness in X-Handedness ("left,right") and an optional X-Timestamp
+    """
+    length = request.content_length or 0
+    if length > MAX_UPLOAD_BYTES:
+        raise UploadError(f"Upload larger than {MAX_UPLOAD_BYTES} bytes", 413)
+    view = memoryview(encoded_upload_buffer(max(length, 1)))[:length]
+    if read_request_body(view) != length:
+        raise UploadError("Request body ended early")
+    return landmarks_from_bytes(view, request.headers.get("X-Handedness"), request.headers.get("X-Timestamp"))
+
+@app.route('/api/landmarks', methods=['POST'])
+def landmarks_endpoint():
+    """
+    Classify pre-extracted hand landmarks, skipping decode and detection. The
+    body is JSON (see landmarks_from_json) or raw float32 with Content-Type
+    application/x-aeromix-landmarks or application/octet-stream.
+    """
+    tracer.begin_frame()
+    try:
+        with tracer.span("decode"):
+            if (request.mimetype or "").lower() in (LANDMARKS_TYPE, RAW_TYPE):
+                data = None
+                landmarks = landmarks_from_binary()
+            else:
+                data = request.get_json(silent=True)
+                if not isinstance(data, dict):
+                    raise UploadError("Expected a JSON object or a binary landmark body")
+                landmarks = landmarks_from_json(data)
+        session_id = session_id_for(data)
+        session = get_client_session(session_id)
+        with session.lock:
+            body, status = recognize_landmarks(landmarks, session, session_id)
+        return jsonify(body), status
+    except (UploadError, ValueError) as e:
+        frame_log.error("Rejected landmarks: %s", e)
+        return jsonify({"error": str(e)}), getattr(e, "status", 400)
+    except Exception as e:
+        frame_log.exception("Gesture processing error")
+        return jsonify({"error": str(e)}), 500
+
+# Batches: detection runs per frame, classification once per model over all frames
+MAX_BATCH_FRAMES = 64
+
 
+def classify_batch(landmark_frames):
+    """
+    Per-frame {gesture: confidence} of the gestures predicted for each frame,
+    evaluating every model once over the stacked features of all frames
+    """
+    predictions = [{} for _ in landmark_frames]
+    rows = []
+    row_frames = []
+    with tracer.span("features"):
+        for index, landmarks in enumerate(landmark_frames):
+            features = feature_cache.get(landmarks).features
+            if features.size:
+                rows.append(features.reshape(-1))
+                row_frames.append(index)
+    if not rows:
+        return predictions
+    X = np.stack(rows)
+
+    if gesture_bank is not None:
+        with tracer.span("classify.gesture_bank.batch"):
+            labels, confidences = gesture_bank.predict_many(X)
+        for index, label, confidence in zip(row_frames, labels, confidences):
+            if label not in ("NO_GESTURE", NEUTRAL_LABEL):
+                predictions[index][str(label)] = float(confidence)
+        return predictions
+
+    for gesture_name, classifier in gesture_classifiers.items():
+        with tracer.span(f"classify.{gesture_name}.batch"):
+            labels, confidences = classifier.predict_many(X)
+        for index, label, confidence in zip(row_frames, labels, confidences):
+            if label == gesture_name:
+                predictions[index][gesture_name] = float(confidence)
+    return predictions
+
+
+def recognize_batch(landmark_frames, session_id):
+    """Classify a batch of LandmarkFrames in order, applying the session's cooldown frame by frame"""
+    if not gesture_classifiers and gesture_bank is None:
+        frame_log.error("No gesture classifiers loaded")
+        return {"error": "No gesture classifiers loaded"}, 500
+    session = get_client_session(session_id)
+    results = []
+    with session.lock:
+        predictions = classify_batch(landmark_frames)
         current_time = time.time()
-        for gesture_name, classifier in gesture_classifiers.items():
-            features = classifier.preprocess_landmarks(landmarks)
-            if features.size == 0:
-                print(f"[DEBUG] No features extracted for gesture: {gesture_name}")
-                continue
-            print(f"[DEBUG] Features extracted for gesture {gesture_name}:", features.shape)
-            prediction = classifier.predict(features)
-            confidence = classifier.predict_proba(features)
-            print(f"[Classifier] Prediction: {prediction} with confidence {confidence:.2f}")
-            if prediction == gesture_name and confidence > 0.85:
-                if (last_gesture == gesture_name and 
-                    (current_time - last_gesture_time) < COOLDOWN_SECONDS):
-                    print(f"[DEBUG] Gesture {gesture_name} ignored due to cooldown")
-                    continue
-                detected_gestures.append(gesture_name)
-                print(f"[DEBUG] Detected gesture: {gesture_name}")
-                last_gesture = gesture_name
-                last_gesture_time = current_time
-                sound_controller.process_gesture(gesture_name)
-            elif confidence < 0.65:
-                print(f"[Classifier] Low confidence: {confidence:.2f}, returning NO_GESTURE")
-
-        print(f"[DEBUG] Returning response: {{'status': 'success', 'gestures': {detected_gestures}}}")
-        return jsonify({"status": "success", "gestures": detected_gestures})
+        for landmarks, predicted in zip(landmark_frames, predictions):
+            fired = [gesture_name for gesture_name, confidence in predicted.items()
+                     if confidence > GESTURE_CONFIDENCE
+                     and fire_gesture(session, session_id, gesture_name, current_time)]
+            results.append({"hands": len(landmarks), "gestures": fired, "confidences": predicted})
+    return {"status": "success", "frames": results}, 200
+
+@app.route('/api/gesture-frame/batch', methods=['POST'])
+def gesture_frame_batch():
+    """
+    Up to MAX_BATCH_FRAMES frames in one request: {"frames": [data URLs]} runs
+    detection on each frame in order, {"landmarks": [landmark objects as for
+    /api/landmarks]} skips it. Returns per-frame fired gestures and the
+    confidences of every predicted gesture.
+    """
+    tracer.begin_frame()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not (data.get("frames") or data.get("landmarks")):
+        return jsonify({"error": "Expected a JSON object with frames or landmarks"}), 400
+    items = data.get("frames") or data.get("landmarks")
+    if len(items) > MAX_BATCH_FRAMES:
+        return jsonify({"error": f"At most {MAX_BATCH_FRAMES} frames per batch"}), 413
+    session_id = session_id_for(data)
+
+    try:
+        if data.get("frames"):
+            if detector_pool is None:
+                frame_log.error("GestureDetector not initialized")
+                return jsonify({"error": "GestureDetector not initialized"}), 503
+            with tracer.span("decode"):
+                images = [decode_data_url(frame_data) for frame_data in items]
+            if any(img is None for img in images):
+                return jsonify({"error": "Failed to decode image"}), 400
+            # One checkout for the batch; its frames are tracked as one stream
+            with detector_pool.checkout(session_id) as detector:
+                landmark_frames = []
+                for img in images:
+                    with tracer.span("detect"):
+                        landmarks, _ = detector.detect_landmarks(img, annotate=False)
+                    landmark_frames.append(landmarks)
+        else:
+            with tracer.span("decode"):
+                landmark_frames = [landmarks_from_json(item) for item in items]
+        body, status = recognize_batch(landmark_frames, session_id)
+        return jsonify(body), status
+    except (UploadError, ValueError, TypeError) as e:
+        frame_log.error("Rejected batch: %s", e)
+        return jsonify({"error": str(e)}), getattr(e, "status", 400)
+    except PoolExhausted as e:
+        frame_log.warning("%s", e)
+        return jsonify({"error": "Server busy, try again"}), 503
     except Exception as e:
-        print(f"[ERROR] Gesture processing error: {e}")
-        print("[ERROR] Stack trace:")
-        traceback.print_exc()
+        frame_log.exception("Gesture processing error")
         return jsonify({"error": str(e)}), 500
 
+# WebSocket streaming at /api/stream, available when flask-sock is installed.
+#
+# Client -> server:
+#   binary message       one frame: JPEG/PNG/WebP bytes, or raw BGR after a "config" message
+#   {"type": "config", "format": "bgr", "width": w, "height": h}   or {"format": "encoded"}
+#   {"type": "landmarks", ...}   pre-extracted landmarks, as accepted by /api/landmarks
+# Server -> client:
+#   {"type": "gestures", "frame": n, "gestures": [...]}   whenever a gesture fires
+#   {"type": "state", "state": {...}}                      whenever the sound state changes
+#   {"type": "error", "error": "..."}
+# The connection's session is the session_id query parameter, else one per connection.
+try:
+    from flask_sock import Sock
+except ImportError:
+    Sock = None
+
+STREAM_POLL_SECONDS = 0.1
+
+
+class StreamConnection:
+    """
+    One WebSocket client. A receive thread puts incoming messages into a
+    LatestFrameQueue and the handler thread processes the newest one, so a
+    client sending faster than it can be served loses stale frames instead
+    of building up a backlog.
+    """
+
+    def __init__(self, ws, session_id):
+        self.ws = ws
+        self.session_id = session_id
+        self.session = get_client_session(session_id)
+        self.incoming = LatestFrameQueue()
+        # Set by config messages; read in the receive thread as each frame arrives
+        self.raw_size = None
+        self._send_lock = threading.Lock()
+        self.frames = 0
+        self.last_state = None
+        self.open = True
+
+    def _receive_loop(self):
+        try:
+            while self.open:
+                message = self.ws.receive()
+                if message is None:
+                    break
+                received_at = time.perf_counter()
+                if isinstance(message, str):
+                    try:
+                        message = json.loads(message)
+                        if not isinstance(message, dict):
+                            raise ValueError("Expected a JSON object")
+                        if message.get("type") == "config":
+                            # Applied here rather than queued, so a frame sent right after it cannot replace it
+                            self.configure(message)
+                            continue
+                    except ValueError as e:
+                        frame_log.error("Rejected stream message: %s", e)
+                        self.send({"type": "error", "error": str(e)})
+                        continue
+                # Only frames are droppable; each keeps the raw size in force when it arrived
+                self.incoming.put((received_at, message, self.raw_size))
+        except Exception as e:
+            log.debug("Stream %s closed: %s", self.session_id, e)
+        finally:
+            self.open = False
+            self.incoming.close()
+
+    def send(self, payload):
+        # The receive thread reports rejected control messages while the handler thread sends results
+        with self._send_lock:
+            self.ws.send(json.dumps(payload))
+
+    def configure(self, data):
+        """Apply a config message: {"format": "bgr", "width", "height"} for raw frames, else encoded images"""
+        if data.get("format") == "bgr":
+            try:
+                self.raw_size = (int(data["width"]), int(data["height"]))
+            except (KeyError, TypeError, ValueError):
+                raise ValueError("A bgr config needs integer width and height")
+        else:
+            self.raw_size = None
+
+    def decode(self, message, raw_size):
+        """LandmarkFrame for a parsed JSON message, else the BGR frame of a binary one"""
+        if isinstance(message, dict):
+            kind = message.get("type")
+            if kind == "landmarks":
+                return landmarks_from_json(message)
+            raise ValueError(f"Unknown message type {kind!r}")
+        if raw_size is not None:
+            width, height = raw_size
+            if len(message) != width * height * 3:
+                raise ValueError(f"Raw BGR {width}x{height} frame is {width * height * 3} bytes, got {len(message)}")
+            return np.frombuffer(message, np.uint8).reshape(height, width, 3)
+        img = cv2.imdecode(np.frombuffer(message, np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("Failed to decode image")
+        return img
+
+    def process(self, received_at, message, raw_size):
+        tracer.begin_frame(received_at)
+        with tracer.span("decode"):
+            item = self.decode(message, raw_size)
+        self.frames += 1
+        # Fetching the session again keeps it from being evicted while the stream is open
+        self.session = get_client_session(self.session_id)
+        if isinstance(item, LandmarkFrame):
+            with self.session.lock:
+                body, status = recognize_landmarks(item, self.session, self.session_id)
+        else:
+            body, status = recognize_frame(item, self.session_id)
+        if status != 200:
+            self.send({"type": "error", "error": body.get("error")})
+        elif body["gestures"]:
+            self.send({"type": "gestures", "frame": self.frames, "gestures": body["gestures"]})
+
+    def push_state(self):
+        """Send the session's sound state if it changed since the last push, whoever changed it"""
+        state = self.session.sound.state()
+        if state != self.last_state:
+            self.last_state = state
+            self.send({"type": "state", "state": state})
+
+    def run(self):
+        receiver = threading.Thread(target=self._receive_loop, name=f"aeromix-ws-{self.session_id}", daemon=True)
+        receiver.start()
+        try:
+            self.push_state()
+            while self.open:
+                item = self.incoming.get(timeout=STREAM_POLL_SECONDS)
+                if item is not None:
+                    try:
+                        self.process(*item)
+                    except PoolExhausted as e:
+                        frame_log.warning("%s", e)
+                        self.send({"type": "error", "error": "Server busy, frame dropped"})
+                    except (UploadError, ValueError, KeyError, TypeError) as e:
+                        frame_log.error("Rejected stream message: %s", e)
+                        self.send({"type": "error", "error": str(e)})
+                self.push_state()
+        except Exception:
+            if self.open:
+                frame_log.exception("Stream %s failed", self.session_id)
+        finally:
+            self.open = False
+            self.incoming.close()
+            log.info("Stream %s ended after %d frames, %d dropped",
+                     self.session_id, self.frames, self.incoming.dropped)
+
+
+if Sock is not None:
+    sock = Sock(app)
+
+    @sock.route('/api/stream')
+    def stream(ws):
+        session_id = request.args.get("session_id") or f"ws-{uuid.uuid4().hex}"
+        log.info("Stream %s connected", session_id)
+        StreamConnection(ws, session_id).run()
+else:
+    log.info("flask-sock not installed, /api/stream disabled")
+
 if __name__ == "__main__":
-    app.run(debug=False, port=5000)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='AEROMIX gesture API server')
+    parser.add_argument('--detector-pool-size', type=int, default=DETECTOR_POOL_SIZE,
+                        help='Most GestureDetectors serving requests concurrently (AEROMIX_DETECTOR_POOL_SIZE)')
+    add_log_arguments(parser, default_level=os.environ.get("AEROMIX_LOG_LEVEL", "info"))
+    args = parser.parse_args()
+    configure_logging(args.log_level, quiet=args.quiet)
+    if detector_pool is not None:
+        # Detectors beyond the prewarmed one are created on demand, so the size can still change here
+        detector_pool.size = max(args.detector_pool_size, 1)
+    app.run(debug=False, port=5000, threaded=True)
\ No newline at end of file
@@ -0,0 +1,390 @@
+"""
+Asynchronous (ASGI) serving mode for the gesture API.
+
+Requests are handled on an asyncio event loop. The CPU-heavy part of a
+frame (decode, MediaPipe detection, classification) runs in worker
+processes that load the gesture models and a GestureDetector once at
+startup, so throughput scales with cores instead of sharing one GIL. Each
+session is pinned to one worker, which runs its frames in order on a
+detector kept for that session, so MediaPipe stays in tracking mode. Only
+the cheap, stateful part stays in the server process: per-session
+cooldowns and sound state. Once `max_pending` frames are queued or in
+flight, further frames are rejected with 503 instead of piling up latency.
+
+    python api_asgi.py --workers 4 --max-pending 16     # needs uvicorn
+    uvicorn api_asgi:app --port 5000                    # configured from AEROMIX_* variables
+
+Routes match api.py: /api/gesture-frame, /api/gesture-frame/binary,
+/api/landmarks, /api/gesture, /api/state and /api/metrics. Batches and
+WebSocket streaming are only served by the Flask app.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs
+import multiprocessing
+import cv2
+import numpy as np
+from api_common import (GestureModels, SessionStore, UploadError,
+                        ENCODED_TYPES, LANDMARKS_TYPE, MAX_UPLOAD_BYTES, RAW_TYPE, SESSION_HEADER,
+                        decode_data_url, landmarks_from_bytes, landmarks_from_json, raw_frame_shape)
+from utils.tracing import tracer
+from utils.log import (ROOT, add_arguments as add_log_arguments, configure as configure_logging,
+                       get_frame_logger, get_logger)
+
+log = get_logger(__name__)
+frame_log = get_frame_logger(__name__)
+
+configure_logging(os.environ.get("AEROMIX_LOG_LEVEL", "info"), quiet=os.environ.get("AEROMIX_QUIET") == "1")
+
+DEFAULT_MODEL_DIR = "model/trained"
+DEFAULT_DETECTORS_PER_WORKER = 4
+
+# Worker process state, set up once by _init_worker
+_models = None
+_detector_factory = None
+_max_detectors = DEFAULT_DETECTORS_PER_WORKER
+_detectors = OrderedDict()  # session_id -> GestureDetector, least recently used first
+_spare_detectors = []
+
+
+def _init_worker(model_dir, use_gesture_bank, log_level, max_detectors):
+    global _models, _detector_factory, _max_detectors
+    configure_logging(log_level)
+    logging.getLogger('mediapipe').setLevel(logging.ERROR)
+    from utils.gesture_Detection import GestureDetector
+    _detector_factory = GestureDetector
+    _max_detectors = max(int(max_detectors), 1)
+    # One detector up front, so the worker's first session does not pay for MediaPipe's startup
+    _spare_detectors.append(GestureDetector())
+    _models = GestureModels(model_dir, use_gesture_bank)
+
+
+def _warm_worker():
+    return os.getpid()
+
+
+def _detector_for(session_id):
+    """The worker's detector for a session; past _max_detectors the least recently used one is reset and taken over"""
+    detector = _detectors.pop(session_id, None)
+    if detector is None:
+        if _spare_detectors:
+            detector = _spare_detectors.pop()
+        elif len(_detectors) < _max_detectors:
+            detector = _detector_factory()
+        else:
+            _, detector = _detectors.popitem(last=False)
+            detector.reset()
+    _detectors[session_id] = detector
+    return detector
+
+
+def _recognize_job(kind, payload, session_id, shape=None):
+    """
+    In a worker: decode a frame, detect hands and classify them. Returns
+    (hand count, [(gesture_name, confidence)], {stage: seconds}).
+    """
+    timings = {}
+    start = time.perf_counter()
+    if kind == "data_url":
+        img = decode_data_url(payload)
+    elif kind == "raw":
+        img = np.frombuffer(payload, np.uint8).reshape(shape)
+    else:
+        img = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise UploadError("Failed to decode image")
+    timings["decode"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    landmarks, _ = _detector_for(session_id).detect_landmarks(img, annotate=False)
+    timings["detect"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    recognized = _models.recognized(landmarks)
+    timings["classify"] = time.perf_counter() - start
+    return len(landmarks), recognized, timings
+
+
+class ServerBusy(Exception):
+    """The worker queue is full"""
+
+
+class GestureASGIApp:
+    """ASGI application serving the gesture API from warm worker processes, one per group of sessions"""
+
+    def __init__(self, model_dir=DEFAULT_MODEL_DIR, workers=None, max_pending=None, use_gesture_bank=False,
+                 detectors_per_worker=None):
+        self.model_dir = model_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.use_gesture_bank = use_gesture_bank
+        self.detectors_per_worker = detectors_per_worker or DEFAULT_DETECTORS_PER_WORKER
+        # A single-process executor per worker, so a session's frames always reach the same one, in order
+        self.pools = []
+        self.models = None
+        self.sessions = SessionStore(idle_timeout=float(os.environ.get("AEROMIX_SESSION_IDLE_SECONDS", "600")))
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+
+    async def startup(self):
+        log_level = logging.getLevelName(logging.getLogger(ROOT).getEffectiveLevel())
+        context = multiprocessing.get_context("spawn")
+        self.pools = [
+            ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.model_dir, self.use_gesture_bank, log_level, self.detectors_per_worker),
+            )
+            for _ in range(self.workers)
+        ]
+        # Landmark-only requests are classified here; they cost well under a millisecond
+        self.models = GestureModels(self.model_dir, self.use_gesture_bank)
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        pids = await asyncio.gather(*(loop.run_in_executor(pool, _warm_worker) for pool in self.pools))
+        log.info("%d workers warm after %.1fs, accepting up to %d pending frames",
+                 len(set(pids)), time.perf_counter() - started, self.max_pending)
+
+    async def shutdown(self):
+        pools, self.pools = self.pools, []
+        for pool in pools:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def pool_for(self, session_id):
+        return self.pools[hash(session_id) % len(self.pools)]
+
+    async def recognize(self, kind, payload, session_id, started, shape=None):
+        """Run _recognize_job in the pool and apply the session's cooldown to its result"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ServerBusy(f"{self.pending} frames pending")
+        self.pending += 1
+        try:
+            hands, recognized, timings = await asyncio.get_running_loop().run_in_executor(
+                self.pool_for(session_id), _recognize_job, kind, payload, session_id, shape)
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        for stage, seconds in timings.items():
+            tracer.record(stage, seconds)
+        return self.fire(recognized, session_id, started)
+
+    def fire(self, recognized, session_id, started):
+        """Trigger the recognized gestures the session's cooldown lets through; started is the request's perf_counter()"""
+        session = self.sessions.get(session_id)
+        current_time = time.time()
+        detected_gestures = []
+        for gesture_name, confidence in recognized:
+            if session.try_fire(gesture_name, current_time):
+                log.info("Detected gesture: %s (session %s)", gesture_name, session_id)
+                with tracer.span("process_gesture"):
+                    session.sound.process_gesture(gesture_name)
+                detected_gestures.append(gesture_name)
+        if detected_gestures:
+            # Requests interleave on the event loop thread, so the tracer's per-thread frame start cannot be used
+            tracer.record("end_to_end", time.perf_counter() - started)
+        return {"status": "success", "gestures": detected_gestures}
+
+    def server_stats(self):
+        return {
+            "workers": self.workers,
+            "detectors_per_worker": self.detectors_per_worker,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    # ASGI plumbing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    log.exception("Startup failed")
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise UploadError("Client disconnected")
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise UploadError(f"Upload larger than {MAX_UPLOAD_BYTES} bytes", 413)
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    @staticmethod
+    async def _respond(send, status, body, extra_headers=()):
+        """Send body as JSON, or an empty response without Content-Length when body is None"""
+        headers = [(b"access-control-allow-origin", b"*"), *extra_headers]
+        payload = b""
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers += [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": payload})
+
+    async def _http(self, scope, receive, send):
+        method = scope["method"]
+        path = scope["path"].rstrip("/")
+        headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        if method == "OPTIONS":
+            # CORS preflight, as flask_cors answers it for the Flask app
+            await self._respond(send, 204, None, [
+                (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+                (b"access-control-allow-headers", b"*"),
+            ])
+            return
+        started = time.perf_counter()
+        try:
+            status, body = await self._route(method, path, scope, headers, receive, started)
+        except ServerBusy as e:
+            frame_log.warning("Rejected frame, server busy: %s", e)
+            await self._respond(send, 503, {"error": "Server busy, try again"}, [(b"retry-after", b"1")])
+            return
+        except (UploadError, ValueError) as e:
+            frame_log.error("Rejected request: %s", e)
+            status, body = getattr(e, "status", 400), {"error": str(e)}
+        except Exception as e:
+            frame_log.exception("Gesture processing error")
+            status, body = 500, {"error": str(e)}
+        await self._respond(send, status, body)
+
+    def _session_id(self, scope, headers, data=None):
+        """X-Session-ID header, session_id query parameter or field, else the client address"""
+        session_id = headers.get(SESSION_HEADER.lower())
+        if not session_id:
+            session_id = parse_qs(scope.get("query_string", b"").decode()).get("session_id", [None])[0]
+        if not session_id and data:
+            session_id = data.get("session_id")
+        client = scope.get("client")
+        return str(session_id or (client[0] if client else "anonymous"))
+
+    async def _route(self, method, path, scope, headers, receive, started):
+        if method == "GET" and path == "/api/state":
+            return 200, self.sessions.get(self._session_id(scope, headers)).state()
+        if method == "GET" and path == "/api/metrics":
+            return 200, tracer.snapshot()
+        if method == "GET" and path == "/api/metrics/server":
+            return 200, self.server_stats()
+        if method == "GET" and path == "/api/metrics/sessions":
+            return 200, self.sessions.stats()
+        if method != "POST":
+            return 404, {"error": "Not found"}
+
+        body = await self._read_body(receive)
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+
+        if path == "/api/gesture-frame":
+            data = json.loads(body or b"{}")
+            if not data.get("frame"):
+                return 400, {"error": "No frame data"}
+            return 200, await self.recognize("data_url", data["frame"], self._session_id(scope, headers, data), started)
+
+        if path == "/api/gesture-frame/binary":
+            session_id = self._session_id(scope, headers)
+            if content_type == RAW_TYPE:
+                shape = raw_frame_shape(headers.get("x-frame-width"), headers.get("x-frame-height"), len(body))
+                return 200, await self.recognize("raw", body, session_id, started, shape)
+            if content_type not in ENCODED_TYPES:
+                raise UploadError(f"Unsupported content type {content_type or 'none'}, "
+                                  f"send {', '.join(ENCODED_TYPES)} or {RAW_TYPE}", 415)
+            return 200, await self.recognize("encoded", body, session_id, started)
+
+        if path == "/api/landmarks":
+            if content_type in (LANDMARKS_TYPE, RAW_TYPE):
+                data = None
+                landmarks = landmarks_from_bytes(body, headers.get("x-handedness"), headers.get("x-timestamp"))
+            else:
+                data = json.loads(body or b"{}")
+                if not isinstance(data, dict):
+                    raise UploadError("Expected a JSON object or a binary landmark body")
+                landmarks = landmarks_from_json(data)
+            return 200, self.fire(self.models.recognized(landmarks), self._session_id(scope, headers, data), started)
+
+        if path == "/api/gesture":
+            data = json.loads(body or b"{}")
+            gesture = data.get("gesture")
+            session = self.sessions.get(self._session_id(scope, headers, data))
+            log.debug("Received gesture command: %s", gesture)
+            session.sound.process_gesture(gesture)
+            return 200, {"status": "success", "gesture": gesture, "state": session.state()}
+
+        return 404, {"error": "Not found"}
+
+
+def _env_int(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+# For `uvicorn api_asgi:app`; nothing heavy happens until the lifespan startup
+app = GestureASGIApp(
+    model_dir=os.environ.get("AEROMIX_MODEL_DIR", DEFAULT_MODEL_DIR),
+    workers=_env_int("AEROMIX_ASGI_WORKERS"),
+    max_pending=_env_int("AEROMIX_ASGI_MAX_PENDING"),
+    use_gesture_bank=os.environ.get("AEROMIX_GESTURE_BANK", "0") == "1",
+    detectors_per_worker=_env_int("AEROMIX_ASGI_DETECTORS_PER_WORKER"),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AEROMIX gesture API server (ASGI, process pool)')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--model-dir', type=str, default=app.model_dir)
+    parser.add_argument('--workers', type=int, default=app.workers,
+                        help='Worker processes, each serving a fixed share of the sessions')
+    parser.add_argument('--detectors-per-worker', type=int, default=app.detectors_per_worker,
+                        help='Sessions a worker tracks at once, each on its own detector')
+    parser.add_argument('--max-pending', type=int, default=None,
+                        help='Frames queued or in flight before new ones get 503 (default: 4 per worker)')
+    parser.add_argument('--gesture-bank', action='store_true', default=app.use_gesture_bank,
+                        help='Classify with the multi-class gesture bank')
+    add_log_arguments(parser, default_level=os.environ.get("AEROMIX_LOG_LEVEL", "info"))
+    args = parser.parse_args()
+    configure_logging(args.log_level, quiet=args.quiet)
+    try:
+        import uvicorn
+    except ImportError:
+        log.error("ASGI mode needs uvicorn (pip install uvicorn), or serve api_asgi:app with another ASGI server")
+        return 1
+    server_app = GestureASGIApp(args.model_dir, args.workers, args.max_pending, args.gesture_bank,
+                                args.detectors_per_worker)
+    uvicorn.run(server_app, host=args.host, port=args.port, log_level=logging.getLevelName(
+        logging.getLogger(ROOT).getEffectiveLevel()).lower())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
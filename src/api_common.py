@@ -0,0 +1,329 @@
+"""
+Request-independent parts of the gesture API, shared by the Flask app
+(api.py) and the ASGI server (api_asgi.py) and importable by worker
+processes without starting either: sound state, client sessions, gesture
+models and the frame/landmark payload formats.
+"""
+import base64
+import os
+import threading
+import time
+import cv2
+import numpy as np
+from ml.classifier import GestureClassifier
+from ml.gesture_bank import load_gesture_bank
+from ml.features import FeatureCache
+from ml.model_format import discover_models
+from ml.temporal import PredictionVote
+from utils.landmarks import LandmarkFrame, NUM_HAND_LANDMARKS
+from utils.tracing import tracer
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+COOLDOWN_SECONDS = 1.0
+# Classifier confidence a prediction needs to trigger its gesture
+GESTURE_CONFIDENCE = 0.85
+SESSION_HEADER = "X-Session-ID"
+# Recognitions per session a gesture is voted over, and how many must agree before it fires
+SESSION_VOTE_FRAMES = 10
+SESSION_VOTE_THRESHOLD = 6
+
+MAX_UPLOAD_BYTES = 16 * 1024 * 1024
+MAX_RAW_PIXELS = 4096 * 4096
+ENCODED_TYPES = ("image/jpeg", "image/png", "image/webp")
+RAW_TYPE = "application/octet-stream"
+LANDMARKS_TYPE = "application/x-aeromix-landmarks"
+HAND_VALUES = NUM_HAND_LANDMARKS * 3
+HAND_BYTES = HAND_VALUES * 4
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class SoundController:
+    def __init__(self, osc_handler=None):
+        self.volume = 0.7
+        self.bass = 0.5
+        self.tempo = 1.0
+        self.pitch = 1.0
+        self.osc_handler = osc_handler
+
+    def adjust_volume(self, delta):
+        self.volume = max(0.0, min(1.0, self.volume + delta))
+        log.debug("Volume adjusted to: %s", self.volume)
+
+    def adjust_bass(self, delta):
+        self.bass = max(0.0, min(1.0, self.bass + delta))
+        log.debug("Bass adjusted to: %s", self.bass)
+
+    def adjust_tempo(self, delta):
+        self.tempo = max(0.5, min(2.0, self.tempo + delta))
+        log.debug("Tempo adjusted to: %s", self.tempo)
+
+    def adjust_pitch(self, delta):
+        self.pitch = max(0.5, min(2.0, self.pitch + delta))
+        log.debug("Pitch adjusted to: %s", self.pitch)
+
+    def state(self):
+        return {
+            "volume": self.volume,
+            "bass": self.bass,
+            "tempo": self.tempo,
+            "pitch": self.pitch
+        }
+
+    def process_gesture(self, gesture):
+        log.debug("Processing gesture: %s", gesture)
+        if gesture == "volume_up":
+            self.adjust_volume(0.1)
+        elif gesture == "volume_down":
+            self.adjust_volume(-0.1)
+        elif gesture == "tempo_up":
+            self.adjust_tempo(0.1)
+        elif gesture == "tempo_down":
+            self.adjust_tempo(-0.1)
+        elif gesture == "bass_up":
+            self.adjust_bass(0.1)
+        elif gesture == "bass_down":
+            self.adjust_bass(-0.1)
+        elif gesture == "pitch_up":
+            self.adjust_pitch(0.1)
+        elif gesture == "pitch_down":
+            self.adjust_pitch(-0.1)
+
+
+class ClientSession:
+    """
+    One client's gesture state: its own sound parameters, gesture cooldown
+    and a vote over its recent recognitions that a gesture must win before it
+    fires, guarded by the lock. Detection runs outside it, so the lock is only
+    held for classification, the vote and cooldowns.
+    """
+
+    def __init__(self, osc_handler=None):
+        self.lock = threading.Lock()
+        self.sound = SoundController(osc_handler)
+        self.vote = PredictionVote(size=SESSION_VOTE_FRAMES, threshold=SESSION_VOTE_THRESHOLD)
+        self.last_gesture = None
+        self.last_gesture_time = 0
+        self.last_seen = time.monotonic()
+
+    def try_fire(self, gesture_name, current_time):
+        """Record a recognized gesture; it fires once it wins the vote, unless the cooldown holds it back"""
+        if self.vote.push(gesture_name) != gesture_name:
+            log.debug("Gesture %s not yet confirmed by the vote", gesture_name)
+            return False
+        if (self.last_gesture == gesture_name and
+            (current_time - self.last_gesture_time) < COOLDOWN_SECONDS):
+            log.debug("Gesture %s ignored due to cooldown", gesture_name)
+            return False
+        self.last_gesture = gesture_name
+        self.last_gesture_time = current_time
+        return True
+
+    def state(self):
+        state = self.sound.state()
+        state["last_gesture"] = self.last_gesture
+        state["dominant_gesture"] = self.vote.winner()
+        return state
+
+
+class SessionStore:
+    """
+    Client sessions by ID, created on first use by `factory`. Sessions are
+    spread over `shards` dicts with a lock each, so concurrent requests from
+    different clients rarely contend, and sessions unused for `idle_timeout`
+    seconds are evicted by a sweep that runs at most every `sweep_interval`.
+    """
+
+    def __init__(self, factory=ClientSession, shards=16, idle_timeout=600.0, sweep_interval=30.0):
+        self.factory = factory
+        self._shards = [({}, threading.Lock()) for _ in range(max(int(shards), 1))]
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self._sweep_lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.created = 0
+        self.evicted = 0
+
+    def _shard(self, session_id):
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    def get(self, session_id):
+        now = time.monotonic()
+        sessions, lock = self._shard(session_id)
+        with lock:
+            session = sessions.get(session_id)
+            if session is None:
+                session = sessions[session_id] = self.factory()
+                self.created += 1
+            session.last_seen = now
+        if now - self._last_sweep >= self.sweep_interval:
+            self.evict_idle(now)
+        return session
+
+    def evict_idle(self, now=None):
+        """Drop sessions idle for longer than idle_timeout; returns how many went"""
+        # One sweep at a time, and none at all while another thread is sweeping
+        if not self._sweep_lock.acquire(blocking=False):
+            return 0
+        try:
+            now = time.monotonic() if now is None else now
+            self._last_sweep = now
+            cutoff = now - self.idle_timeout
+            evicted = 0
+            for sessions, lock in self._shards:
+                with lock:
+                    idle = [session_id for session_id, session in sessions.items()
+                            if session.last_seen < cutoff and not session.lock.locked()]
+                    for session_id in idle:
+                        del sessions[session_id]
+                evicted += len(idle)
+            if evicted:
+                self.evicted += evicted
+                log.info("Evicted %d idle sessions, %d left", evicted, len(self))
+            return evicted
+        finally:
+            self._sweep_lock.release()
+
+    def __len__(self):
+        return sum(len(sessions) for sessions, _ in self._shards)
+
+    def stats(self):
+        sizes = [len(sessions) for sessions, _ in self._shards]
+        return {
+            "sessions": sum(sizes),
+            "shards": len(sizes),
+            "largest_shard": max(sizes),
+            "created": self.created,
+            "evicted": self.evicted,
+            "idle_timeout": self.idle_timeout,
+        }
+
+
+class GestureModels:
+    """The per-gesture classifiers, or the optional gesture bank, sharing one per-frame feature cache"""
+
+    def __init__(self, model_dir="model/trained", use_gesture_bank=False):
+        self.feature_cache = FeatureCache()
+        self.classifiers = {}
+        self.bank = None
+        if os.path.exists(model_dir):
+            # Compiled .amx models are preferred and only memory-mapped on first use
+            for gesture_name, model_path in discover_models(model_dir).items():
+                self.classifiers[gesture_name] = GestureClassifier(model_path, self.feature_cache)
+                log.info("Loaded model for gesture: %s", gesture_name)
+        else:
+            log.error("Model directory %s does not exist", model_dir)
+
+        # Optional single multi-class gesture bank, evaluated in one pass per frame
+        if use_gesture_bank:
+            self.bank = load_gesture_bank(model_dir, self.feature_cache)
+            if self.bank is not None:
+                log.info("Loaded gesture bank with gestures: %s", self.bank.gestures)
+            else:
+                log.warning("Gesture bank requested but none found, using per-gesture models")
+
+    @property
+    def loaded(self):
+        return bool(self.classifiers) or self.bank is not None
+
+    def classify(self, landmarks):
+        """Yield (gesture_name, prediction, confidence) for every gesture evaluated on this frame"""
+        if self.bank is not None:
+            with tracer.span("features"):
+                features = self.bank.preprocess_landmarks(landmarks)
+            if features.size == 0:
+                return
+            with tracer.span("classify.gesture_bank"):
+                gesture, confidence = self.bank.classify(features)
+            log.debug("Gesture bank prediction: %s with confidence %.2f", gesture, confidence)
+            if gesture:
+                yield gesture, gesture, confidence
+            return
+
+        for gesture_name, classifier in self.classifiers.items():
+            with tracer.span("features"):
+                features = classifier.preprocess_landmarks(landmarks)
+            if features.size == 0:
+                log.debug("No features extracted for gesture: %s", gesture_name)
+                continue
+            log.debug("Features extracted for gesture %s: %s", gesture_name, features.shape)
+            with tracer.span(f"classify.{gesture_name}"):
+                prediction, confidence = classifier.predict_with_confidence(features)
+            log.debug("Prediction: %s with confidence %.2f", prediction, confidence)
+            yield gesture_name, prediction, confidence
+
+    def recognized(self, landmarks):
+        """(gesture_name, confidence) of the gestures confidently recognized in a frame"""
+        if not landmarks.has_hands:
+            return []
+        return [(gesture_name, confidence) for gesture_name, prediction, confidence in self.classify(landmarks)
+                if prediction == gesture_name and confidence > GESTURE_CONFIDENCE]
+
+
+def decode_data_url(frame_data):
+    """BGR image from a base64 data URL, or None if it does not decode"""
+    imgstr = frame_data.split(',')[1]
+    img_bytes = base64.b64decode(imgstr)
+    nparr = np.frombuffer(img_bytes, np.uint8)
+    return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+
+def raw_frame_shape(width, height, length):
+    """Validated (height, width, 3) of a raw BGR upload of `length` bytes"""
+    try:
+        width, height = int(width), int(height)
+    except (TypeError, ValueError):
+        raise UploadError("Raw frames need integer X-Frame-Width and X-Frame-Height headers")
+    if width <= 0 or height <= 0 or width * height > MAX_RAW_PIXELS:
+        raise UploadError(f"Unsupported raw frame size {width}x{height}", 413)
+    if length != width * height * 3:
+        raise UploadError(f"Raw BGR {width}x{height} frame is {width * height * 3} bytes, got {length}")
+    return height, width, 3
+
+
+def parse_handedness(value, hand_count):
+    """'left,right' or '1,0' -> is_left flags; hands default to right when not given"""
+    if not value:
+        return [False] * hand_count
+    flags = [part.strip().lower() in ("left", "l", "1", "true") for part in value.split(",")]
+    if len(flags) != hand_count:
+        raise UploadError(f"Got {hand_count} hands but {len(flags)} handedness flags")
+    return flags
+
+
+def landmarks_from_json(data):
+    """
+    LandmarkFrame from {"points": [[x, y, z] * 21 per hand] or a flat list of
+    63 values per hand, "is_left": [...], "timestamp": t}, or from the legacy
+    {"left_hand": [{"x", "y", "z"}], "right_hand": [...]} form
+    """
+    if "points" not in data and ("left_hand" in data or "right_hand" in data):
+        return LandmarkFrame.from_dict(data, data.get("timestamp"))
+    points = np.asarray(data.get("points") or [], dtype=np.float32)
+    if points.size % HAND_VALUES:
+        raise UploadError(f"Expected {HAND_VALUES} values per hand, got {points.size}")
+    hand_count = points.size // HAND_VALUES
+    is_left = data.get("is_left")
+    if isinstance(is_left, str) or is_left is None:
+        is_left = parse_handedness(is_left, hand_count)
+    return LandmarkFrame(points.reshape(hand_count, NUM_HAND_LANDMARKS, 3), is_left, data.get("timestamp"))
+
+
+def landmarks_from_bytes(body, handedness=None, timestamp=None):
+    """
+    LandmarkFrame from little-endian float32 values, 21 x 3 per hand, with
+    handedness as for parse_handedness
+    """
+    length = len(body)
+    if length % HAND_BYTES or length > HAND_BYTES * 4:
+        raise UploadError(f"Body must hold up to 4 hands of {HAND_BYTES} bytes, got {length}")
+    hand_count = length // HAND_BYTES
+    points = np.frombuffer(body, dtype="<f4").reshape(hand_count, NUM_HAND_LANDMARKS, 3).copy()
+    return LandmarkFrame(points, parse_handedness(handedness, hand_count),
+                         float(timestamp) if timestamp else None)
@@ -0,0 +1,344 @@
+"""
+Benchmarks for the recognition path: hand detection, feature extraction,
+classification, the app's recognize/render steps and the API's
+/api/gesture-frame route.
+
+Each stage runs on synthetic frames and landmarks (or those of a session
+recorded with main.py --record) and reports throughput plus latency
+percentiles as JSON. Comparing against a stored baseline fails with exit
+status 1 when a stage got slower than the allowed regression:
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --baseline baseline.json --max-regression 10
+
+Stages whose dependencies are missing (MediaPipe, Flask, the OSC and audio
+backends) are reported as skipped rather than failing the run.
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import sys
+import time
+import cv2
+import numpy as np
+from ml.classifier import GestureClassifier
+from ml.model_format import discover_models
+from utils.landmarks import LandmarkFrame, NUM_HAND_LANDMARKS
+from utils.session import SessionReader
+from utils.tracing import LatencyHistogram
+from utils.log import add_arguments as add_log_arguments, configure as configure_logging, get_logger
+
+log = get_logger(__name__)
+
+RESULTS_VERSION = 1
+STAGES = ("detect", "preprocess", "predict", "recognize", "render", "api")
+DEFAULT_FRAME_SIZE = (640, 480)
+COMPARE_METRICS = ("p50_ms", "p95_ms", "p99_ms", "mean_ms")
+
+
+class StageSkipped(Exception):
+    """A stage cannot run in this environment, e.g. an optional dependency is missing"""
+
+
+def synthetic_frames(count, size=DEFAULT_FRAME_SIZE, seed=0):
+    """Noisy BGR frames with a skin-coloured blob, so image stages do real work"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    frames = []
+    for index in range(count):
+        frame = rng.integers(0, 64, (height, width, 3), dtype=np.uint8)
+        center = (int(width * (0.3 + 0.4 * index / max(count, 1))), height // 2)
+        cv2.ellipse(frame, center, (width // 10, height // 6), 0, 0, 360, (120, 160, 210), -1)
+        frames.append(frame)
+    return frames
+
+
+def synthetic_landmarks(count, seed=0):
+    """One-hand LandmarkFrames: a random base hand jittered a little from frame to frame"""
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(0.3, 0.7, (NUM_HAND_LANDMARKS, 3)).astype(np.float32)
+    base[:, 2] = rng.uniform(-0.1, 0.1, NUM_HAND_LANDMARKS)
+    start = time.time()
+    return [
+        LandmarkFrame((base + rng.normal(0, 0.01, base.shape))[None], [index % 2 == 0], start + index / 30)
+        for index in range(count)
+    ]
+
+
+def load_inputs(args):
+    """(frames, landmarks) from --session, falling back to synthetic data for whatever it lacks"""
+    frames = landmarks = None
+    if args.session:
+        reader = SessionReader(args.session)
+        count = min(len(reader), args.inputs)
+        landmarks = [reader.landmarks(index) for index in range(count)
+                     if reader.landmarks(index).has_hands] or None
+        if reader.has_frames:
+            frames = [np.array(reader.frame(index)) for index in range(count)]
+        log.info("Loaded %d frames and %d hand landmarks from %s",
+                 len(frames or []), len(landmarks or []), args.session)
+    if frames is None:
+        frames = synthetic_frames(args.inputs, tuple(args.frame_size))
+    if landmarks is None:
+        landmarks = synthetic_landmarks(args.inputs)
+    return frames, landmarks
+
+
+def measure(fn, inputs, warmup=10, iterations=200, min_time=0.0):
+    """
+    Call fn on the inputs in turn and return the latency snapshot of the timed
+    calls, plus their throughput. Runs at least `iterations` calls and keeps
+    going until `min_time` seconds have been spent timing.
+    """
+    for index in range(warmup):
+        fn(inputs[index % len(inputs)])
+    histogram = LatencyHistogram()
+    index = 0
+    started = time.perf_counter()
+    while index < iterations or time.perf_counter() - started < min_time:
+        item = inputs[index % len(inputs)]
+        call_start = time.perf_counter()
+        fn(item)
+        histogram.record(time.perf_counter() - call_start)
+        index += 1
+    snapshot = histogram.snapshot()
+    snapshot["ops_per_s"] = histogram.count / histogram.total if histogram.total else None
+    return snapshot
+
+
+def load_classifiers(model_dir):
+    if not os.path.isdir(model_dir):
+        raise StageSkipped(f"model directory {model_dir} does not exist")
+    classifiers = {}
+    for gesture_name, model_path in discover_models(model_dir).items():
+        classifier = GestureClassifier(model_path)
+        if classifier.is_loaded:
+            classifiers[gesture_name] = classifier
+    if not classifiers:
+        raise StageSkipped(f"no models in {model_dir}")
+    return classifiers
+
+
+class Benchmarks:
+    """Builds each stage's callable lazily, so a run only pays for the stages it selects"""
+
+    def __init__(self, args, frames, landmarks):
+        self.args = args
+        self.frames = frames
+        self.landmarks = landmarks
+        self._app = None
+        self._classifiers = None
+
+    @property
+    def classifiers(self):
+        if self._classifiers is None:
+            self._classifiers = load_classifiers(self.args.model_dir)
+        return self._classifiers
+
+    @property
+    def app(self):
+        if self._app is None:
+            try:
+                from main import AeroMixApp
+                # Only the recognition state is used, so no OSC server or playback
+                self._app = AeroMixApp(model_dir=self.args.model_dir, headless=True)
+            except ImportError as e:
+                raise StageSkipped(f"AeroMixApp unavailable: {e}")
+        return self._app
+
+    def run(self, stage):
+        """{result name: snapshot} for one stage"""
+        return getattr(self, f"bench_{stage}")()
+
+    def _measure(self, fn, inputs):
+        return measure(fn, inputs, self.args.warmup, self.args.iterations, self.args.min_time)
+
+    def bench_detect(self):
+        try:
+            from utils.gesture_Detection import GestureDetector
+        except ImportError as e:
+            raise StageSkipped(f"GestureDetector unavailable: {e}")
+        detector = GestureDetector()
+        if detector.hands is None:
+            raise StageSkipped("MediaPipe Hands failed to initialize")
+        try:
+            return {"detect": self._measure(lambda frame: detector.detect_landmarks(frame, annotate=False),
+                                            self.frames)}
+        finally:
+            detector.release()
+
+    def bench_preprocess(self):
+        # Classifiers without a FeatureCache, so every call extracts features
+        results = {}
+        for gesture_name, classifier in self.classifiers.items():
+            results[f"preprocess.{gesture_name}"] = self._measure(classifier.preprocess_landmarks, self.landmarks)
+        return results
+
+    def bench_predict(self):
+        results = {}
+        for gesture_name, classifier in self.classifiers.items():
+            features = [classifier.preprocess_landmarks(landmarks) for landmarks in self.landmarks]
+            results[f"predict.{gesture_name}"] = self._measure(classifier.predict, features)
+        return results
+
+    def bench_recognize(self):
+        return {"recognize": self._measure(self.app.recognize_gesture, self.landmarks)}
+
+    def bench_render(self):
+        app = self.app
+        return {"render": self._measure(lambda frame: app.enhanced_visualization(frame.copy()), self.frames)}
+
+    def bench_api(self):
+        try:
+            import api
+        except ImportError as e:
+            raise StageSkipped(f"API unavailable: {e}")
+        client = api.app.test_client()
+        payloads = []
+        for frame in self.frames[:self.args.inputs]:
+            ok, encoded = cv2.imencode(".jpg", frame)
+            payloads.append({"frame": "data:image/jpeg;base64," + base64.b64encode(encoded.tobytes()).decode()})
+
+        def post(payload):
+            response = client.post("/api/gesture-frame", json=payload)
+            if response.status_code != 200:
+                raise RuntimeError(f"/api/gesture-frame returned {response.status_code}: {response.get_data(as_text=True)}")
+
+        return {"api.gesture_frame": self._measure(post, payloads)}
+
+    def close(self):
+        if self._app is not None:
+            self._app.shutdown()
+
+
+def run_benchmarks(args):
+    frames, landmarks = load_inputs(args)
+    benchmarks = Benchmarks(args, frames, landmarks)
+    results = {
+        "version": RESULTS_VERSION,
+        "created_at": time.time(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "config": {
+            "frame_size": list(frames[0].shape[1::-1]),
+            "inputs": len(frames),
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "session": args.session,
+        },
+        "stages": {},
+        "skipped": {},
+    }
+    try:
+        for stage in args.stages:
+            log.info("Benchmarking %s...", stage)
+            try:
+                results["stages"].update(benchmarks.run(stage))
+            except StageSkipped as e:
+                log.warning("Skipping %s: %s", stage, e)
+                results["skipped"][stage] = str(e)
+    finally:
+        benchmarks.close()
+    return results
+
+
+def compare(results, baseline, metric="p50_ms", max_regression=10.0):
+    """
+    Compare each stage's metric against the baseline. Returns (rows, regressions),
+    rows being (stage, baseline, current, change in percent or None).
+    """
+    rows = []
+    regressions = []
+    for stage, snapshot in sorted(results["stages"].items()):
+        previous = baseline.get("stages", {}).get(stage)
+        current = snapshot.get(metric)
+        if not previous or previous.get(metric) is None or current is None:
+            rows.append((stage, None, current, None))
+            continue
+        change = (current - previous[metric]) / previous[metric] * 100 if previous[metric] else 0.0
+        rows.append((stage, previous[metric], current, change))
+        if change > max_regression:
+            regressions.append(stage)
+    return rows, regressions
+
+
+def format_results(results):
+    lines = [f"{'stage':<28}{'count':>8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+    for stage, snapshot in sorted(results["stages"].items()):
+        lines.append(
+            f"{stage:<28}{snapshot['count']:>8}{snapshot['ops_per_s']:>10.1f}{snapshot['p50_ms']:>10.3f}"
+            f"{snapshot['p95_ms']:>10.3f}{snapshot['p99_ms']:>10.3f}{snapshot['max_ms']:>10.3f}"
+        )
+    for stage, reason in results["skipped"].items():
+        lines.append(f"{stage:<28}skipped: {reason}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows, metric):
+    lines = [f"{'stage':<28}{'baseline':>12}{'current':>12}{'change':>10}   ({metric})"]
+    for stage, previous, current, change in rows:
+        if change is None:
+            lines.append(f"{stage:<28}{'-':>12}{current if current is not None else '-':>12}{'new':>10}")
+        else:
+            lines.append(f"{stage:<28}{previous:>12.3f}{current:>12.3f}{change:>+9.1f}%")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AEROMIX benchmarks')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES),
+                        help='Stages to benchmark (default: all)')
+    parser.add_argument('--model-dir', type=str, default='model/trained',
+                        help='Directory of the trained models to classify with')
+    parser.add_argument('--session', type=str, default=None,
+                        help='Use the landmarks (and frames, if recorded) of a main.py --record session')
+    parser.add_argument('--inputs', type=int, default=100,
+                        help='Number of distinct frames/landmarks cycled through')
+    parser.add_argument('--frame-size', type=int, nargs=2, default=list(DEFAULT_FRAME_SIZE),
+                        metavar=('WIDTH', 'HEIGHT'), help='Size of the synthetic frames')
+    parser.add_argument('--iterations', type=int, default=200,
+                        help='Minimum timed calls per stage')
+    parser.add_argument('--min-time', type=float, default=1.0,
+                        help='Minimum seconds of timed calls per stage')
+    parser.add_argument('--warmup', type=int, default=10,
+                        help='Untimed calls before measuring each stage')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Write the results as JSON to this file')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='Results JSON to compare against')
+    parser.add_argument('--metric', choices=COMPARE_METRICS, default='p50_ms',
+                        help='Latency metric compared against the baseline')
+    parser.add_argument('--max-regression', type=float, default=10.0,
+                        help='Fail when a stage is more than this many percent slower than the baseline')
+    add_log_arguments(parser)
+    args = parser.parse_args()
+    configure_logging(args.log_level, quiet=args.quiet, stream=sys.stderr)
+
+    results = run_benchmarks(args)
+    print(format_results(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        log.info("Results written to %s", args.output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(results, baseline, args.metric, args.max_regression)
+        print(format_comparison(rows, args.metric))
+        if regressions:
+            log.error("%d stage(s) more than %g%% slower than the baseline: %s",
+                      len(regressions), args.max_regression, ", ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,43 +7,120 @@ import numpy as np
 from utils.osc_handler import OSCHandler
 from ml.classifier import GestureClassifier
 from ml.trainer import GestureTrainer
+from ml.gesture_bank import load_gesture_bank
+from ml.features import FeatureCache
+from ml.model_format import discover_models
+from ml.temporal import (TemporalFeatureTracker, DynamicGestureClassifier, PredictionVote,
+                         DYNAMIC_SUFFIX, COMPILED_DYNAMIC_SUFFIX)
 from sound_control import SoundController
 from utils.gesture_Detection import GestureDetector
+from utils.landmarks import LandmarkFrame
+from pipeline import RecognitionPipeline
+from multisource import MultiSourceRecognizer
+from utils.frame_buffers import FramePool
+from utils.tracing import tracer
+from utils.session import ReplayCamera, SessionReader, SessionRecorder
+from utils.log import (add_arguments as add_log_arguments, configure as configure_logging,
+                       get_frame_logger, get_logger)
+
+log = get_logger(__name__)
+frame_log = get_frame_logger(__name__)
 
 class AeroMixApp:
-    def __init__(self, model_dir="model/trained", training_mode=False):
-        print("AeroMixApp: Initializing...")
-        self.osc_handler = OSCHandler(receive_port=5015, send_port=5016)
+    def __init__(self, model_dir="model/trained", training_mode=False, use_gesture_bank=False,
+                 tune_hyperparameters=False, incremental_training=False, background_rebuild=False,
+                 temporal_window=20, pipelined=False, roi_tracking=False, detection_size=None,
+                 reuse_buffers=False, detect_every=1, adaptive_rate=False, target_fps=60, idle_after=None,
+                 record_path=None, record_frames=False, camera_session=None, replay_speed=1.0, headless=False):
+        log.info("Initializing...")
+        # Headless runs (replays, benchmarks) neither listen for OSC nor start playback,
+        # so several can run side by side on one machine
+        self.headless = headless
+        self.osc_handler = OSCHandler(receive_port=None if headless else 5015, send_port=5016)
         self.sound_controller = SoundController(self.osc_handler)
-        self.trainer = GestureTrainer(save_dir=model_dir)
+        self.trainer = GestureTrainer(save_dir=model_dir, tune_hyperparameters=tune_hyperparameters,
+                                      incremental=incremental_training, background_rebuild=background_rebuild)
+        self.trainer.on_model_updated = self.on_model_updated
         self.gestures = {}
+        self.dynamic_gestures = {}
+        self.temporal_tracker = TemporalFeatureTracker(window=temporal_window)
+        self.feature_cache = FeatureCache()
+        self.gesture_bank = None
+        self.use_gesture_bank = use_gesture_bank
         self.model_dir = model_dir
         self.load_gesture_models(model_dir)
         self.running = False
         self.training_mode = training_mode
+        self.pipelined = pipelined
+        self.pipeline_stats = None
+        self.reset_recognition_state()
         self.webcam = None
-        self.gesture_detector = GestureDetector()
+        # Mirrored camera frames are returned to the pool once detection is done with them
+        self.frame_pool = FramePool() if reuse_buffers else None
+        self._raw_frame = None
+        # Kept so multi-source workers can build detectors configured like this one
+        self.detector_options = dict(roi_tracking=roi_tracking, detection_size=detection_size,
+                                     reuse_buffers=reuse_buffers, detect_every=detect_every,
+                                     adaptive_rate=adaptive_rate, target_fps=target_fps,
+                                     idle_after=idle_after)
+        self.gesture_detector = GestureDetector(**self.detector_options)
         self._detector_released = False
-        self.setup_osc_handlers()
-        if not self.training_mode:
+        # Detector output of every recognized frame can be recorded for later replay,
+        # and a session recorded with frames can stand in for the webcam
+        self.recorder = SessionRecorder(record_path, record_frames) if record_path else None
+        self.camera_session = camera_session
+        self.replay_speed = replay_speed
+        if not self.headless:
+            self.setup_osc_handlers()
+        if not self.training_mode and not self.headless:
             self.sound_controller.control_playback("play", "data/audio/audio3.mp3")
 
     def load_gesture_models(self, model_dir):
-        print(f"Loading gesture models from {model_dir}")
-        self.gestures = {}
+        log.info("Loading gesture models from %s", model_dir)
         if not os.path.exists(model_dir):
+            self.gestures = {}
             os.makedirs(model_dir, exist_ok=True)
             return
-        for filename in os.listdir(model_dir):
-            if filename.endswith("_model.pkl"):
-                gesture_name = filename.replace("_model.pkl", "")
-                model_path = os.path.join(model_dir, filename)
-                try:
-                    self.gestures[gesture_name] = GestureClassifier(model_path)
-                    print(f"Loaded model for gesture: {gesture_name}")
-                except Exception as e:
-                    print(f"Failed to load model for {gesture_name}: {e}")
-        print(f"Loaded gestures: {list(self.gestures.keys())}")
+        # Build the new set aside and swap it in, so a background reload never
+        # changes the dict the recognition loop is iterating
+        gestures = {}
+        for gesture_name, model_path in discover_models(model_dir).items():
+            try:
+                classifier = GestureClassifier(model_path, self.feature_cache)
+                if not classifier.is_loaded:
+                    raise ValueError(f"could not load {model_path}")
+                gestures[gesture_name] = classifier
+                log.info("Loaded model for gesture: %s", gesture_name)
+            except Exception as e:
+                log.error("Failed to load model for %s: %s", gesture_name, e)
+        self.gestures = gestures
+        log.info("Loaded gestures: %s", list(self.gestures.keys()))
+        dynamic_gestures = {}
+        for gesture_name, model_path in discover_models(model_dir, DYNAMIC_SUFFIX, COMPILED_DYNAMIC_SUFFIX).items():
+            classifier = DynamicGestureClassifier(model_path)
+            if classifier.is_loaded:
+                dynamic_gestures[gesture_name] = classifier
+        self.dynamic_gestures = dynamic_gestures
+        if self.dynamic_gestures:
+            log.info("Loaded dynamic gestures: %s", list(self.dynamic_gestures.keys()))
+        if self.use_gesture_bank:
+            self.load_gesture_bank(model_dir)
+
+    def load_gesture_bank(self, model_dir):
+        self.gesture_bank = load_gesture_bank(model_dir, self.feature_cache)
+        if self.gesture_bank is None and self.trainer.build_gesture_bank():
+            self.gesture_bank = load_gesture_bank(model_dir, self.feature_cache)
+        if self.gesture_bank is not None:
+            log.info("Gesture bank loaded with gestures: %s", self.gesture_bank.gestures)
+        else:
+            log.info("Gesture bank unavailable, falling back to per-gesture models")
+
+    def on_model_updated(self, gesture_name):
+        """Reload models after a background rebuild replaced one"""
+        log.info("Model for %s rebuilt in background, reloading models", gesture_name)
+        if self.use_gesture_bank:
+            self.trainer.build_gesture_bank()
+        self.load_gesture_models(self.model_dir)
 
     @staticmethod
     def clean_args(args):
@@ -65,7 +142,7 @@ class AeroMixApp:
         return cleaned
 
     def setup_osc_handlers(self):
-        print("Setting up OSC handlers...")
+        log.info("Setting up OSC handlers...")
         self.osc_handler.add_handler("/pd/landmarks", self.handle_landmarks)
         self.osc_handler.add_handler("/pd/training/start", self.start_training)
         self.osc_handler.add_handler("/pd/training/record", self.record_training_sample)
@@ -74,12 +151,18 @@ class AeroMixApp:
         self.osc_handler.add_handler("/training/start", self.start_training)
         self.osc_handler.add_handler("/training/record", self.record_training_sample)
         self.osc_handler.add_handler("/training/stop", self.stop_training)
+        self.osc_handler.add_handler("/metrics", self.send_metrics)
         self.osc_handler.dispatcher.set_default_handler(
-            lambda address, *args: print(f"DEFAULT HANDLER: {address} {args}")
+            lambda address, *args: log.debug("Default handler: %s %s", address, args)
         )
         self.osc_server_thread = self.osc_handler.start_server()
 
+    def send_metrics(self, address, *args):
+        """Reply to /metrics with the latency histograms as a JSON string on /metrics/reply"""
+        self.osc_handler.send_message(self.METRICS_REPLY_ADDRESS, tracer.to_json())
+
     def handle_landmarks(self, address, *args):
+        tracer.begin_frame()
         args = self.clean_args(args)
         if len(args) > 0:
             try:
@@ -87,16 +170,17 @@ class AeroMixApp:
                     try:
                         landmarks = json.loads(args[0])
                     except json.JSONDecodeError:
-                        print(f"Received non-JSON data: {args[0][:100]}...")
+                        frame_log.warning("Received non-JSON data: %s...", args[0][:100])
                         return
                 else:
                     landmarks = self.reconstruct_landmarks_from_list(args)
+                landmarks = LandmarkFrame.from_dict(landmarks)
                 if self.training_mode:
-                    print("Training mode active: not processing landmarks for recognition.")
+                    frame_log.info("Training mode active: not processing landmarks for recognition.")
                 else:
                     self.recognize_gesture(landmarks)
             except Exception as e:
-                print(f"Error processing landmarks: {e}")
+                frame_log.error("Error processing landmarks: %s", e)
 
     def reconstruct_landmarks_from_list(self, args):
         landmarks = {"pose": [], "left_hand": [], "right_hand": []}
@@ -116,26 +200,65 @@ class AeroMixApp:
                     if i+1 < len(coords):
                         landmarks["left_hand"].append({"x": float(coords[i]), "y": float(coords[i+1]), "z": 0.0})
         except Exception as e:
-            print(f"Error reconstructing landmarks: {e}")
+            frame_log.error("Error reconstructing landmarks: %s", e)
         return landmarks
 
     def recognize_gesture(self, landmarks):
         detected_gestures = []
-        for gesture_name, classifier in self.gestures.items():
-            try:
-                features = classifier.preprocess_landmarks(landmarks)
-                if features.size > 0:
-                    prediction = classifier.predict(features)
-                    if prediction == gesture_name:
-                        detected_gestures.append(gesture_name)
-                        print(f"Detected gesture: {gesture_name}")
-            except Exception as e:
-                print(f"Error predicting with model {gesture_name}: {e}")
+        if self.gesture_bank is not None:
+            gesture = self.predict_with_bank(landmarks)
+            if gesture:
+                detected_gestures.append(gesture)
+                log.debug("Detected gesture: %s", gesture)
+        else:
+            for gesture_name, classifier in self.gestures.items():
+                try:
+                    features = classifier.preprocess_landmarks(landmarks)
+                    if features.size > 0:
+                        prediction = classifier.predict(features)
+                        if prediction == gesture_name:
+                            detected_gestures.append(gesture_name)
+                            log.debug("Detected gesture: %s", gesture_name)
+                except Exception as e:
+                    frame_log.error("Error predicting with model %s: %s", gesture_name, e)
         for gesture in detected_gestures:
             self.process_gesture(gesture)
+        if detected_gestures:
+            tracer.end_frame("end_to_end")
+
+    def update_dynamic_gestures(self, landmarks, temporal_tracker=None):
+        """Feed the temporal tracker and classify motion gestures once its window is full"""
+        temporal_tracker = temporal_tracker or self.temporal_tracker
+        _, hand_points = landmarks.select_hand()
+        if hand_points is None:
+            return None
+        temporal_tracker.push(hand_points, landmarks.timestamp)
+        if not self.dynamic_gestures or not temporal_tracker.ready:
+            return None
+        features = temporal_tracker.features()
+        for gesture_name, classifier in self.dynamic_gestures.items():
+            if classifier.predict(features) == gesture_name:
+                # The caller resets the tracker if the gesture fires, so one motion triggers once
+                return gesture_name
+        return None
+
+    def predict_with_bank(self, landmarks):
+        """Classify a frame with one forward pass through the gesture bank"""
+        try:
+            features = self.gesture_bank.preprocess_landmarks(landmarks)
+            if features.size > 0:
+                gesture, _ = self.gesture_bank.classify(features)
+                return gesture
+        except Exception as e:
+            frame_log.error("Error predicting with gesture bank: %s", e)
+        return None
 
     def process_gesture(self, gesture):
-        print(f"Processing gesture: {gesture}")
+        with tracer.span("process_gesture"):
+            self._process_gesture(gesture)
+
+    def _process_gesture(self, gesture):
+        frame_log.info("Processing gesture: %s", gesture)
         if gesture == "volume_up":
             self.sound_controller.adjust_volume(0.1)
         elif gesture == "volume_down":
@@ -156,30 +279,36 @@ class AeroMixApp:
             self.sound_controller.control_playback("play", "data/audio/audio3.mp3")
 
     def start_webcam(self):
+        if self.camera_session:
+            log.info("Replaying camera frames from session %s", self.camera_session)
+            self.webcam = ReplayCamera(SessionReader(self.camera_session), speed=self.replay_speed)
+            return True
         for camera_index in range(5):
-            print(f"Trying to open camera at index {camera_index}")
+            log.info("Trying to open camera at index %s", camera_index)
             self.webcam = cv2.VideoCapture(camera_index)
             if self.webcam.isOpened():
-                print(f"Successfully opened camera at index {camera_index}")
+                log.info("Successfully opened camera at index %s", camera_index)
                 # Set high resolution for better visualization
                 self.webcam.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
                 self.webcam.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
                 return True
-        print("Error: Could not open any camera")
+        log.error("Could not open any camera")
         return False
 
     def stop_webcam(self):
-        print("Stopping webcam...")
+        log.info("Stopping webcam...")
         if hasattr(self, 'gesture_detector') and not self._detector_released:
             try:
                 self.gesture_detector.release()
                 self._detector_released = True
             except Exception as e:
-                print(f"Warning (gesture_detector.release): {e}")
+                log.warning("gesture_detector.release failed: %s", e)
         if self.webcam is not None and self.webcam.isOpened():
             self.webcam.release()
-        cv2.destroyAllWindows()
-        print("Webcam stopped")
+        # Headless runs open no windows, and headless OpenCV builds cannot close any
+        if not self.headless:
+            cv2.destroyAllWindows()
+        log.info("Webcam stopped")
 
     def enhanced_visualization(self, annotated_frame, bar_top=150, bar_bottom=900):
         # Get frame dimensions
@@ -253,105 +382,229 @@ class AeroMixApp:
         return annotated_frame
 
 
-    def run_recognition(self):
-        print("Starting real-time gesture recognition...")
-        print(f"Available gesture models: {list(self.gestures.keys())}")
-        label_map = {
-            "volume_up": "Volume Up",
-            "volume_down": "Volume Down",
-            "bass_up": "Bass Up",
-            "bass_down": "Bass Down",
-            "tempo_up": "Tempo Up",
-            "tempo_down": "Tempo Down",
-            "pitch_up": "Pitch Up",
-            "pitch_down": "Pitch Down",
-            "play": "Play"
-        }
+    LABEL_MAP = {
+        "volume_up": "Volume Up",
+        "volume_down": "Volume Down",
+        "bass_up": "Bass Up",
+        "bass_down": "Bass Down",
+        "tempo_up": "Tempo Up",
+        "tempo_down": "Tempo Down",
+        "pitch_up": "Pitch Up",
+        "pitch_down": "Pitch Down",
+        "play": "Play"
+    }
+    GESTURE_COOLDOWN = 0.5
+    METRICS_REPLY_ADDRESS = "/metrics/reply"
+    RECOGNITION_WINDOW = "Recognition Mode"
+    # Frame wait while the detector is idle, which caps the idle loop at about 30 fps
+    IDLE_WAIT_MS = 33
+
+    def reset_recognition_state(self):
+        self.vote = PredictionVote(size=10, threshold=7)
+        self.last_label = ""
+        self.label_timer = 0
+        self.last_gesture_time = 0
+        self.is_fullscreen = False
+
+    def classify_frame(self, landmarks):
+        """Static gesture predicted for a single frame, or None"""
+        if self.gesture_bank is not None:
+            with tracer.span("classify.gesture_bank"):
+                return self.predict_with_bank(landmarks)
+        for gesture_name, classifier in self.gestures.items():
+            with tracer.span("features"):
+                features = classifier.preprocess_landmarks(landmarks)
+            if features.size > 0:
+                with tracer.span(f"classify.{gesture_name}"):
+                    pred = classifier.predict(features)
+                if pred == gesture_name:
+                    return pred
+        return None
+
+    def update_recognition(self, landmarks, current_time):
+        """Classify one frame, vote over recent frames and trigger the winning gesture; returns it or None"""
+        if not landmarks.has_hands:
+            return None
+
+        pred_this_frame = self.classify_frame(landmarks)
+        fired = None
+        with tracer.span("vote"):
+            if pred_this_frame:
+                most_common = self.vote.push(pred_this_frame)
+                if most_common and current_time - self.last_gesture_time > self.GESTURE_COOLDOWN:
+                    fired = most_common
+                    self.vote.clear()
+        with tracer.span("dynamic"):
+            dynamic_gesture = self.update_dynamic_gestures(landmarks)
+        if fired is None and dynamic_gesture and current_time - self.last_gesture_time > self.GESTURE_COOLDOWN:
+            fired = dynamic_gesture
+            self.temporal_tracker.reset()
+        if fired:
+            self.process_gesture(fired)
+            # Capture to audio action, for frames that actually trigger one
+            tracer.end_frame("end_to_end")
+            self.last_label = self.LABEL_MAP.get(fired, fired)
+            self.label_timer = 15
+            self.last_gesture_time = current_time
+        return fired
+
+    def render_recognition(self, annotated_frame):
+        """Draw the last recognized gesture and the sound state onto a frame"""
+        if self.label_timer > 0 and self.last_label:
+            cv2.putText(
+                annotated_frame, f"{self.last_label}", (20, 60),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3
+            )
+            self.label_timer -= 1
+
+        # Apply the enhanced circle visualization
+        return self.enhanced_visualization(annotated_frame)
+
+    def handle_recognition_key(self, key):
+        """React to a key press in the recognition window; returns False when the user quits"""
+        if key == ord('q'):
+            return False
+        elif key == ord('f'):
+            # Toggle fullscreen
+            self.is_fullscreen = not self.is_fullscreen
+            if self.is_fullscreen:
+                cv2.setWindowProperty(self.RECOGNITION_WINDOW, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+            else:
+                cv2.setWindowProperty(self.RECOGNITION_WINDOW, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_NORMAL)
+        return True
+
+    def read_camera(self):
+        """webcam.read(), decoding into the previous raw frame array in buffer-reusing mode"""
+        if self.frame_pool is None:
+            return self.webcam.read()
+        ret, frame = self.webcam.read(self._raw_frame)
+        if ret:
+            self._raw_frame = frame
+        return ret, frame
+
+    def flip_frame(self, frame):
+        """Mirror a camera frame, into a pooled buffer in buffer-reusing mode"""
+        dst = self.frame_pool.acquire(frame.shape) if self.frame_pool is not None else None
+        return cv2.flip(frame, 1, dst=dst)
+
+    def release_frame(self, frame):
+        """Return a frame from flip_frame to the pool"""
+        if self.frame_pool is not None:
+            self.frame_pool.release(frame)
+
+    def record_frame(self, landmarks, frame):
+        """Append detector output to the session recorder, if recording"""
+        if self.recorder is None:
+            return
+        # Frames are stored as the camera delivered them, so a replayed session is mirrored again like live input
+        self.recorder.write(landmarks, cv2.flip(frame, 1) if self.recorder.record_frames else None)
+
+    def run_replay(self, session_path, speed=1.0, detect=False):
+        """
+        Feed a recorded session through recognition without a camera or window.
+        With detect=True the detector runs again on the recorded frames instead of
+        using the recorded landmarks. Returns the fired gestures as (frame index, timestamp, gesture).
+        """
+        reader = SessionReader(session_path)
+        if detect and not reader.has_frames:
+            raise ValueError(f"Session {session_path} has no frames to run detection on")
+        log.info("Replaying %d frames (%.1fs recorded) from %s", len(reader), reader.duration, session_path)
+        self.reset_recognition_state()
+        self.temporal_tracker.reset()
+        fired = []
+        detected_at = replayed_at = None
+        start = time.perf_counter()
+        for index, recorded, frame in reader.replay(speed):
+            tracer.begin_frame()
+            landmarks = recorded
+            if detect:
+                with tracer.span("flip"):
+                    frame = self.flip_frame(frame)
+                with tracer.span("detect"):
+                    landmarks, _ = self.gesture_detector.detect_landmarks(frame, annotate=False)
+                self.release_frame(frame)
+                # The detector stamps new output with wall-clock time and hands out cached output
+                # again under its old stamp; restamp both with the recorded time of their frame
+                if landmarks.timestamp != detected_at:
+                    detected_at, replayed_at = landmarks.timestamp, recorded.timestamp
+                landmarks = LandmarkFrame(landmarks.points, landmarks.is_left, replayed_at)
+            # Recorded timestamps drive the cooldown and motion features, so replays are repeatable
+            gesture = self.update_recognition(landmarks, landmarks.timestamp)
+            if gesture:
+                fired.append((index, landmarks.timestamp, gesture))
+        elapsed = time.perf_counter() - start
+        log.info("Replayed %d frames in %.2fs (%.1f fps), fired %d gestures: %s",
+                 len(reader), elapsed, len(reader) / elapsed if elapsed else 0.0,
+                 len(fired), [gesture for _, _, gesture in fired])
+        log.info("Latency report:\n%s", tracer.report())
+        return fired
+
+    def run_multisource(self, sources, duration=None):
+        """
+        Recognize gestures from several sources at once (camera indices, video files
+        or recorded sessions), each detected in its own worker process
+        """
+        log.info("Starting multi-source recognition on %d sources", len(sources))
+        recognizer = MultiSourceRecognizer(self, sources, self.detector_options, replay_speed=self.replay_speed)
+        stats = recognizer.run(duration=duration)
+        log.info("Latency report:\n%s", tracer.report())
+        return stats
+
+    def run_recognition(self, pipelined=False):
+        log.info("Starting real-time gesture recognition...")
+        log.info("Available gesture models: %s", list(self.gestures.keys()))
         if not self.start_webcam():
-            print("Could not open webcam for recognition.")
+            log.error("Could not open webcam for recognition.")
             return
-        pred_history = []
-        HISTORY_SIZE = 10
-        PRED_THRESHOLD = 7
-        last_label = ""
-        label_timer = 0
-        last_gesture_time = 0
-        GESTURE_COOLDOWN = 0.5
+        self.reset_recognition_state()
 
         # Create a resizable window (not fullscreen by default)
-        cv2.namedWindow("Recognition Mode", cv2.WINDOW_NORMAL)
+        cv2.namedWindow(self.RECOGNITION_WINDOW, cv2.WINDOW_NORMAL)
         
         # Set initial window size (can be resized by user)
-        cv2.resizeWindow("Recognition Mode", 1280, 720)
-        
-        # Flag to track fullscreen state
-        is_fullscreen = False
-
-        while True:
-            ret, frame = self.webcam.read()
-            if not ret:
-                break
-            frame = cv2.flip(frame, 1)
-            landmarks, annotated_frame = self.gesture_detector.detect_landmarks(frame)
-            recognized_label = ""
-            pred_this_frame = None
-            current_time = time.time()
-
-            if landmarks and (landmarks["left_hand"] or landmarks["right_hand"]):
-                for gesture_name, classifier in self.gestures.items():
-                    features = classifier.preprocess_landmarks(landmarks)
-                    if features.size > 0:
-                        pred = classifier.predict(features)
-                        if pred == gesture_name:
-                            pred_this_frame = pred
-                            break
-                if pred_this_frame:
-                    pred_history.append(pred_this_frame)
-                    if len(pred_history) > HISTORY_SIZE:
-                        pred_history.pop(0)
-                    if len(pred_history) >= PRED_THRESHOLD:
-                        gesture_counts = {}
-                        for gesture in pred_history:
-                            gesture_counts[gesture] = gesture_counts.get(gesture, 0) + 1
-                        most_common = max(gesture_counts, key=gesture_counts.get, default=None)
-                        if (most_common and
-                            gesture_counts[most_common] >= PRED_THRESHOLD and
-                            current_time - last_gesture_time > GESTURE_COOLDOWN):
-                            self.process_gesture(most_common)
-                            recognized_label = label_map.get(most_common, most_common)
-                            last_label = recognized_label
-                            label_timer = 15
-                            last_gesture_time = current_time
-                            pred_history = []
-
-            if label_timer > 0 and last_label:
-                cv2.putText(
-                    annotated_frame, f"{last_label}", (20, 60),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3
-                )
-                label_timer -= 1
-
-            # Apply the enhanced circle visualization
-            annotated_frame = self.enhanced_visualization(annotated_frame)
-
-            cv2.imshow("Recognition Mode", annotated_frame)
-            
-            # Handle key presses
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q'):
-                break
-            elif key == ord('f'):
-                # Toggle fullscreen
-                is_fullscreen = not is_fullscreen
-                if is_fullscreen:
-                    cv2.setWindowProperty("Recognition Mode", cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
-                else:
-                    cv2.setWindowProperty("Recognition Mode", cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_NORMAL)
-                    
+        cv2.resizeWindow(self.RECOGNITION_WINDOW, 1280, 720)
+
+        if pipelined:
+            pipeline = RecognitionPipeline(self)
+            pipeline.run()
+            self.pipeline_stats = pipeline.stats()
+            log.info("Pipeline stats: %s", self.pipeline_stats)
+        else:
+            while True:
+                start = time.perf_counter()
+                ret, frame = self.read_camera()
+                if not ret:
+                    break
+                captured_at = time.perf_counter()
+                tracer.record("capture", captured_at - start)
+                tracer.begin_frame(captured_at)
+                with tracer.span("flip"):
+                    frame = self.flip_frame(frame)
+                with tracer.span("detect"):
+                    landmarks, annotated_frame = self.gesture_detector.detect_landmarks(frame)
+                self.record_frame(landmarks, frame)
+                self.release_frame(frame)
+                self.update_recognition(landmarks, time.time())
+                with tracer.span("render"):
+                    annotated_frame = self.render_recognition(annotated_frame)
+                    cv2.imshow(self.RECOGNITION_WINDOW, annotated_frame)
+                self.gesture_detector.release_frame(annotated_frame)
+                tracer.end_frame("frame")
+                
+                # Handle key presses; while idle the loop also slows down
+                wait_ms = self.IDLE_WAIT_MS if self.gesture_detector.is_idle else 1
+                if not self.handle_recognition_key(cv2.waitKey(wait_ms) & 0xFF):
+                    break
+
+        log.info("Feature cache stats: %s", self.feature_cache.stats())
+        log.info("Detection rate stats: %s", self.gesture_detector.rate_controller.stats())
+        log.info("Latency report:\n%s", tracer.report())
+        if self.gesture_detector.idle_gate is not None:
+            log.info("Idle stats: %s", self.gesture_detector.idle_gate.stats())
         self.stop_webcam()
 
     def start_training(self, address, *args):
-        print(f"start_training called with args: {args}")
+        log.debug("start_training called with args: %s", args)
         args = self.clean_args(args)
         
         if hasattr(self, 'gesture_detector'):
@@ -360,34 +613,44 @@ class AeroMixApp:
         
         if len(args) > 0:
             gesture_name = args[0]
-            print(f"Starting training for gesture: {gesture_name}")
+            log.info("Starting training for gesture: %s", gesture_name)
             self.trainer.current_gesture = gesture_name
             self.trainer.start_training(gesture_name)
             self.training_mode = True
+            self.temporal_tracker.reset()
             
             if self.start_webcam():
-                print(f"Started training for gesture: {gesture_name}")
-                print("Webcam activated for training. Press 'q' to stop training.")
-                print("Press 'g' to record a GESTURE sample, 'n' for NEUTRAL sample.")
+                log.info("Started training for gesture: %s", gesture_name)
+                log.info("Webcam activated for training. Press 'q' to stop training.")
+                log.info("Press 'g' to record a GESTURE sample, 'n' for NEUTRAL sample.")
+                if self.trainer.dynamic_gesture is not None:
+                    log.info("Motion gesture: perform the motion, then press the key to record its last %d frames.",
+                             self.temporal_tracker.window)
                 
                 # Create a resizable window for training
                 cv2.namedWindow('Training Mode', cv2.WINDOW_NORMAL)
                 
                 while self.training_mode and self.webcam.isOpened():
-                    ret, frame = self.webcam.read()
+                    ret, frame = self.read_camera()
                     if ret:
-                        frame = cv2.flip(frame, 1)
+                        frame = self.flip_frame(frame)
                     
                     if not ret:
-                        print("Failed to grab frame from webcam")
+                        log.error("Failed to grab frame from webcam")
                         break
                     
                     if not self._detector_released:
                         try:
                             landmarks, annotated_frame = self.gesture_detector.detect_landmarks(frame)
                         except Exception as e:
-                            print(f"Warning (detect_landmarks): {e}")
+                            log.warning("detect_landmarks failed: %s", e)
                             break
+                        self.release_frame(frame)
+                        if self.trainer.dynamic_gesture is not None:
+                            # Motion samples are the tracker's window at the moment a key is pressed
+                            _, hand_points = landmarks.select_hand()
+                            if hand_points is not None:
+                                self.temporal_tracker.push(hand_points, landmarks.timestamp)
                     else:
                         annotated_frame = frame
                     
@@ -404,16 +667,20 @@ class AeroMixApp:
                                     cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
                     
                     cv2.imshow('Training Mode', annotated_frame)
+                    if annotated_frame is frame:
+                        self.release_frame(frame)
+                    else:
+                        self.gesture_detector.release_frame(annotated_frame)
                     
                     key = cv2.waitKey(1) & 0xFF
                     if key == ord('q'):
                         self.stop_training(address)
                         break
                     elif key == ord('g'):
-                        print("Pressed 'g': Recording gesture sample.")
+                        log.info("Pressed 'g': Recording gesture sample.")
                         self.record_training_sample(address, self.trainer.current_gesture)
                     elif key == ord('n'):
-                        print("Pressed 'n': Recording neutral sample.")
+                        log.info("Pressed 'n': Recording neutral sample.")
                         self.record_training_sample(address, "neutral")
                     elif key == ord('f'):
                         # Toggle fullscreen
@@ -423,33 +690,51 @@ class AeroMixApp:
                         else:
                             cv2.setWindowProperty('Training Mode', cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
             else:
-                print("Could not start webcam for training")
+                log.error("Could not start webcam for training")
 
     def record_training_sample(self, address, *args):
-        print(f"record_training_sample called with args: {args}")
+        log.debug("record_training_sample called with args: %s", args)
         args = self.clean_args(args)
         
         if not self.training_mode or not self.webcam or not self.webcam.isOpened() or self._detector_released:
-            print("Training not active or webcam not open, skipping sample.")
+            log.warning("Training not active or webcam not open, skipping sample.")
+            return
+
+        if self.trainer.dynamic_gesture is not None:
+            if not self.temporal_tracker.ready:
+                log.warning("Motion window not full yet (%d of %d frames), sample not recorded.",
+                            len(self.temporal_tracker), self.temporal_tracker.window)
+                return
+            label = args[0] if args else self.trainer.current_gesture
+            self.trainer.add_dynamic_sample(self.temporal_tracker.features(), label)
+            # The next sample has to be a motion of its own
+            self.temporal_tracker.reset()
             return
         
         try:
-            ret, frame = self.webcam.read()
+            ret, frame = self.read_camera()
             if ret:
-                frame = cv2.flip(frame, 1)
+                frame = self.flip_frame(frame)
+                height, width = frame.shape[:2]
                 landmarks, annotated_frame = self.gesture_detector.detect_landmarks(frame)
+                try:
+                    # Drawn on a copy, so the pooled buffers can go back right away
+                    display_frame = annotated_frame.copy()
+                finally:
+                    if annotated_frame is not frame:
+                        self.gesture_detector.release_frame(annotated_frame)
+                    self.release_frame(frame)
                 
-                if not landmarks or (not landmarks["left_hand"] and not landmarks["right_hand"]):
-                    print("No hand detected in frame, sample not recorded.")
+                if not landmarks.has_hands:
+                    log.warning("No hand detected in frame, sample not recorded.")
                     return
                 
                 label = args[0] if args else self.trainer.current_gesture
                 self.trainer.add_sample(landmarks, label)
-                print(f"Sample recorded for {label}, total samples={len(self.trainer.training_data)}")
+                log.info("Sample recorded for %s, total samples=%d", label, len(self.trainer.training_data))
                 
-                display_frame = annotated_frame.copy()
                 color = (0, 255, 0) if label != "neutral" else (0, 255, 255)
-                cv2.rectangle(display_frame, (0, 0), (frame.shape[1], frame.shape[0]), color, 10)
+                cv2.rectangle(display_frame, (0, 0), (width, height), color, 10)
                 cv2.putText(display_frame, f"SAMPLE RECORDED: {label}", (20, 50),
                             cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
                 
@@ -459,49 +744,138 @@ class AeroMixApp:
                 
                 cv2.imshow('Training Mode', display_frame)
         except Exception as e:
-            print(f"Error recording training sample: {e}")
+            log.error("Error recording training sample: %s", e)
 
     def stop_training(self, address, *args):
-        print("Stopping training...")
+        log.info("Stopping training...")
         if hasattr(self, 'gesture_detector') and not self._detector_released:
             try:
                 self.gesture_detector.release()
                 self._detector_released = True
             except Exception as e:
-                print(f"Warning (gesture_detector.release): {e}")
+                log.warning("gesture_detector.release failed: %s", e)
         self.stop_webcam()
         if self.trainer.stop_training():
+            if self.use_gesture_bank:
+                self.trainer.build_gesture_bank()
             self.load_gesture_models(self.trainer.save_dir)
         self.training_mode = False
-        print("Training stopped")
+        log.info("Training stopped")
 
     def run(self):
         self.running = True
         try:
-            print("AEROMIX is running with Pyo audio engine. Press Ctrl+C to stop.")
+            log.info("AEROMIX is running with Pyo audio engine. Press Ctrl+C to stop.")
             if self.training_mode:
                 while self.running:
                     time.sleep(0.1)
             else:
-                self.run_recognition()
+                self.run_recognition(pipelined=self.pipelined)
         except KeyboardInterrupt:
-            print("Shutting down AEROMIX...")
+            log.info("Shutting down AEROMIX...")
         finally:
-            self.stop_webcam()
-            self.osc_handler.stop_server()
-            if hasattr(self.sound_controller, 'cleanup'):
-                self.sound_controller.cleanup()
+            self.shutdown()
+
+    def shutdown(self):
+        self.stop_webcam()
+        self.osc_handler.stop_server()
+        if hasattr(self.sound_controller, 'cleanup'):
+            self.sound_controller.cleanup()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
 
 def main():
     parser = argparse.ArgumentParser(description='AEROMIX - Gesture-Based DJ System')
     parser.add_argument('--training', action='store_true', help='Start in training mode')
     parser.add_argument('--model-dir', type=str, default='model/trained', help='Directory for trained models')
+    parser.add_argument('--gesture-bank', action='store_true',
+                        help='Recognize with one jointly trained multi-class gesture bank instead of per-gesture models')
+    parser.add_argument('--tune', action='store_true',
+                        help='Cross-validate a small hyperparameter sweep in parallel when training')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Update existing models with only the new samples instead of retraining')
+    parser.add_argument('--background-rebuild', action='store_true',
+                        help='After an incremental update, fully rebuild the model from all stored samples in the background')
+    parser.add_argument('--temporal-window', type=int, default=20,
+                        help='Frames in the sliding window used for motion (dynamic) gestures')
+    parser.add_argument('--pipelined', action='store_true',
+                        help='Run capture, detection and rendering on separate threads')
+    parser.add_argument('--roi-tracking', action='store_true',
+                        help='Detect hands in a downscaled crop around the previous hand position')
+    parser.add_argument('--detection-size', type=int, default=None,
+                        help='Long side in pixels of the image MediaPipe sees in ROI mode')
+    parser.add_argument('--reuse-buffers', action='store_true',
+                        help='Capture, convert and annotate frames in preallocated buffers')
+    parser.add_argument('--detect-every', type=int, default=1,
+                        help='Run full hand detection every N frames and predict landmarks in between')
+    parser.add_argument('--adaptive-rate', action='store_true',
+                        help='Adapt the detection interval to keep the target frame rate')
+    parser.add_argument('--idle-after', type=float, default=None,
+                        help='Seconds without hands before dropping to a motion-gated low-rate scan')
+    parser.add_argument('--record', type=str, default=None,
+                        help='Record detector output of the recognition loop to this session directory')
+    parser.add_argument('--record-frames', action='store_true',
+                        help='Also record raw camera frames (large) with --record')
+    parser.add_argument('--replay', type=str, default=None,
+                        help='Run recognition headless on a recorded session instead of the webcam')
+    parser.add_argument('--replay-detect', action='store_true',
+                        help='With --replay, rerun hand detection on the recorded frames')
+    parser.add_argument('--replay-camera', type=str, default=None,
+                        help='Use the frames of a recorded session in place of the webcam')
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                        help='Replay speed relative to the recording; 0 replays as fast as possible')
+    parser.add_argument('--sources', nargs='+', default=None,
+                        help='Recognize from several sources at once, each detected in its own process: '
+                             'camera indices, video files or recorded session directories')
+    parser.add_argument('--trace-dump', type=str, default=None,
+                        help='Write the latency histograms as JSON to this file on exit')
+    parser.add_argument('--no-trace', action='store_true',
+                        help='Disable per-stage latency tracing')
+    parser.add_argument('--target-fps', type=float, default=60,
+                        help='Frame rate the adaptive detection rate aims for')
+    add_log_arguments(parser)
     args = parser.parse_args()
+    configure_logging(args.log_level, quiet=args.quiet)
+    tracer.enabled = not args.no_trace
     app = AeroMixApp(
         model_dir=args.model_dir,
-        training_mode=args.training
+        training_mode=args.training,
+        use_gesture_bank=args.gesture_bank,
+        tune_hyperparameters=args.tune,
+        incremental_training=args.incremental,
+        background_rebuild=args.background_rebuild,
+        temporal_window=args.temporal_window,
+        pipelined=args.pipelined,
+        roi_tracking=args.roi_tracking,
+        detection_size=args.detection_size,
+        reuse_buffers=args.reuse_buffers,
+        detect_every=args.detect_every,
+        adaptive_rate=args.adaptive_rate,
+        target_fps=args.target_fps,
+        idle_after=args.idle_after,
+        record_path=args.record,
+        record_frames=args.record_frames,
+        camera_session=args.replay_camera,
+        replay_speed=args.replay_speed,
+        headless=args.replay is not None
     )
-    app.run()
+    try:
+        if args.replay or args.sources:
+            try:
+                if args.replay:
+                    app.run_replay(args.replay, speed=args.replay_speed, detect=args.replay_detect)
+                else:
+                    app.run_multisource(args.sources)
+            finally:
+                app.shutdown()
+        else:
+            app.run()
+    finally:
+        if args.trace_dump:
+            with open(args.trace_dump, "w") as f:
+                f.write(tracer.to_json())
+            log.info("Latency histograms written to %s", args.trace_dump)
 
 if __name__ == "__main__":
     main()
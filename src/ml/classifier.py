@@ -1,154 +1,218 @@
 import numpy as np
 import pickle
-from sklearn.preprocessing import StandardScaler
-from sklearn.neural_network import MLPClassifier
 import os
-import math
+from .features import extract_features
+from .inference import CompiledMLP
+from . import model_format
+from utils.landmarks import LandmarkFrame
+from utils.log import get_frame_logger, get_logger
+
+log = get_logger(__name__)
+frame_log = get_frame_logger(__name__)
 
 class GestureClassifier:
-    def __init__(self, model_path=None):
+    CONFIDENCE_THRESHOLD = 0.7
+    DEFAULT_HIDDEN_LAYER_SIZES = (100, 50)
+    DEFAULT_ALPHA = 0.01
+
+    def __init__(self, model_path=None, feature_cache=None):
         self.model = None
         self.scaler = None
+        self.engine = None  # CompiledMLP fast path, None falls back to scikit-learn
+        self.feature_cache = feature_cache  # Optional FeatureCache shared between classifiers
         self.gesture_name = None  # Add gesture_name for logging
+        # Compiled (.amx) models are only memory-mapped on first use
+        self._compiled_path = None
+        self._compiled_header = None
         if model_path and os.path.exists(model_path):
-            self.load_model(model_path)
-            print(f"[Classifier] Model and scaler loaded from -> {model_path}")
-            self.gesture_name = os.path.basename(model_path).replace('_model.pkl', '')
+            if model_path.endswith(".amx"):
+                self.open_compiled_model(model_path)
+            else:
+                self.load_model(model_path)
+                log.info("Model and scaler loaded from -> %s", model_path)
+            self.gesture_name = os.path.basename(model_path).replace('_model.pkl', '').replace('_model.amx', '')
         else:
-            print("[Classifier] No model loaded, will train from scratch.")
+            log.info("No model loaded, will train from scratch.")
+
+    @property
+    def is_loaded(self):
+        return self.engine is not None or self._compiled_header is not None or (
+            self.model is not None and self.scaler is not None)
+
+    @property
+    def classes_(self):
+        """Class labels, available without loading a lazily opened compiled model"""
+        if self.engine is not None:
+            return self.engine.classes_
+        if self._compiled_header is not None:
+            return np.asarray(self._compiled_header["classes"])
+        if self.model is not None:
+            return self.model.classes_
+        return None
+
+    def _ensure_engine(self):
+        if self.engine is None and self._compiled_path is not None:
+            self.engine = model_format.load_compiled_model(self._compiled_path, self._compiled_header)
+            log.info("Compiled model mapped from -> %s", self._compiled_path)
+        return self.engine
 
     def preprocess_landmarks(self, landmarks):
         """
         Extracting and normalizing hand gestures for gesture recognition
-        focusing on normalized x, y coordinates and key distances for distinct gestures
+        focusing on normalized x, y coordinates and key distances for distinct gestures.
+        Accepts a LandmarkFrame, the legacy landmarks dict or a (21, 3) array.
         """
-        print(f"[DEBUG] Preprocessing landmarks for gesture: {self.gesture_name}")
-        print(f"[DEBUG] Landmarks received: {landmarks}")
+        log.debug("Preprocessing landmarks for gesture: %s", self.gesture_name)
 
-        if not landmarks:
-            print("[DEBUG] No landmarks provided")
+        if landmarks is None:
+            log.debug("No landmarks provided")
             return np.array([])
 
-        # Extract hand landmarks from the dictionary structure
-        hand_landmarks_list = []
-        
-        # Check for left hand first, then right hand
-        if landmarks.get("left_hand") and len(landmarks["left_hand"]) == 21:
-            hand_landmarks_list = landmarks["left_hand"]
-            print(f"[DEBUG] Using left hand with {len(hand_landmarks_list)} landmarks")
-        elif landmarks.get("right_hand") and len(landmarks["right_hand"]) == 21:
-            hand_landmarks_list = landmarks["right_hand"]
-            print(f"[DEBUG] Using right hand with {len(hand_landmarks_list)} landmarks")
+        if isinstance(landmarks, np.ndarray):
+            hand_points = landmarks
         else:
-            print(f"[DEBUG] No valid hand landmarks found")
-            return np.array([])
+            if isinstance(landmarks, dict):
+                if self.feature_cache is not None:
+                    # A fresh frame per call would miss the shared cache for every classifier
+                    landmarks = self.feature_cache.frame_for(landmarks)
+                else:
+                    landmarks = LandmarkFrame.from_dict(landmarks)
+            if self.feature_cache is not None:
+                return self.feature_cache.get(landmarks).features
+            # Check for left hand first, then right hand
+            hand_key, hand_points = landmarks.select_hand()
+            if hand_points is None:
+                log.debug("No valid hand landmarks found")
+                return np.array([])
+            log.debug("Using %s from %s", hand_key, landmarks)
 
-        # Convert to the expected format if needed
-        if hand_landmarks_list and isinstance(hand_landmarks_list[0], dict):
-            # Already in dictionary format
-            hand_landmarks_dict = hand_landmarks_list
-        else:
-            # Convert if in different format
-            hand_landmarks_dict = [
-                {"x": lm.x, "y": lm.y, "z": lm.z if hasattr(lm, 'z') else 0.0}
-                for lm in hand_landmarks_list
-            ]
-
-        # Using wrist as the reference point
-        wrist = hand_landmarks_dict[0]
-        wrist_x, wrist_y = wrist["x"], wrist["y"]
-
-        # Calculate bounding box for normalization
-        x_values = [lm["x"] for lm in hand_landmarks_dict]
-        y_values = [lm["y"] for lm in hand_landmarks_dict]
-        x_range = max(0.001, max(x_values) - min(x_values))
-        y_range = max(0.001, max(y_values) - min(y_values))
-
-        features = []
-
-        # Normalized x, y coordinates relative to wrist
-        for lm in hand_landmarks_dict:
-            norm_x = (lm["x"] - wrist_x) / x_range
-            norm_y = (lm["y"] - wrist_y) / y_range
-            features.extend([norm_x, norm_y])
-
-        # Key distances: thumb tip to index tip, index tip to middle tip
-        thumb_tip = hand_landmarks_dict[4]
-        index_tip = hand_landmarks_dict[8]
-        middle_tip = hand_landmarks_dict[12]
-
-        distances = [
-            np.sqrt((thumb_tip["x"] - index_tip["x"])**2 + (thumb_tip["y"] - index_tip["y"])**2) / x_range,
-            np.sqrt((index_tip["x"] - middle_tip["x"])**2 + (index_tip["y"] - middle_tip["y"])**2) / x_range
-        ]
-        features.extend(distances)
-
-        # Finger-to-wrist distances for curl detection
-        for tip_idx in [4, 8, 12, 16, 20]:  # Thumb, index, middle, ring, pinky tips
-            tip = hand_landmarks_dict[tip_idx]
-            distance = np.sqrt((tip["x"] - wrist_x)**2 + (tip["y"] - wrist_y)**2) / x_range
-            features.append(distance)
-
-        features_array = np.array(features).reshape(1, -1)
-        print(f"[DEBUG] Extracted features: {features_array.shape}")
+        features_array = extract_features(hand_points)
+        log.debug("Extracted features: %s", features_array.shape)
         return features_array
 
 
-    def train(self, X, y):
+    @classmethod
+    def build_model(cls, hidden_layer_sizes=None, alpha=None):
+        """Create an untrained MLP with the project's training settings"""
+        # Imported lazily so serving compiled models never loads scikit-learn
+        from sklearn.neural_network import MLPClassifier
+        return MLPClassifier(
+            hidden_layer_sizes=hidden_layer_sizes or cls.DEFAULT_HIDDEN_LAYER_SIZES,
+            activation='relu',
+            solver='adam',
+            max_iter=1000,  # Increased for better convergence
+            random_state=42,
+            alpha=cls.DEFAULT_ALPHA if alpha is None else alpha  # L2 regularization
+        )
+
+    def train(self, X, y, hidden_layer_sizes=None, alpha=None):
         """Train the gesture classifier"""
         if X.size == 0 or len(y) == 0:
-            print("[Classifier] Error: Empty training data")
+            log.error("Empty training data")
             return False
         
-        print(f"[Classifier] Training with {len(X)} samples, {len(np.unique(y))} classes")
+        log.info("Training with %d samples, %d classes", len(X), len(np.unique(y)))
         
+        from sklearn.preprocessing import StandardScaler
+
         # Scale features
         self.scaler = StandardScaler()
         X_scaled = self.scaler.fit_transform(X)
         
         # Train MLP classifier
-        self.model = MLPClassifier(
-            hidden_layer_sizes=(100, 50),
-            activation='relu',
-            solver='adam',
-            max_iter=1000,  # Increased for better convergence
-            random_state=42,
-            alpha=0.01  # L2 regularization
-        )
+        self.model = self.build_model(hidden_layer_sizes, alpha)
         self.model.fit(X_scaled, y)
+        self._compiled_path = None
+        self._compiled_header = None
+        self.compile()
         
-        print(f"[Classifier] Training complete. Model accuracy: {self.model.score(X_scaled, y):.4f}")
+        log.info("Training complete. Model accuracy: %.4f", self.model.score(X_scaled, y))
+        return True
+
+    def partial_update(self, X, y, epochs=5):
+        """Update a trained model on new samples with partial_fit; the scaler is kept fixed"""
+        if self.model is None or self.scaler is None:
+            log.error("No trained model to update")
+            return False
+        X_scaled = self.scaler.transform(np.asarray(X))
+        for _ in range(epochs):
+            self.model.partial_fit(X_scaled, y)
+        self.compile()
+        return True
+
+    def compile(self, tolerance=1e-4):
+        """Build the NumPy inference engine and check it against scikit-learn before enabling it"""
+        self.engine = None
+        if self.model is None or self.scaler is None:
+            return False
+        try:
+            engine = CompiledMLP.from_sklearn(self.model, self.scaler)
+            # Probe rows spread around the training distribution
+            rng = np.random.default_rng(0)
+            probe = self.scaler.mean_ + rng.standard_normal((16, len(self.scaler.mean_))) * self.scaler.scale_
+            error = engine.parity_error(self.model, self.scaler, probe)
+        except Exception as e:
+            log.warning("Compiled inference unavailable, using scikit-learn: %s", e)
+            return False
+        if error > tolerance:
+            log.warning("Compiled inference differs from scikit-learn by %.2e, using scikit-learn", error)
+            return False
+        self.engine = engine
         return True
 
     def predict(self, features):
         """Predict gesture from landmarks"""
-        if self.model is None or self.scaler is None:
-            print("[Classifier] Model or scaler not loaded.")
-            return "NO_GESTURE"
+        return self.predict_with_confidence(features)[0]
+
+    def predict_with_confidence(self, features):
+        """Predict gesture from landmarks, returning (label, confidence)"""
+        if not self.is_loaded:
+            frame_log.warning("Model or scaler not loaded.")
+            return "NO_GESTURE", 0.0
         
         if features.size == 0:
-            return "NO_GESTURE"
-        
-        # Scale features
-        features_scaled = self.scaler.transform(features)
+            return "NO_GESTURE", 0.0
         
-        # Get prediction probabilities
-        probas = self.model.predict_proba(features_scaled)[0]
-        max_proba = probas.max()
+        if self._ensure_engine() is not None:
+            # Scaler is folded into the engine's first layer
+            probas = self.engine.predict_proba_row(features)
+        else:
+            # Scale features
+            features_scaled = self.scaler.transform(features)
+            
+            # Get prediction probabilities
+            probas = self.model.predict_proba(features_scaled)[0]
+        max_proba = float(probas.max())
         
         # Only predict if confidence is high enough
-        if max_proba > 0.7:  # Adjusted threshold
-            pred = self.model.classes_[probas.argmax()]
-            print(f"[Classifier] Prediction: {pred} with confidence {max_proba:.2f}")
-            return pred
+        if max_proba > self.CONFIDENCE_THRESHOLD:
+            pred = self.classes_[probas.argmax()]
+            log.debug("Prediction: %s with confidence %.2f", pred, max_proba)
+            return pred, max_proba
+        else:
+            log.debug("Low confidence: %.2f, returning NO_GESTURE", max_proba)
+            return "NO_GESTURE", max_proba
+
+    def predict_many(self, X):
+        """Predict a (n_samples, 49) batch in one call, returning (labels, confidences)"""
+        X = np.asarray(X)
+        if not self.is_loaded or X.size == 0:
+            n_samples = len(X) if X.ndim > 1 else 0
+            return np.full(n_samples, "NO_GESTURE", dtype=object), np.zeros(n_samples)
+
+        if self._ensure_engine() is not None:
+            probas = self.engine.predict_proba(X)
         else:
-            print(f"[Classifier] Low confidence: {max_proba:.2f}, returning NO_GESTURE")
-            return "NO_GESTURE"
+            probas = self.model.predict_proba(self.scaler.transform(X))
+        confidences = probas.max(axis=1)
+        labels = self.classes_[probas.argmax(axis=1)].astype(object)
+        labels[confidences <= self.CONFIDENCE_THRESHOLD] = "NO_GESTURE"
+        return labels, confidences
 
     def save_model(self, model_path):
         """Save the trained model and scaler"""
         if self.model is None or self.scaler is None:
-            print("[Classifier] Error: No trained model to save")
+            log.error("No trained model to save")
             return False
         
         model_data = {
@@ -159,9 +223,31 @@ class GestureClassifier:
         with open(model_path, 'wb') as f:
             pickle.dump(model_data, f)
         
-        print(f"[Classifier] Model saved to {model_path}")
+        log.info("Model saved to %s", model_path)
+
+        # Compiled copy for fast, pickle-free loading; the pickle stays for further training
+        if self.engine is not None:
+            compiled_path = model_format.compiled_path_for(model_path)
+            try:
+                gesture_name = self.gesture_name or os.path.basename(model_path).replace('_model.pkl', '')
+                model_format.save_compiled_model(compiled_path, self.engine, gesture_name, self.scaler)
+                log.info("Compiled model saved to %s", compiled_path)
+            except Exception as e:
+                log.error("Error saving compiled model: %s", e)
         return True
 
+    def open_compiled_model(self, model_path):
+        """Register a compiled (.amx) model; only its header is read until the first prediction"""
+        try:
+            self._compiled_header = model_format.read_header(model_path)
+            self._compiled_path = model_path
+            self.engine = None
+            log.info("Compiled model registered from -> %s", model_path)
+            return True
+        except Exception as e:
+            log.error("Error opening compiled model: %s", e)
+            return False
+
     def load_model(self, model_path):
         """Load a trained model and scaler"""
         try:
@@ -170,7 +256,8 @@ class GestureClassifier:
             
             self.model = model_data['model']
             self.scaler = model_data['scaler']
+            self.compile()
             return True
         except Exception as e:
-            print(f"[Classifier] Error loading model: {e}")
+            log.error("Error loading model: %s", e)
             return False
\ No newline at end of file
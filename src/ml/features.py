@@ -0,0 +1,106 @@
+import numpy as np
+from utils.landmarks import LandmarkFrame
+
+FEATURE_COUNT = 49
+# Bumped whenever the feature layout changes, so stale models can be detected
+FEATURE_VERSION = 1
+
+THUMB_TIP, INDEX_TIP, MIDDLE_TIP = 4, 8, 12
+FINGER_TIPS = np.array([4, 8, 12, 16, 20])  # Thumb, index, middle, ring, pinky tips
+
+
+def extract_features(points):
+    """
+    Vectorized hand features for one (21, 3) hand or a (batch, 21, 3) stack.
+    Returns a float32 (batch, 49) array: wrist-relative x, y normalized by the
+    hand bounding box (42), thumb-index and index-middle tip distances (2) and
+    fingertip-to-wrist distances for curl detection (5).
+    """
+    points = np.asarray(points, dtype=np.float32)
+    if points.ndim == 2:
+        points = points[np.newaxis]
+    xy = points[:, :, :2]
+
+    # Bounding box ranges for normalization, clamped to avoid division by zero
+    ranges = np.maximum(xy.max(axis=1) - xy.min(axis=1), 0.001)
+    x_range = ranges[:, :1]
+
+    # Normalized x, y coordinates relative to the wrist
+    relative = xy - xy[:, :1, :]
+    normalized = (relative / ranges[:, np.newaxis, :]).reshape(len(points), -1)
+
+    # Key distances: thumb tip to index tip, index tip to middle tip
+    tip_pairs = xy[:, [THUMB_TIP, INDEX_TIP]] - xy[:, [INDEX_TIP, MIDDLE_TIP]]
+    tip_distances = np.sqrt((tip_pairs ** 2).sum(axis=-1)) / x_range
+
+    # Finger-to-wrist distances for curl detection
+    wrist_distances = np.sqrt((relative[:, FINGER_TIPS] ** 2).sum(axis=-1)) / x_range
+
+    return np.concatenate([normalized, tip_distances, wrist_distances], axis=1)
+
+
+class FrameFeatures:
+    """Features of one landmark frame together with the hand they were computed from"""
+
+    __slots__ = ("features", "hand_key")
+
+    def __init__(self, features, hand_key):
+        self.features = features
+        self.hand_key = hand_key
+
+
+class FeatureCache:
+    """
+    Single-entry cache of the feature vector for the current landmark frame.
+    Feature extraction does not depend on the model, so one cache is shared by
+    every classifier and each frame is processed once however many models run.
+    """
+
+    EMPTY = np.array([])
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        # (key, FrameFeatures), replaced as a whole so concurrent readers never see a torn entry
+        self._last = (None, None)
+        # (legacy landmarks dict, its LandmarkFrame); the dict is held, so identity cannot be reused
+        self._last_dict = (None, None)
+
+    def frame_for(self, landmarks_dict):
+        """LandmarkFrame for a legacy landmarks dict, converted once per dict so every classifier shares its features"""
+        source, frame = self._last_dict
+        if source is not landmarks_dict:
+            frame = LandmarkFrame.from_dict(landmarks_dict)
+            self._last_dict = (landmarks_dict, frame)
+        return frame
+
+    def get(self, landmarks):
+        """Return the FrameFeatures for a LandmarkFrame, computing them on the first request"""
+        key = (landmarks.frame_id, landmarks.timestamp)
+        last_key, entry = self._last
+        if key == last_key:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        hand_key, hand_points = landmarks.select_hand()
+        if hand_points is None:
+            entry = FrameFeatures(self.EMPTY, None)
+        else:
+            features = extract_features(hand_points)
+            features.setflags(write=False)
+            entry = FrameFeatures(features, hand_key)
+        self._last = (key, entry)
+        return entry
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,75 @@
+import numpy as np
+import os
+from .classifier import GestureClassifier
+
+BANK_FILENAME = "gesture_bank.pkl"
+COMPILED_BANK_FILENAME = "gesture_bank.amx"
+NEUTRAL_LABEL = "neutral"
+
+
+class GestureBank(GestureClassifier):
+    """
+    One jointly trained multi-class model holding every gesture plus the
+    neutral class, so a frame needs a single forward pass instead of one
+    per gesture model
+    """
+
+    def __init__(self, model_path=None, feature_cache=None):
+        super().__init__(model_path, feature_cache)
+        self.gesture_name = "gesture_bank"
+
+    @property
+    def gestures(self):
+        """Gesture labels known to the bank, excluding the neutral class"""
+        classes = self.classes_
+        if classes is None:
+            return []
+        return [str(label) for label in classes if label != NEUTRAL_LABEL]
+
+    @staticmethod
+    def merge_sample_sets(sample_sets):
+        """
+        Merge per-gesture sample sets {gesture: (X, labels)} into one
+        multi-class training set. Each set contributes its own gesture
+        samples and its neutral samples; anything else is dropped.
+        """
+        X_parts = []
+        y_parts = []
+        for gesture_name, (X, labels) in sample_sets.items():
+            X = np.asarray(X)
+            labels = np.asarray(labels)
+            if X.size == 0 or len(labels) == 0:
+                continue
+            keep = (labels == gesture_name) | (labels == NEUTRAL_LABEL)
+            X_parts.append(X[keep])
+            y_parts.append(labels[keep])
+        if not X_parts:
+            return np.array([]), np.array([])
+        return np.vstack(X_parts), np.concatenate(y_parts)
+
+    def train_from_sample_sets(self, sample_sets):
+        """Train the bank from per-gesture sample sets"""
+        X, y = self.merge_sample_sets(sample_sets)
+        return self.train(X, y)
+
+    def classify(self, features):
+        """Return (gesture, confidence) for one feature row; gesture is None for neutral or low confidence"""
+        label, confidence = self.predict_with_confidence(features)
+        if label == "NO_GESTURE" or label == NEUTRAL_LABEL:
+            return None, confidence
+        return str(label), confidence
+
+
+def load_gesture_bank(model_dir, feature_cache=None):
+    """Load the gesture bank from model_dir, or return None if it has not been built"""
+    bank_path = os.path.join(model_dir, BANK_FILENAME)
+    compiled_path = os.path.join(model_dir, COMPILED_BANK_FILENAME)
+    if os.path.exists(compiled_path) and (
+            not os.path.exists(bank_path) or os.path.getmtime(compiled_path) >= os.path.getmtime(bank_path)):
+        bank_path = compiled_path
+    if not os.path.exists(bank_path):
+        return None
+    bank = GestureBank(bank_path, feature_cache)
+    if not bank.is_loaded:
+        return None
+    return bank
@@ -0,0 +1,128 @@
+import numpy as np
+import threading
+
+
+def _relu(x):
+    np.maximum(x, 0.0, out=x)
+
+
+def _tanh(x):
+    np.tanh(x, out=x)
+
+
+def _logistic(x):
+    np.negative(x, out=x)
+    np.exp(x, out=x)
+    x += 1.0
+    np.reciprocal(x, out=x)
+
+
+def _identity(x):
+    pass
+
+
+ACTIVATIONS = {
+    "relu": _relu,
+    "tanh": _tanh,
+    "logistic": _logistic,
+    "identity": _identity,
+}
+
+
+class CompiledMLP:
+    """
+    Pure NumPy forward pass of a trained MLPClassifier with its StandardScaler
+    folded into the first layer. The single-row path runs in preallocated
+    float32 buffers and skips scikit-learn's input validation entirely.
+    """
+
+    def __init__(self, weights, biases, classes, activation="relu", out_activation="softmax"):
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"Unsupported hidden activation: {activation}")
+        if out_activation not in ("softmax", "logistic"):
+            raise ValueError(f"Unsupported output activation: {out_activation}")
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.ascontiguousarray(b, dtype=np.float32) for b in biases]
+        self.classes_ = np.asarray(classes)
+        self.activation = activation
+        self.out_activation = out_activation
+        self.n_features = self.weights[0].shape[0]
+        self._activate = ACTIVATIONS[activation]
+        # Buffers are per thread so concurrent API requests never share them
+        self._local = threading.local()
+
+    @classmethod
+    def from_sklearn(cls, model, scaler=None):
+        """Compile a fitted MLPClassifier (and optional fitted StandardScaler)"""
+        weights = [np.asarray(w, dtype=np.float64) for w in model.coefs_]
+        biases = [np.asarray(b, dtype=np.float64) for b in model.intercepts_]
+        if scaler is not None:
+            mean = scaler.mean_ if getattr(scaler, "mean_", None) is not None else 0.0
+            scale = scaler.scale_ if getattr(scaler, "scale_", None) is not None else 1.0
+            # ((x - mean) / scale) @ W + b == x @ (W / scale) + (b - (mean / scale) @ W)
+            scale = np.broadcast_to(np.asarray(scale, dtype=np.float64), (weights[0].shape[0],))
+            mean = np.broadcast_to(np.asarray(mean, dtype=np.float64), (weights[0].shape[0],))
+            biases[0] = biases[0] - (mean / scale) @ weights[0]
+            weights[0] = weights[0] / scale[:, np.newaxis]
+        return cls(weights, biases, model.classes_, model.activation, model.out_activation_)
+
+    def _buffers(self):
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = [np.empty(self.n_features, dtype=np.float32)]
+            buffers += [np.empty(w.shape[1], dtype=np.float32) for w in self.weights]
+            buffers.append(np.empty(len(self.classes_), dtype=np.float32))
+            self._local.buffers = buffers
+        return buffers
+
+    def predict_proba_row(self, features):
+        """
+        Class probabilities for a single feature row. The returned array is a
+        reused buffer, so copy it if it must outlive the next call.
+        """
+        buffers = self._buffers()
+        np.copyto(buffers[0], np.reshape(features, -1))
+        last = len(self.weights) - 1
+        for layer, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            out = buffers[layer + 1]
+            np.dot(buffers[layer], weight, out=out)
+            out += bias
+            if layer != last:
+                self._activate(out)
+        return self._output(buffers[-2], buffers[-1])
+
+    def _output(self, logits, proba):
+        if self.out_activation == "logistic":
+            # Binary models have a single output unit for the positive class
+            _logistic(logits)
+            proba[1] = logits[0]
+            proba[0] = 1.0 - logits[0]
+        else:
+            np.subtract(logits, logits.max(), out=proba)
+            np.exp(proba, out=proba)
+            proba /= proba.sum()
+        return proba
+
+    def predict_proba(self, X):
+        """Class probabilities for a (n_samples, n_features) batch"""
+        activations = np.asarray(X, dtype=np.float32).reshape(-1, self.n_features)
+        last = len(self.weights) - 1
+        for layer, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            activations = activations @ weight
+            activations += bias
+            if layer != last:
+                self._activate(activations)
+        if self.out_activation == "logistic":
+            _logistic(activations)
+            return np.hstack([1.0 - activations, activations])
+        activations -= activations.max(axis=1, keepdims=True)
+        np.exp(activations, out=activations)
+        activations /= activations.sum(axis=1, keepdims=True)
+        return activations
+
+    def parity_error(self, model, scaler, X):
+        """Largest absolute probability difference from the scikit-learn pipeline on X"""
+        X = np.asarray(X, dtype=np.float64)
+        reference = model.predict_proba(scaler.transform(X) if scaler is not None else X)
+        compiled = np.vstack([self.predict_proba_row(row).copy() for row in X])
+        return float(np.abs(reference - compiled).max())
@@ -0,0 +1,174 @@
+"""
+Pickle-free on-disk format for compiled gesture models.
+
+Layout of a .amx file:
+    8 bytes   magic b"AEROMIX1"
+    4 bytes   little-endian uint32 header length
+    N bytes   UTF-8 JSON header (classes, gesture name, feature version, array table)
+    padding   up to a 64-byte boundary
+    data      raw little-endian float32 arrays at the offsets listed in the header
+
+The data section is opened with np.memmap in read-only mode, so several API
+worker processes loading the same file share its pages.
+
+Convert existing pickles with:
+    PYTHONPATH=src python -m ml.model_format model/trained
+"""
+import argparse
+import json
+import os
+import pickle
+import struct
+import numpy as np
+from .features import FEATURE_VERSION
+from .inference import CompiledMLP
+
+MAGIC = b"AEROMIX1"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+PICKLE_SUFFIX = "_model.pkl"
+COMPILED_SUFFIX = "_model.amx"
+
+
+def compiled_path_for(model_path):
+    """Path of the compiled model that sits next to a pickled one"""
+    root, _ = os.path.splitext(model_path)
+    return root + ".amx"
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def save_compiled_model(path, engine, gesture_name, scaler=None):
+    """Write a CompiledMLP (and the scaler statistics it was folded from) to path"""
+    arrays = []
+    for index, (weight, bias) in enumerate(zip(engine.weights, engine.biases)):
+        arrays.append((f"weight_{index}", weight))
+        arrays.append((f"bias_{index}", bias))
+    if scaler is not None:
+        arrays.append(("scaler_mean", scaler.mean_))
+        arrays.append(("scaler_scale", scaler.scale_))
+
+    table = []
+    offset = 0
+    for name, array in arrays:
+        array = np.ascontiguousarray(array, dtype="<f4")
+        table.append({"name": name, "shape": list(array.shape), "offset": offset})
+        offset = _align(offset + array.nbytes)
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "feature_version": FEATURE_VERSION,
+        "gesture_name": gesture_name,
+        "classes": [str(label) for label in engine.classes_],
+        "activation": engine.activation,
+        "out_activation": engine.out_activation,
+        "layers": len(engine.weights),
+        "arrays": table,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for entry, (_, array) in zip(table, arrays):
+            f.seek(data_start + entry["offset"])
+            f.write(np.ascontiguousarray(array, dtype="<f4").tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_header(path):
+    """Read only the JSON header of a compiled model; adds the absolute data offset"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an AeroMix compiled model")
+        (header_length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_length).decode("utf-8"))
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"{path} has unsupported format version {header.get('format_version')}")
+    if header.get("feature_version") != FEATURE_VERSION:
+        raise ValueError(
+            f"{path} was built for feature version {header.get('feature_version')}, "
+            f"current is {FEATURE_VERSION}"
+        )
+    header["data_offset"] = _align(len(MAGIC) + 4 + header_length)
+    return header
+
+
+def load_compiled_model(path, header=None):
+    """Memory-map a compiled model and return its CompiledMLP"""
+    if header is None:
+        header = read_header(path)
+    data = np.memmap(path, dtype="<f4", mode="r")
+    arrays = {}
+    for entry in header["arrays"]:
+        start = (header["data_offset"] + entry["offset"]) // 4
+        count = int(np.prod(entry["shape"]))
+        arrays[entry["name"]] = data[start:start + count].reshape(entry["shape"])
+    weights = [arrays[f"weight_{index}"] for index in range(header["layers"])]
+    biases = [arrays[f"bias_{index}"] for index in range(header["layers"])]
+    return CompiledMLP(weights, biases, header["classes"], header["activation"], header["out_activation"])
+
+
+def discover_models(model_dir, pickle_suffix=PICKLE_SUFFIX, compiled_suffix=COMPILED_SUFFIX):
+    """
+    Map gesture name -> model path for model_dir, preferring a compiled model
+    over its pickle unless the pickle is newer
+    """
+    candidates = {}
+    for filename in sorted(os.listdir(model_dir)):
+        for suffix in (pickle_suffix, compiled_suffix):
+            if filename.endswith(suffix):
+                gesture_name = filename[:-len(suffix)]
+                candidates.setdefault(gesture_name, {})[suffix] = os.path.join(model_dir, filename)
+
+    models = {}
+    for gesture_name, paths in candidates.items():
+        pkl_path = paths.get(pickle_suffix)
+        amx_path = paths.get(compiled_suffix)
+        if amx_path and (not pkl_path or os.path.getmtime(amx_path) >= os.path.getmtime(pkl_path)):
+            models[gesture_name] = amx_path
+        else:
+            models[gesture_name] = pkl_path
+    return models
+
+
+def convert_pickle(pkl_path, out_path=None):
+    """Convert a pickled {'model', 'scaler'} file to the compiled format"""
+    with open(pkl_path, "rb") as f:
+        model_data = pickle.load(f)
+    model = model_data["model"]
+    scaler = model_data["scaler"]
+    engine = CompiledMLP.from_sklearn(model, scaler)
+    out_path = out_path or compiled_path_for(pkl_path)
+    gesture_name = os.path.basename(pkl_path)
+    for suffix in (PICKLE_SUFFIX, ".pkl"):
+        if gesture_name.endswith(suffix):
+            gesture_name = gesture_name[:-len(suffix)]
+            break
+    save_compiled_model(out_path, engine, gesture_name, scaler)
+    return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert pickled gesture models to the compiled .amx format")
+    parser.add_argument("paths", nargs="+", help="Model .pkl files or directories containing them")
+    args = parser.parse_args()
+    for path in args.paths:
+        if os.path.isdir(path):
+            pkl_paths = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".pkl")]
+        else:
+            pkl_paths = [path]
+        for pkl_path in pkl_paths:
+            try:
+                print(f"Converted {pkl_path} -> {convert_pickle(pkl_path)}")
+            except Exception as e:
+                print(f"Failed to convert {pkl_path}: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import numpy as np
+import os
+import re
+
+
+class SampleStore:
+    """
+    Append-only per-gesture training sample store. Every append writes a new
+    immutable .npz segment under <root>/<gesture>/, so collecting a few more
+    samples never rewrites the ones already on disk.
+    """
+
+    SEGMENT_PREFIX = "segment_"
+    SEGMENT_PATTERN = re.compile(r"segment_(\d{6})\.npz")
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _gesture_dir(self, gesture_name):
+        return os.path.join(self.root, gesture_name)
+
+    def segments(self, gesture_name):
+        """Segment paths for a gesture, oldest first"""
+        gesture_dir = self._gesture_dir(gesture_name)
+        if not os.path.isdir(gesture_dir):
+            return []
+        return [
+            os.path.join(gesture_dir, filename)
+            for filename in sorted(os.listdir(gesture_dir))
+            if self.SEGMENT_PATTERN.fullmatch(filename)
+        ]
+
+    def append(self, gesture_name, X, y):
+        """Write samples as a new segment and return its path, or None if there is nothing to write"""
+        X = np.asarray(X, dtype=np.float32)
+        y = np.asarray(y).astype(str)
+        if len(X) == 0:
+            return None
+        if len(X) != len(y):
+            raise ValueError(f"Got {len(X)} samples but {len(y)} labels")
+
+        gesture_dir = self._gesture_dir(gesture_name)
+        os.makedirs(gesture_dir, exist_ok=True)
+        existing = self.segments(gesture_name)
+        index = int(self.SEGMENT_PATTERN.fullmatch(os.path.basename(existing[-1])).group(1)) + 1 if existing else 1
+        filename = f"{self.SEGMENT_PREFIX}{index:06d}"
+        path = os.path.join(gesture_dir, filename + ".npz")
+        # Written under a name segments() never lists, so readers never see a partial segment
+        # and one left behind by a crash is ignored (and overwritten by the next append)
+        tmp_path = os.path.join(gesture_dir, f".{filename}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, X=X, y=y)
+        os.replace(tmp_path, path)
+        return path
+
+    def load(self, gesture_name):
+        """All samples stored for a gesture as (X, y)"""
+        X_parts = []
+        y_parts = []
+        for path in self.segments(gesture_name):
+            with np.load(path) as data:
+                X_parts.append(data["X"])
+                y_parts.append(data["y"])
+        if not X_parts:
+            return np.empty((0, 0), dtype=np.float32), np.array([], dtype=str)
+        return np.vstack(X_parts), np.concatenate(y_parts)
+
+    def count(self, gesture_name):
+        total = 0
+        for path in self.segments(gesture_name):
+            with np.load(path) as data:
+                total += len(data["y"])
+        return total
+
+    def gestures(self):
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.isdir(self._gesture_dir(name)) and self.segments(name)
+        )
+
+    def load_all(self):
+        """Every gesture's samples as {gesture: (X, y)}"""
+        return {gesture_name: self.load(gesture_name) for gesture_name in self.gestures()}
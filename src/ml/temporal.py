@@ -0,0 +1,200 @@
+import math
+import numpy as np
+from .classifier import GestureClassifier
+
+DYNAMIC_SUFFIX = "_dynamic.pkl"
+COMPILED_DYNAMIC_SUFFIX = "_dynamic.amx"
+
+# Wrist plus thumb, index, middle, ring and pinky tips
+TRACKED_POINTS = np.array([0, 4, 8, 12, 16, 20])
+MIDDLE_MCP = 9
+
+# Per-step terms: scale-normalized velocity (12), speed (6), wrist turning angle (1)
+_VELOCITY = slice(0, 12)
+_SPEED = slice(12, 18)
+_TURN = 18
+STEP_TERMS = 19
+
+
+class TemporalFeatureTracker:
+    """
+    Sliding-window motion features over the last `window` hand poses.
+
+    Poses live in a preallocated ring buffer. Every push computes the motion
+    terms of the newest step, adds them to running sums and subtracts the
+    step that falls out of the window, so the per-frame cost is constant
+    regardless of the window length.
+
+    Features (32): mean velocity of the wrist and fingertips (12), their mean
+    speed (6), net displacement over the window (12), accumulated signed
+    turning of the wrist path (1) and log change in hand size (1). Velocities
+    and displacements are divided by the hand size, so they do not depend on
+    the performer's distance from the camera.
+    """
+
+    FEATURE_COUNT = 32
+    # Running sums are recomputed from the ring this often to cancel floating point drift
+    RESYNC_INTERVAL = 1000
+
+    def __init__(self, window=20, max_gap=0.25):
+        if window < 3:
+            raise ValueError("window must hold at least 3 frames")
+        self.window = window
+        self.max_gap = max_gap
+        self._positions = np.zeros((window, len(TRACKED_POINTS), 2), dtype=np.float64)
+        self._scales = np.ones(window, dtype=np.float64)
+        self._timestamps = np.zeros(window, dtype=np.float64)
+        # Terms of the step arriving at each slot; the oldest slot's entry is stale
+        self._steps = np.zeros((window, STEP_TERMS), dtype=np.float64)
+        self._sums = np.zeros(STEP_TERMS, dtype=np.float64)
+        self._features = np.zeros((1, self.FEATURE_COUNT), dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self._head = 0  # Slot the next pose is written to
+        self._newest = -1
+        self._sums[:] = 0.0
+        self._last_velocity = None
+        self._pushes = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def ready(self):
+        """True once the window is full"""
+        return self.count == self.window
+
+    @property
+    def _oldest(self):
+        return (self._head - self.count) % self.window
+
+    def push(self, hand_points, timestamp):
+        """Add one (21, 3) hand pose; a gap longer than max_gap starts a new window"""
+        if self.count:
+            # Replayed (cached) detections carry no new motion
+            if timestamp <= self._timestamps[self._newest]:
+                return
+            if timestamp - self._timestamps[self._newest] > self.max_gap:
+                self.reset()
+
+        if self.count == self.window:
+            # The pose after the oldest becomes the oldest; its incoming step leaves the window
+            self._sums -= self._steps[(self._head + 1) % self.window]
+            # and the next step's turn was measured against the step that just left
+            first_step = self._steps[(self._head + 2) % self.window]
+            self._sums[_TURN] -= first_step[_TURN]
+            first_step[_TURN] = 0.0
+            self.count -= 1
+
+        slot = self._head
+        xy = hand_points[:, :2]
+        position = self._positions[slot]
+        position[:] = xy[TRACKED_POINTS]
+        scale = math.hypot(xy[MIDDLE_MCP, 0] - xy[0, 0], xy[MIDDLE_MCP, 1] - xy[0, 1])
+        self._scales[slot] = max(scale, 1e-3)
+        self._timestamps[slot] = timestamp
+
+        step = self._steps[slot]
+        if self.count:
+            previous = self._newest
+            dt = max(timestamp - self._timestamps[previous], 1e-3)
+            velocity = (position - self._positions[previous]) / (dt * self._scales[slot])
+            step[_VELOCITY] = velocity.reshape(-1)
+            step[_SPEED] = np.sqrt((velocity ** 2).sum(axis=1))
+            wrist_velocity = velocity[0]
+            if self._last_velocity is not None:
+                last = self._last_velocity
+                cross = last[0] * wrist_velocity[1] - last[1] * wrist_velocity[0]
+                dot = last[0] * wrist_velocity[0] + last[1] * wrist_velocity[1]
+                step[_TURN] = math.atan2(cross, dot)
+            else:
+                step[_TURN] = 0.0
+            self._last_velocity = wrist_velocity.copy()
+            self._sums += step
+        else:
+            step[:] = 0.0
+
+        self._newest = slot
+        self._head = (slot + 1) % self.window
+        self.count += 1
+
+        self._pushes += 1
+        if self._pushes % self.RESYNC_INTERVAL == 0:
+            self._resync()
+
+    def _resync(self):
+        oldest = self._oldest
+        slots = [(oldest + offset) % self.window for offset in range(1, self.count)]
+        self._sums[:] = self._steps[slots].sum(axis=0) if slots else 0.0
+
+    def features(self):
+        """Current window features as a (1, 32) float32 row; the array is reused between calls"""
+        features = self._features[0]
+        steps = self.count - 1
+        if steps < 1:
+            features[:] = 0.0
+            return self._features
+        oldest = self._oldest
+        newest = self._newest
+        features[0:12] = self._sums[_VELOCITY] / steps
+        features[12:18] = self._sums[_SPEED] / steps
+        features[18:30] = ((self._positions[newest] - self._positions[oldest]) / self._scales[newest]).reshape(-1)
+        features[30] = self._sums[_TURN]
+        features[31] = math.log(self._scales[newest] / self._scales[oldest])
+        return self._features
+
+    @classmethod
+    def sequence_features(cls, hand_sequence, timestamps, window=None):
+        """Features of a recorded (frames, 21, 3) pose sequence, e.g. to build training data"""
+        hand_sequence = np.asarray(hand_sequence)
+        tracker = cls(window=window or len(hand_sequence), max_gap=float("inf"))
+        for hand_points, timestamp in zip(hand_sequence, timestamps):
+            tracker.push(hand_points, timestamp)
+        return tracker.features().copy()
+
+
+class DynamicGestureClassifier(GestureClassifier):
+    """Classifier for motion gestures (swipes, circles, pushes) over TemporalFeatureTracker features"""
+
+    def __init__(self, model_path=None):
+        super().__init__(model_path)
+        if self.gesture_name:
+            self.gesture_name = self.gesture_name.replace("_dynamic.pkl", "").replace("_dynamic.amx", "")
+
+
+class PredictionVote:
+    """
+    Majority vote over the last `size` per-frame predictions, kept in a fixed
+    ring with incrementally updated counts instead of a growing list
+    """
+
+    def __init__(self, size=10, threshold=7):
+        self.size = size
+        self.threshold = threshold
+        self._ring = [None] * size
+        self._counts = {}
+        self.clear()
+
+    def clear(self):
+        self._ring[:] = [None] * self.size
+        self._counts.clear()
+        self._head = 0
+
+    def push(self, label):
+        """Record a prediction and return the current winner, if any"""
+        evicted = self._ring[self._head]
+        if evicted is not None:
+            self._counts[evicted] -= 1
+        self._ring[self._head] = label
+        self._head = (self._head + 1) % self.size
+        self._counts[label] = self._counts.get(label, 0) + 1
+        return self.winner()
+
+    def winner(self):
+        """Label holding at least `threshold` of the window, or None"""
+        for label, count in self._counts.items():
+            if count >= self.threshold:
+                return label
+        return None
@@ -1,98 +1,374 @@
+import multiprocessing
 import numpy as np
 import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from .classifier import GestureClassifier
-from sklearn.model_selection import train_test_split
+from .gesture_bank import GestureBank, BANK_FILENAME
+from .sample_store import SampleStore
+from .temporal import DynamicGestureClassifier, DYNAMIC_SUFFIX
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.metrics import classification_report
+from sklearn.preprocessing import StandardScaler
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+# Hyperparameter grid explored by GestureTrainer.sweep_hyperparameters
+SWEEP_HIDDEN_LAYER_SIZES = [(50,), (100, 50), (128, 64)]
+SWEEP_ALPHAS = [0.001, 0.01, 0.1]
+# A training session named "<gesture>_dynamic" collects motion windows for a dynamic model
+DYNAMIC_TRAINING_SUFFIX = "_dynamic"
+
+
+def _evaluate_config(X, y, hidden_layer_sizes, alpha, folds):
+    """Cross-validate one hyperparameter config; module level so it can run in a worker process"""
+    start = time.perf_counter()
+    scores = []
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    for train_idx, test_idx in splitter.split(X, y):
+        scaler = StandardScaler()
+        model = GestureClassifier.build_model(hidden_layer_sizes, alpha)
+        model.fit(scaler.fit_transform(X[train_idx]), y[train_idx])
+        scores.append(model.score(scaler.transform(X[test_idx]), y[test_idx]))
+    return {
+        "hidden_layer_sizes": tuple(hidden_layer_sizes),
+        "alpha": alpha,
+        "accuracy": float(np.mean(scores)),
+        "accuracy_std": float(np.std(scores)),
+        "fit_time": time.perf_counter() - start,
+    }
+
 
 class GestureTrainer:
-    def __init__(self, save_dir="model/trained"):
+    MIN_SAMPLES = 50
+
+    def __init__(self, save_dir="model/trained", tune_hyperparameters=False, cv_folds=5, workers=None,
+                 incremental=False, background_rebuild=False):
         self.classifier = GestureClassifier()
         self.save_dir = save_dir
+        self.tune_hyperparameters = tune_hyperparameters
+        self.cv_folds = cv_folds
+        self.workers = workers
+        self.incremental = incremental
+        self.background_rebuild = background_rebuild
+        # Called with the gesture name whenever a background rebuild replaces a model
+        self.on_model_updated = None
+        # Samples collected in the current session; everything else lives in the sample store
         self.training_data = []
         self.training_labels = []
         self.is_training = False
         self.current_gesture = None
+        # Motion gesture being trained, for a session started as "<gesture>_dynamic"
+        self.dynamic_gesture = None
         os.makedirs(self.save_dir, exist_ok=True)
+        self.sample_store = SampleStore(os.path.join(self.save_dir, "samples"))
+        # Window features for motion gestures have their own layout, so they are stored apart
+        self.dynamic_sample_store = SampleStore(os.path.join(self.save_dir, "dynamic_samples"))
+        self._model_lock = threading.Lock()
+        self._rebuild_threads = {}
+
+    def model_path(self, gesture_name):
+        return os.path.join(self.save_dir, f"{gesture_name}_model.pkl")
 
     def start_training(self, gesture_name):
-        """Start training mode for a gesture"""
-        print(f"GestureTrainer: Starting training for gesture '{gesture_name}'")
+        """Start training mode for a gesture; samples from earlier sessions stay in the sample store"""
+        log.info("Starting training for gesture '%s'", gesture_name)
         self.training_data = []
         self.training_labels = []
         self.is_training = True
         self.current_gesture = gesture_name
+        self.dynamic_gesture = None
+        if gesture_name.endswith(DYNAMIC_TRAINING_SUFFIX):
+            self.dynamic_gesture = gesture_name[:-len(DYNAMIC_TRAINING_SUFFIX)]
+            log.info("Collecting motion windows for dynamic gesture '%s'", self.dynamic_gesture)
 
     def add_sample(self, landmarks, label):
         """Add a training sample with explicit label (gesture or neutral)"""
-        print(f"add_sample called. Landmarks: {landmarks}, label: {label}")
+        log.debug("add_sample called. Landmarks: %s, label: %s", landmarks, label)
         if not self.is_training:
-            print("Not in training mode, sample not added.")
+            log.info("Not in training mode, sample not added.")
             return
 
         features = self.classifier.preprocess_landmarks(landmarks)
-        print(f"Extracted features: {features}")
+        log.debug("Extracted features: %s", features)
 
         if features.size == 0 or (features.ndim > 1 and features.shape[1] == 0):
-            print("Warning: Empty features detected, sample skipped")
+            log.warning("Empty features detected, sample skipped")
             return
 
         self.training_data.append(features.flatten())
         self.training_labels.append(label)
-        print(f"Sample added. Label: {label}, Current training data length: {len(self.training_data)}")
+        log.info("Sample added. Label: %s, Current training data length: %d", label, len(self.training_data))
+
+    def add_dynamic_sample(self, window_features, label):
+        """Add a TemporalFeatureTracker window as a motion sample, labelled with the gesture or neutral"""
+        if not self.is_training or self.dynamic_gesture is None:
+            log.info("Not training a dynamic gesture, sample not added.")
+            return
+        # Dynamic models predict the bare gesture name, not the "_dynamic" session name
+        if label == self.current_gesture:
+            label = self.dynamic_gesture
+        self.training_data.append(np.asarray(window_features, dtype=np.float64).flatten())
+        self.training_labels.append(label)
+        log.info("Motion sample added. Label: %s, Current training data length: %d", label, len(self.training_data))
+
+    def flush_samples(self):
+        """Append the current session's samples to the sample store and return them as (X, y)"""
+        if not self.training_data:
+            return np.empty((0, 0)), np.array([])
+        X = np.array(self.training_data)
+        y = np.array(self.training_labels)
+        try:
+            path = self.sample_store.append(self.current_gesture, X, y)
+            log.info("%d samples for %s stored in %s", len(X), self.current_gesture, path)
+        except Exception as e:
+            log.error("Error storing samples for %s: %s", self.current_gesture, e)
+        self.training_data = []
+        self.training_labels = []
+        return X, y
 
     def train_model(self):
         """Train the model with collected samples"""
-        if not self.is_training or len(self.training_data) < 50:
-            print(f"Insufficient training data: {len(self.training_data)} samples. Need at least 50.")
+        if not self.is_training:
+            log.info("Not in training mode, nothing to train.")
+            return False
+        self.flush_samples()
+        return self.rebuild_model(self.current_gesture, self.classifier)
+
+    def rebuild_model(self, gesture_name, classifier=None):
+        """Fully retrain a gesture's model from every stored sample"""
+        classifier = classifier or GestureClassifier()
+        X, y = self.sample_store.load(gesture_name)
+        if len(X) < self.MIN_SAMPLES:
+            log.warning("Insufficient training data: %d samples. Need at least %d.", len(X), self.MIN_SAMPLES)
             return False
 
-        X = np.array(self.training_data)
-        y = np.array(self.training_labels)
         unique_labels, counts = np.unique(y, return_counts=True)
-        print(f"Training model with {len(X)} samples. Labels: {unique_labels}, Counts: {counts}")
+        log.info("Training model with %d samples. Labels: %s, Counts: %s", len(X), unique_labels, counts)
 
         if len(unique_labels) < 2:
-            print("Need at least two classes (gesture and neutral) for training.")
+            log.warning("Need at least two classes (gesture and neutral) for training.")
             return False
 
         # Split data for validation
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
+        # Pick hidden sizes and alpha by cross-validation when tuning is enabled
+        config = {}
+        if self.tune_hyperparameters:
+            results = self.sweep_hyperparameters(X_train, y_train)
+            if results:
+                config = {"hidden_layer_sizes": results[0]["hidden_layer_sizes"], "alpha": results[0]["alpha"]}
+                log.info("Selected config: %s", config)
+
         # Train classifier
-        self.classifier.train(X_train, y_train)
+        classifier.train(X_train, y_train, **config)
         
-        # Evaluate on test set
-        y_pred = []
-        for features in X_test:
-            pred = self.classifier.predict(features.reshape(1, -1))
-            y_pred.append(pred)
+        # Evaluate on test set in one batched call
+        y_pred, _ = classifier.predict_many(X_test)
         
-        print("Classification Report:")
         # Filter out NO_GESTURE for reporting
         filtered = [(yt, yp) for yt, yp in zip(y_test, y_pred) if yp != "NO_GESTURE"]
         if filtered:
             y_test_filtered, y_pred_filtered = zip(*filtered)
-            print(classification_report(y_test_filtered, y_pred_filtered))
+            log.info("Classification Report:\n%s", classification_report(y_test_filtered, y_pred_filtered))
         else:
-            print("No valid predictions to report (all predictions were NO_GESTURE).")
+            log.info("No valid predictions to report (all predictions were NO_GESTURE).")
 
         # Save the model
-        model_path = os.path.join(self.save_dir, f"{self.current_gesture}_model.pkl")
+        model_path = self.model_path(gesture_name)
         try:
-            self.classifier.save_model(model_path)
-            print(f"Model trained and saved to {model_path}")
+            classifier.gesture_name = gesture_name
+            with self._model_lock:
+                classifier.save_model(model_path)
+            log.info("Model trained and saved to %s", model_path)
         except Exception as e:
-            print(f"Error saving model: {e}")
+            log.error("Error saving model: %s", e)
+            return False
+
+        return True
+
+    def update_model(self, gesture_name, X, y):
+        """Incrementally update an existing model with new samples only, via partial_fit"""
+        model_path = self.model_path(gesture_name)
+        if not os.path.exists(model_path):
+            log.warning("No existing model for %s, incremental update not possible.", gesture_name)
             return False
 
+        start = time.perf_counter()
+        with self._model_lock:
+            classifier = GestureClassifier(model_path)
+            if classifier.model is None:
+                return False
+            unknown = set(np.unique(y)) - set(classifier.model.classes_)
+            if unknown:
+                log.info("Labels %s unknown to the %s model, full retrain needed.", sorted(unknown), gesture_name)
+                return False
+            if not classifier.partial_update(X, y):
+                return False
+            classifier.save_model(model_path)
+        log.info("Model for %s updated with %d samples in %.1f ms", gesture_name, len(X), (time.perf_counter() - start) * 1000)
         return True
 
+    def rebuild_in_background(self, gesture_name):
+        """Start a full rebuild from the sample store on a background thread"""
+        thread = self._rebuild_threads.get(gesture_name)
+        if thread is not None and thread.is_alive():
+            # The running rebuild notices newer segments and trains again
+            return thread
+        thread = threading.Thread(target=self._background_rebuild, args=(gesture_name,), daemon=True)
+        self._rebuild_threads[gesture_name] = thread
+        thread.start()
+        return thread
+
+    def _background_rebuild(self, gesture_name):
+        log.info("Background rebuild started for %s", gesture_name)
+        while True:
+            segment_count = len(self.sample_store.segments(gesture_name))
+            if not self.rebuild_model(gesture_name, GestureClassifier()):
+                log.warning("Background rebuild failed for %s", gesture_name)
+                return
+            # Retrain if samples arrived while this rebuild was running
+            if len(self.sample_store.segments(gesture_name)) == segment_count:
+                break
+        log.info("Background rebuild finished for %s", gesture_name)
+        if self.on_model_updated is not None:
+            try:
+                self.on_model_updated(gesture_name)
+            except Exception as e:
+                log.error("Error in model update callback: %s", e)
+
     def stop_training(self):
-        """Stop training and train the model"""
-        print(f"Stopping training for {self.current_gesture}. Total samples: {len(self.training_data)}")
+        """Stop training and train the model, incrementally if possible"""
+        log.info("Stopping training for %s. Session samples: %d", self.current_gesture, len(self.training_data))
         if not self.is_training:
-            print("Not in training mode, nothing to stop.")
+            log.info("Not in training mode, nothing to stop.")
             return False
-        result = self.train_model()
+
+        if self.dynamic_gesture is not None:
+            X_new, y_new = np.array(self.training_data), np.array(self.training_labels)
+            self.training_data = []
+            self.training_labels = []
+            result = self.train_dynamic_model(self.dynamic_gesture, X_new, y_new)
+            self.is_training = False
+            self.dynamic_gesture = None
+            return result
+
+        X_new, y_new = self.flush_samples()
+        result = False
+        if self.incremental and len(X_new) > 0:
+            result = self.update_model(self.current_gesture, X_new, y_new)
+            if result and self.background_rebuild:
+                self.rebuild_in_background(self.current_gesture)
+        if not result:
+            result = self.train_model()
         self.is_training = False
         return result
+
+    def load_sample_sets(self):
+        """Load every stored per-gesture sample set as {gesture: (X, y)}"""
+        return self.sample_store.load_all()
+
+    def build_gesture_bank(self, sample_sets=None):
+        """Jointly train one multi-class gesture bank from the per-gesture sample sets"""
+        if sample_sets is None:
+            sample_sets = self.load_sample_sets()
+        if not sample_sets:
+            log.warning("No gesture sample sets found, gesture bank not built.")
+            return False
+
+        X, y = GestureBank.merge_sample_sets(sample_sets)
+        unique_labels, counts = np.unique(y, return_counts=True)
+        log.info("Building gesture bank with %d samples. Labels: %s, Counts: %s", len(X), unique_labels, counts)
+        if len(unique_labels) < 2:
+            log.warning("Need at least two classes to build the gesture bank.")
+            return False
+
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        bank = GestureBank()
+        if not bank.train(X_train, y_train):
+            return False
+
+        y_pred, _ = bank.predict_many(X_test)
+        filtered = [(yt, yp) for yt, yp in zip(y_test, y_pred) if yp != "NO_GESTURE"]
+        if filtered:
+            y_test_filtered, y_pred_filtered = zip(*filtered)
+            log.info("Gesture Bank Classification Report:\n%s", classification_report(y_test_filtered, y_pred_filtered))
+
+        bank_path = os.path.join(self.save_dir, BANK_FILENAME)
+        try:
+            bank.save_model(bank_path)
+            log.info("Gesture bank trained and saved to %s", bank_path)
+        except Exception as e:
+            log.error("Error saving gesture bank: %s", e)
+            return False
+        return True
+
+    def train_dynamic_model(self, gesture_name, X=None, y=None):
+        """
+        Train a motion gesture model from TemporalFeatureTracker window features.
+        New samples (X, y) are stored first; training uses every stored sample.
+        """
+        if X is not None and len(X) > 0:
+            self.dynamic_sample_store.append(gesture_name, X, y)
+        X, y = self.dynamic_sample_store.load(gesture_name)
+        unique_labels, counts = np.unique(y, return_counts=True)
+        log.info("Training dynamic model for %s with %d windows. Labels: %s, Counts: %s", gesture_name, len(X), unique_labels, counts)
+        if len(unique_labels) < 2 or counts.min() < 2:
+            log.warning("Need at least two samples each of the gesture and neutral motion.")
+            return False
+
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+        classifier = DynamicGestureClassifier()
+        classifier.train(X_train, y_train)
+        y_pred, _ = classifier.predict_many(X_test)
+        filtered = [(yt, yp) for yt, yp in zip(y_test, y_pred) if yp != "NO_GESTURE"]
+        if filtered:
+            y_test_filtered, y_pred_filtered = zip(*filtered)
+            log.info("Dynamic Gesture Classification Report:\n%s", classification_report(y_test_filtered, y_pred_filtered))
+
+        model_path = os.path.join(self.save_dir, f"{gesture_name}{DYNAMIC_SUFFIX}")
+        try:
+            classifier.gesture_name = gesture_name
+            with self._model_lock:
+                classifier.save_model(model_path)
+            log.info("Dynamic model trained and saved to %s", model_path)
+        except Exception as e:
+            log.error("Error saving dynamic model: %s", e)
+            return False
+        return True
+
+    def sweep_hyperparameters(self, X, y, hidden_layer_sizes=None, alphas=None, folds=None):
+        """
+        K-fold cross-validate every (hidden sizes, alpha) config over a process pool.
+        Returns per-config accuracy and fit time, best config first.
+        """
+        X = np.asarray(X)
+        y = np.asarray(y)
+        hidden_layer_sizes = hidden_layer_sizes or SWEEP_HIDDEN_LAYER_SIZES
+        alphas = alphas or SWEEP_ALPHAS
+        _, counts = np.unique(y, return_counts=True)
+        # Every fold needs at least one sample of each class
+        folds = min(folds or self.cv_folds, int(counts.min()))
+        if folds < 2:
+            log.warning("Not enough samples per class for cross-validation, sweep skipped.")
+            return []
+
+        configs = [(sizes, alpha) for sizes in hidden_layer_sizes for alpha in alphas]
+        log.info("Sweeping %d configs with %d-fold cross-validation", len(configs), folds)
+        start = time.perf_counter()
+        # Spawned workers start clean; forking this process would copy the OSC and audio threads' locks
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(_evaluate_config, X, y, sizes, alpha, folds) for sizes, alpha in configs]
+            results = [future.result() for future in futures]
+        results.sort(key=lambda result: (-result["accuracy"], result["fit_time"]))
+
+        for result in results:
+            log.info("  hidden=%s alpha=%s: accuracy=%.4f (+/- %.4f) fit_time=%.2fs",
+                     result['hidden_layer_sizes'], result['alpha'], result['accuracy'],
+                     result['accuracy_std'], result['fit_time'])
+        log.info("Sweep finished in %.2fs", time.perf_counter() - start)
+        return results
@@ -0,0 +1,231 @@
+"""
+Multi-source recognition: several cameras, video files or recorded sessions
+feeding one AeroMixApp.
+
+Each source runs its own GestureDetector in a worker process, since
+MediaPipe holds the GIL for most of a detection and threads would not
+scale across cores. Workers only send landmarks back (a few hundred bytes
+per frame), and the parent classifies them with the app's shared models,
+keeping a separate vote, motion window and cooldown per source. Fired
+gestures drive the app's sound controller and are also sent on OSC as
+/source/gesture with the source ID, so a patch can tell performers apart.
+"""
+import logging
+import multiprocessing
+import os
+import queue
+import time
+import cv2
+from ml.temporal import PredictionVote, TemporalFeatureTracker
+from utils.landmarks import LandmarkFrame
+from utils.log import ROOT, configure as configure_logging, get_logger
+from utils.tracing import tracer
+
+log = get_logger(__name__)
+
+SOURCE_GESTURE_ADDRESS = "/source/gesture"
+
+
+def open_source(spec, replay_speed=1.0):
+    """VideoCapture-like reader for a camera index, a video file or a recorded session directory"""
+    if os.path.isdir(spec):
+        from utils.session import ReplayCamera, SessionReader
+        return ReplayCamera(SessionReader(spec), speed=replay_speed)
+    if spec.isdigit():
+        return cv2.VideoCapture(int(spec))
+    return cv2.VideoCapture(spec)
+
+
+def _source_worker(source_id, spec, detector_options, replay_speed, results, stop_event, log_level):
+    """Worker process: read, mirror and detect frames from one source, sending landmarks to the parent"""
+    from utils.gesture_Detection import GestureDetector
+    configure_logging(log_level)
+    source_log = get_logger(f"multisource.{source_id}")
+    capture = open_source(spec, replay_speed)
+    if not capture.isOpened():
+        _report_stopped(results, source_id, f"could not open {spec}")
+        return
+    detector = GestureDetector(**detector_options)
+    dropped = 0
+    reason = "end of stream"
+    try:
+        while not stop_event.is_set():
+            ret, frame = capture.read()
+            if not ret:
+                break
+            captured_at = time.time()
+            frame = cv2.flip(frame, 1)
+            start = time.perf_counter()
+            landmarks, _ = detector.detect_landmarks(frame, annotate=False)
+            detect_time = time.perf_counter() - start
+            message = ("landmarks", source_id, landmarks.points, landmarks.is_left,
+                       landmarks.timestamp, captured_at, detect_time)
+            try:
+                # A parent that falls behind loses frames rather than queueing up latency
+                results.put_nowait(message)
+            except queue.Full:
+                dropped += 1
+    except KeyboardInterrupt:
+        reason = "interrupted"
+    except Exception as e:
+        source_log.exception("Detection failed")
+        reason = f"error: {e}"
+    finally:
+        capture.release()
+        detector.release()
+    if dropped:
+        source_log.info("Dropped %d frames the recognizer could not keep up with", dropped)
+    _report_stopped(results, source_id, reason)
+
+
+def _report_stopped(results, source_id, reason):
+    try:
+        results.put(("stopped", source_id, reason), timeout=1.0)
+    except queue.Full:
+        pass
+
+
+class SourceRecognizer:
+    """Per-source recognition state on top of the app's shared classifiers and sound controller"""
+
+    def __init__(self, app, source_id):
+        self.app = app
+        self.source_id = source_id
+        self.vote = PredictionVote(size=10, threshold=7)
+        self.temporal_tracker = TemporalFeatureTracker(window=app.temporal_tracker.window)
+        self.last_gesture_time = 0
+        self.frames = 0
+        self.fired = []
+
+    def update(self, landmarks, current_time):
+        """Classify one frame from this source; returns the gesture it fired, or None"""
+        self.frames += 1
+        if not landmarks.has_hands:
+            return None
+        fired = None
+        pred_this_frame = self.app.classify_frame(landmarks)
+        if pred_this_frame:
+            most_common = self.vote.push(pred_this_frame)
+            if most_common and current_time - self.last_gesture_time > self.app.GESTURE_COOLDOWN:
+                fired = most_common
+                self.vote.clear()
+        dynamic_gesture = self.app.update_dynamic_gestures(landmarks, self.temporal_tracker)
+        if fired is None and dynamic_gesture and current_time - self.last_gesture_time > self.app.GESTURE_COOLDOWN:
+            fired = dynamic_gesture
+            self.temporal_tracker.reset()
+        if fired:
+            self.last_gesture_time = current_time
+            self.fired.append((current_time, fired))
+        return fired
+
+
+class MultiSourceRecognizer:
+    """
+    Runs one detector process per source and recognizes gestures from all of
+    them in the calling process. Sources are camera indices ("0"), video
+    files or session directories recorded with --record --record-frames.
+    """
+
+    QUEUE_FRAMES_PER_SOURCE = 4
+
+    def __init__(self, app, sources, detector_options=None, replay_speed=1.0):
+        self.app = app
+        self.sources = list(sources)
+        self.detector_options = detector_options or {}
+        self.replay_speed = replay_speed
+        # Spawned workers start clean instead of inheriting the parent's threads and OSC sockets
+        self._context = multiprocessing.get_context("spawn")
+        self.results = self._context.Queue(maxsize=self.QUEUE_FRAMES_PER_SOURCE * len(self.sources))
+        self.stop_event = self._context.Event()
+        self.recognizers = {source_id: SourceRecognizer(app, source_id) for source_id in range(len(self.sources))}
+        self._processes = []
+        self._active = set()
+
+    def start(self):
+        log_level = logging.getLevelName(logging.getLogger(ROOT).getEffectiveLevel())
+        for source_id, spec in enumerate(self.sources):
+            process = self._context.Process(
+                target=_source_worker,
+                args=(source_id, spec, self.detector_options, self.replay_speed, self.results, self.stop_event,
+                      log_level),
+                name=f"aeromix-source-{source_id}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+            self._active.add(source_id)
+            log.info("Source %d (%s) started in process %d", source_id, spec, process.pid)
+
+    def handle(self, message):
+        kind, source_id = message[0], message[1]
+        if kind == "stopped":
+            log.info("Source %d (%s) stopped: %s", source_id, self.sources[source_id], message[2])
+            self._active.discard(source_id)
+            return None
+        _, _, points, is_left, timestamp, captured_at, detect_time = message
+        tracer.record(f"detect.source{source_id}", detect_time)
+        landmarks = LandmarkFrame(points, is_left, timestamp)
+        gesture = self.recognizers[source_id].update(landmarks, timestamp)
+        if gesture:
+            self.app.process_gesture(gesture)
+            self.app.osc_handler.send_message(SOURCE_GESTURE_ADDRESS, [source_id, gesture])
+            # Capture in the worker to audio action in the parent
+            tracer.record("end_to_end", time.time() - captured_at)
+            log.info("Source %d: %s", source_id, gesture)
+        return gesture
+
+    def run(self, duration=None):
+        """Recognize until every source has ended, `duration` seconds have passed or Ctrl+C"""
+        self.start()
+        started = time.perf_counter()
+        try:
+            while self._active:
+                if duration is not None and time.perf_counter() - started >= duration:
+                    break
+                try:
+                    message = self.results.get(timeout=0.1)
+                except queue.Empty:
+                    # A worker that died without reporting would otherwise keep us waiting forever
+                    for source_id, process in enumerate(self._processes):
+                        if source_id in self._active and not process.is_alive():
+                            log.warning("Source %d exited with code %s", source_id, process.exitcode)
+                            self._active.discard(source_id)
+                    continue
+                self.handle(message)
+        except KeyboardInterrupt:
+            log.info("Stopping sources...")
+        finally:
+            self.stop()
+        log.info("Source stats: %s", self.stats())
+        return self.stats()
+
+    def _drain(self):
+        try:
+            while True:
+                self.results.get_nowait()
+        except queue.Empty:
+            pass
+
+    def stop(self):
+        self.stop_event.set()
+        # Keep draining while workers wind down, so none stays blocked on a full queue
+        deadline = time.monotonic() + 2.0
+        while any(process.is_alive() for process in self._processes) and time.monotonic() < deadline:
+            self._drain()
+            time.sleep(0.05)
+        for process in self._processes:
+            if process.is_alive():
+                log.warning("Source process %s did not stop, terminating it", process.name)
+                process.terminate()
+            process.join(timeout=1.0)
+        self._drain()
+
+    def stats(self):
+        return {
+            source_id: {
+                "source": self.sources[source_id],
+                "frames": recognizer.frames,
+                "gestures": [gesture for _, gesture in recognizer.fired],
+            }
+            for source_id, recognizer in self.recognizers.items()
+        }
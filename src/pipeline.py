@@ -0,0 +1,185 @@
+import cv2
+import threading
+import time
+from utils.log import get_logger
+from utils.tracing import tracer
+
+log = get_logger(__name__)
+
+
+class LatestFrameQueue:
+    """
+    Single-slot hand-off between pipeline stages. A put replaces any item the
+    consumer has not taken yet, so a slow stage always works on the newest
+    frame and stale frames are dropped instead of queueing up latency.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._item = None
+        self._has_item = False
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        """Offer an item; returns the unconsumed item it replaced, if any, so its buffers can be recycled"""
+        with self._condition:
+            replaced = None
+            if self._has_item:
+                self.dropped += 1
+                replaced = self._item
+            self._item = item
+            self._has_item = True
+            self._condition.notify()
+            return replaced
+
+    def get(self, timeout=None):
+        """Take the newest item, waiting up to timeout; returns None on timeout or close"""
+        with self._condition:
+            if not self._has_item and not self.closed:
+                self._condition.wait(timeout)
+            if not self._has_item:
+                return None
+            item = self._item
+            self._item = None
+            self._has_item = False
+            return item
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class StageStats:
+    """Timing of one pipeline stage: count, last, mean and max duration"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        self.last = duration
+        if duration > self.max:
+            self.max = duration
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "last_ms": self.last * 1000,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "max_ms": self.max * 1000,
+        }
+
+
+class RecognitionPipeline:
+    """
+    Pipelined recognition loop for AeroMixApp: a capture thread reads and
+    flips camera frames, a worker thread runs detection and classification,
+    and the calling thread renders and handles keys (OpenCV windows must stay
+    on the main thread). Stages are connected by LatestFrameQueues.
+    """
+
+    STAGES = ("capture", "flip", "detect", "classify", "render", "latency")
+
+    def __init__(self, app, window_name=None):
+        self.app = app
+        self.window_name = window_name or app.RECOGNITION_WINDOW
+        self.captured = LatestFrameQueue()
+        self.detected = LatestFrameQueue()
+        self.timings = {stage: StageStats() for stage in self.STAGES}
+        self.running = False
+        self._threads = []
+        self._started_at = None
+        self._rendered = 0
+
+    def _capture_loop(self):
+        while self.running:
+            start = time.perf_counter()
+            ret, frame = self.app.read_camera()
+            captured_at = time.perf_counter()
+            self.timings["capture"].add(captured_at - start)
+            tracer.record("capture", captured_at - start)
+            if not ret:
+                log.warning("camera returned no frame, stopping")
+                self.running = False
+                break
+            frame = self.app.flip_frame(frame)
+            flip_time = time.perf_counter() - captured_at
+            self.timings["flip"].add(flip_time)
+            tracer.record("flip", flip_time)
+            replaced = self.captured.put((frame, captured_at))
+            if replaced is not None:
+                self.app.release_frame(replaced[0])
+        self.captured.close()
+
+    def _detect_loop(self):
+        while self.running:
+            item = self.captured.get(timeout=0.1)
+            if item is None:
+                continue
+            frame, captured_at = item
+            tracer.begin_frame(captured_at)
+            start = time.perf_counter()
+            landmarks, annotated_frame = self.app.gesture_detector.detect_landmarks(frame)
+            self.app.record_frame(landmarks, frame)
+            self.app.release_frame(frame)
+            detected_at = time.perf_counter()
+            self.timings["detect"].add(detected_at - start)
+            tracer.record("detect", detected_at - start)
+            self.app.update_recognition(landmarks, time.time())
+            self.timings["classify"].add(time.perf_counter() - detected_at)
+            replaced = self.detected.put((annotated_frame, captured_at))
+            if replaced is not None:
+                self.app.gesture_detector.release_frame(replaced[0])
+        self.detected.close()
+
+    def run(self):
+        """Start the capture and detection threads and render until the user quits or the camera stops"""
+        self.running = True
+        self._started_at = time.perf_counter()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="aeromix-capture", daemon=True),
+            threading.Thread(target=self._detect_loop, name="aeromix-detect", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        try:
+            while self.running:
+                item = self.detected.get(timeout=0.05)
+                if item is not None:
+                    annotated_frame, captured_at = item
+                    start = time.perf_counter()
+                    annotated_frame = self.app.render_recognition(annotated_frame)
+                    cv2.imshow(self.window_name, annotated_frame)
+                    self.app.gesture_detector.release_frame(annotated_frame)
+                    now = time.perf_counter()
+                    self.timings["render"].add(now - start)
+                    self.timings["latency"].add(now - captured_at)
+                    tracer.record("render", now - start)
+                    tracer.record("frame", now - captured_at)
+                    self._rendered += 1
+                if not self.app.handle_recognition_key(cv2.waitKey(1) & 0xFF):
+                    break
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.running = False
+        self.captured.close()
+        self.detected.close()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+
+    def stats(self):
+        """Per-stage timings, dropped frame counts and rendered frame rate"""
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        return {
+            "stages": {stage: timing.snapshot() for stage, timing in self.timings.items()},
+            "dropped": {"captured": self.captured.dropped, "detected": self.detected.dropped},
+            "rendered_fps": self._rendered / elapsed if elapsed else 0.0,
+        }
@@ -1,19 +1,21 @@
 import pygame
 from utils.osc_handler import OSCHandler
-import time
-import traceback
+from utils.log import get_logger
+from utils.tracing import tracer
+
+log = get_logger(__name__)
 
 class SoundController:
     def __init__(self, osc_handler=None):
-        print("SoundController: Initializing audio system...")
+        log.info("Initializing audio system...")
         
         # Initialize basic audio with pygame only
         try:
             pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=1024)
-            print("[DEBUG] pygame.mixer initialized successfully")
+            log.debug("pygame.mixer initialized successfully")
             self.audio_available = True
         except Exception as e:
-            print(f"[ERROR] Failed to initialize pygame.mixer: {e}")
+            log.error("Failed to initialize pygame.mixer: %s", e)
             self.audio_available = False
 
         # Skip Pyo entirely for now - use simple pygame-based audio
@@ -28,11 +30,11 @@ class SoundController:
         # Initialize simple audio controls
         self._initialize_simple_audio()
         self.osc_handler = osc_handler or OSCHandler()
-        print("[DEBUG] SoundController initialized in simple mode")
+        log.debug("SoundController initialized in simple mode")
 
     def _initialize_simple_audio(self):
         """Initialize simple pygame-based audio controls"""
-        print("[DEBUG] Initializing simple audio controls...")
+        log.debug("Initializing simple audio controls...")
         
         # Set fallback values for all audio objects
         self.snd_table = None
@@ -42,13 +44,13 @@ class SoundController:
         self.volume_sig = None
         self.bass_freq = None
         
-        print("[DEBUG] Simple audio controls initialized")
+        log.debug("Simple audio controls initialized")
 
     def adjust_bass(self, value):
         """Control bass with range 0.0-1.0 (0-100%)"""
-        print(f"[DEBUG] Adjusting bass by {value}")
+        log.debug("Adjusting bass by %s", value)
         self.bass = max(0.0, min(1.0, self.bass + value))
-        print(f"Bass: {self.bass*100:.0f}% (simple mode)")
+        log.info("Bass: %.0f%% (simple mode)", self.bass*100)
             
         if self.osc_handler:
             self.osc_handler.send_message("/bass", self.bass)
@@ -56,9 +58,9 @@ class SoundController:
 
     def adjust_pitch(self, value):
         """Adjust playback pitch (0.5x to 2.0x)"""
-        print(f"[DEBUG] Adjusting pitch by {value}")
+        log.debug("Adjusting pitch by %s", value)
         self.pitch = max(0.5, min(2.0, self.pitch + value))
-        print(f"Pitch: {self.pitch:.2f}x (simple mode)")
+        log.info("Pitch: %.2fx (simple mode)", self.pitch)
             
         if self.osc_handler:
             self.osc_handler.send_message("/pitch", self.pitch)
@@ -66,9 +68,9 @@ class SoundController:
 
     def adjust_tempo(self, value):
         """Adjust playback speed (0.5x to 2.0x)"""
-        print(f"[DEBUG] Adjusting tempo by {value}")
+        log.debug("Adjusting tempo by %s", value)
         self.tempo = max(0.5, min(2.0, self.tempo + value))
-        print(f"Tempo: {self.tempo:.2f}x (simple mode)")
+        log.info("Tempo: %.2fx (simple mode)", self.tempo)
             
         if self.osc_handler:
             self.osc_handler.send_message("/tempo", self.tempo)
@@ -76,17 +78,18 @@ class SoundController:
 
     def adjust_volume(self, value):
         """Control master volume (0.0 to 1.0)"""
-        print(f"[DEBUG] Adjusting volume by {value}")
+        log.debug("Adjusting volume by %s", value)
         self.volume = max(0.0, min(1.0, self.volume + value))
         
         if self.audio_available:
             try:
-                pygame.mixer.music.set_volume(self.volume)
-                print(f"Volume: {self.volume*100:.0f}%")
+                with tracer.span("pygame"):
+                    pygame.mixer.music.set_volume(self.volume)
+                log.info("Volume: %.0f%%", self.volume*100)
             except:
-                print(f"Volume: {self.volume*100:.0f}% (pygame not available)")
+                log.info("Volume: %.0f%% (pygame not available)", self.volume*100)
         else:
-            print(f"Volume: {self.volume*100:.0f}% (audio not available)")
+            log.info("Volume: %.0f%% (audio not available)", self.volume*100)
             
         if self.osc_handler:
             self.osc_handler.send_message("/volume", self.volume)
@@ -94,10 +97,10 @@ class SoundController:
 
     def control_playback(self, command, track_path=None):
         """Control audio playback using pygame"""
-        print(f"[DEBUG] Control playback command: {command}, track_path: {track_path}")
+        log.debug("Control playback command: %s, track_path: %s", command, track_path)
         
         if not self.audio_available:
-            print("[WARNING] Audio not available, playback command ignored")
+            log.warning("Audio not available, playback command ignored")
             return
             
         if command == "play":
@@ -105,36 +108,38 @@ class SoundController:
                 try:
                     pygame.mixer.music.load(track_path)
                     self.current_track = track_path
-                    print(f"Loaded: {track_path}")
+                    log.info("Loaded: %s", track_path)
                 except Exception as e:
-                    print(f"Load error: {e}")
+                    log.error("Load error: %s", e)
                     return
 
             try:
-                pygame.mixer.music.play()
+                with tracer.span("pygame"):
+                    pygame.mixer.music.play()
                 self.is_playing = True
-                print("Playback started")
+                log.info("Playback started")
             except Exception as e:
-                print(f"Playback error: {e}")
+                log.error("Playback error: %s", e)
 
         elif command == "stop":
             try:
-                pygame.mixer.music.stop()
+                with tracer.span("pygame"):
+                    pygame.mixer.music.stop()
                 self.is_playing = False
-                print("Playback stopped")
+                log.info("Playback stopped")
             except Exception as e:
-                print(f"Stop error: {e}")
+                log.error("Stop error: %s", e)
 
         if self.osc_handler:
             self.osc_handler.send_message("/playback", command)
 
     def cleanup(self):
         """Clean up resources"""
-        print("SoundController: Cleaning up audio system...")
+        log.info("Cleaning up audio system...")
         try:
             if self.audio_available:
                 pygame.mixer.music.stop()
                 pygame.mixer.quit()
-            print("Audio system cleaned up")
+            log.info("Audio system cleaned up")
         except Exception as e:
-            print(f"Cleanup error: {e}")
+            log.error("Cleanup error: %s", e)
@@ -1,10 +1,17 @@
 import streamlit as st
 import cv2
+import os
 import time
 from main import AeroMixApp
+from utils.log import configure as configure_logging
+
+configure_logging(os.environ.get("AEROMIX_LOG_LEVEL", "info"), quiet=os.environ.get("AEROMIX_QUIET") == "1")
+
+# Seconds without hands before the detector drops to its idle scan
+IDLE_AFTER_SECONDS = 10.0
 
 # Initialize the AeroMixApp
-app = AeroMixApp(training_mode=False)
+app = AeroMixApp(training_mode=False, idle_after=IDLE_AFTER_SECONDS)
 
 # Streamlit app title and description
 st.title("AeroMix - Gesture-Based DJ System")
@@ -56,7 +63,7 @@ if app.start_webcam():
         frame_placeholder.image(frame_rgb, channels="RGB", use_column_width=True)
         
         # Update gesture status (placeholder for detected gesture)
-        if landmarks and (landmarks["left_hand"] or landmarks["right_hand"]):
+        if landmarks.has_hands:
             gesture_status.write("Gesture Detected - Processing...")
         else:
             gesture_status.write("No Gesture Detected")
@@ -0,0 +1,139 @@
+import threading
+import time
+from contextlib import contextmanager
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+
+class PoolExhausted(TimeoutError):
+    """No detector became free within the checkout timeout"""
+
+
+class DetectorPool:
+    """
+    Fixed-size pool of GestureDetectors for concurrent callers.
+
+    A detector is used by one caller at a time. MediaPipe's tracker and the
+    detector's cached hands belong to the stream they have been fed, so a
+    checkout prefers the detector the same session used last, and a detector
+    that last served another session is reset before it is handed out.
+    Detectors are created lazily up to `size`.
+    """
+
+    def __init__(self, factory, size=2, checkout_timeout=5.0):
+        self.factory = factory
+        self.size = max(int(size), 1)
+        self.checkout_timeout = checkout_timeout
+        self._condition = threading.Condition()
+        self._idle = []  # Least recently used first
+        self._owners = {}  # id(detector) -> session it last served
+        self._created = 0
+        self.checkouts = 0
+        self.affinity_hits = 0
+        self.resets = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def prewarm(self, count=1):
+        """Create detectors ahead of the first requests; raises if the factory fails"""
+        for _ in range(min(count, self.size) - self._created):
+            with self._condition:
+                self._created += 1
+            try:
+                detector = self.factory()
+            except Exception:
+                with self._condition:
+                    self._created -= 1
+                raise
+            with self._condition:
+                self._idle.append(detector)
+                self._condition.notify()
+
+    def _take_own(self, session_id):
+        """The idle detector session_id used last, or None; the condition is held"""
+        if session_id is None:
+            return None
+        for index, detector in enumerate(self._idle):
+            if self._owners.get(id(detector)) == session_id:
+                self.affinity_hits += 1
+                return self._idle.pop(index)
+        return None
+
+    def acquire(self, session_id=None, timeout=None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited_from = None
+        with self._condition:
+            while True:
+                detector = self._take_own(session_id)
+                if detector is not None:
+                    break
+                # A new detector while the pool has room, else the least recently used idle one
+                if self._created < self.size:
+                    self._created += 1
+                    break
+                if self._idle:
+                    detector = self._idle.pop(0)
+                    break
+                if waited_from is None:
+                    waited_from = time.monotonic()
+                    self.waits += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhausted(f"No detector free after {timeout:.1f}s (pool size {self.size})")
+                self._condition.wait(remaining)
+            self.checkouts += 1
+            if waited_from is not None:
+                self.wait_time += time.monotonic() - waited_from
+            previous_owner = self._owners.get(id(detector)) if detector is not None else None
+
+        if detector is None:
+            try:
+                detector = self.factory()
+            except Exception:
+                with self._condition:
+                    self._created -= 1
+                    self._condition.notify()
+                raise
+            log.info("Created detector %d of %d", self._created, self.size)
+        elif session_id is None or previous_owner != session_id:
+            detector.reset()
+            self.resets += 1
+        return detector
+
+    def release(self, detector, session_id=None):
+        with self._condition:
+            self._owners[id(detector)] = session_id
+            self._idle.append(detector)
+            self._condition.notify()
+
+    @contextmanager
+    def checkout(self, session_id=None, timeout=None):
+        """with pool.checkout(session_id) as detector: ..."""
+        detector = self.acquire(session_id, timeout)
+        try:
+            yield detector
+        finally:
+            self.release(detector, session_id)
+
+    def close(self):
+        with self._condition:
+            detectors, self._idle = self._idle, []
+            self._owners.clear()
+            self._created -= len(detectors)
+        for detector in detectors:
+            detector.release()
+
+    def stats(self):
+        with self._condition:
+            return {
+                "size": self.size,
+                "created": self._created,
+                "idle": len(self._idle),
+                "checkouts": self.checkouts,
+                "affinity_hits": self.affinity_hits,
+                "resets": self.resets,
+                "waits": self.waits,
+                "mean_wait_ms": self.wait_time / self.waits * 1000 if self.waits else 0.0,
+            }
@@ -0,0 +1,40 @@
+import numpy as np
+import threading
+
+
+class FramePool:
+    """
+    Thread-safe pool of preallocated frame buffers. acquire() hands out a
+    free buffer (allocating only when none is free) and release() returns it,
+    so a steady stream of same-sized frames stops allocating after warm-up.
+    Buffers keep flat storage and are handed out as views of the requested
+    shape, so varying ROI sizes reuse the same memory. A buffer that is never
+    released is simply garbage collected.
+    """
+
+    def __init__(self):
+        self._free = []
+        self._lock = threading.Lock()
+        self.allocations = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        size = int(np.prod(shape))
+        dtype = np.dtype(dtype)
+        with self._lock:
+            for index, storage in enumerate(self._free):
+                if storage.size >= size and storage.dtype == dtype:
+                    del self._free[index]
+                    break
+            else:
+                storage = None
+                self.allocations += 1
+        if storage is None:
+            storage = np.empty(size, dtype=dtype)
+        return storage[:size].reshape(shape)
+
+    def release(self, frame):
+        if frame is None:
+            return
+        storage = frame.base if frame.base is not None else frame
+        with self._lock:
+            self._free.append(storage)
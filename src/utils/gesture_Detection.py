@@ -2,11 +2,28 @@ import cv2
 import mediapipe as mp
 import numpy as np
 import time
-import traceback
+from utils.frame_buffers import FramePool
+from utils.idle import IdleGate
+from utils.landmark_filter import DetectionRateController, LandmarkPredictor
+from utils.landmarks import LandmarkFrame
+from utils.log import get_frame_logger, get_logger
+
+log = get_logger(__name__)
+frame_log = get_frame_logger(__name__)
 
 class GestureDetector:
-    def __init__(self):
-        print("GestureDetector: Initializing MediaPipe Hands...")
+    # Long side of the downscaled crop handed to MediaPipe in ROI mode
+    DEFAULT_DETECTION_SIZE = 320
+    # Long side of the full-frame search image used to (re)acquire hands in ROI mode
+    DEFAULT_SEARCH_SIZE = 640
+    # Smallest ROI side in pixels, so a distant hand still gets some context
+    MIN_ROI_SIZE = 160
+    # convertScaleAbs(alpha=1.2, beta=10) as a lookup table that can be applied in place
+    CONTRAST_LUT = np.clip(np.rint(np.arange(256) * 1.2 + 10), 0, 255).astype(np.uint8)
+
+    def __init__(self, roi_tracking=False, roi_margin=0.35, detection_size=None, search_size=None,
+                 reuse_buffers=False, detect_every=1, adaptive_rate=False, target_fps=60, idle_after=None):
+        log.info("Initializing MediaPipe Hands...")
         self.mp_hands = mp.solutions.hands
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
@@ -18,22 +35,63 @@ class GestureDetector:
                 min_tracking_confidence=0.5    # Reduced from 0.7
             )
 
-            print("GestureDetector: MediaPipe Hands initialized successfully")
-        except Exception as e:
-            print(f"[ERROR] Failed to initialize MediaPipe Hands: {e}")
-            print("[ERROR] Stack trace:")
-            traceback.print_exc()
+            log.info("MediaPipe Hands initialized successfully")
+        except Exception:
+            log.exception("Failed to initialize MediaPipe Hands")
             self.hands = None
         self.last_landmarks = None
         self.last_detection_time = 0
+        # ROI mode crops around the previous frame's hands and only searches the
+        # whole (downscaled) frame when there is no hand to follow
+        self.roi_tracking = roi_tracking
+        self.roi_margin = roi_margin
+        self.detection_size = detection_size or (self.DEFAULT_DETECTION_SIZE if roi_tracking else None)
+        self.search_size = search_size or (self.DEFAULT_SEARCH_SIZE if roi_tracking else None)
+        self.roi = None
+        # Buffer-reusing mode converts into preallocated arrays instead of
+        # allocating new full-size frames on every call
+        self.reuse_buffers = reuse_buffers
+        self.frame_pool = FramePool()
+        # Full detection runs every `detect_every` frames (or at an adapted rate);
+        # the frames in between are extrapolated from the last detections
+        self.rate_controller = DetectionRateController(
+            interval=detect_every, adaptive=adaptive_rate, target_frame_time=1.0 / target_fps
+        )
+        self.predictor = LandmarkPredictor()
+        # Without hands for idle_after seconds, drop to a motion-gated low-resolution scan
+        self.idle_gate = IdleGate(idle_after=idle_after) if idle_after else None
+
+    @property
+    def is_idle(self):
+        return self.idle_gate is not None and self.idle_gate.idle
+
+    def _buffer(self, shape):
+        return self.frame_pool.acquire(shape) if self.reuse_buffers else None
+
+    def _annotation(self, frame, annotate):
+        """Copy of frame to draw on, or None when the caller does not render"""
+        if not annotate:
+            return None
+        if not self.reuse_buffers:
+            return frame.copy()
+        annotated_frame = self.frame_pool.acquire(frame.shape)
+        np.copyto(annotated_frame, frame)
+        return annotated_frame
+
+    def release_frame(self, annotated_frame):
+        """Hand an annotated frame back for reuse once it has been displayed"""
+        if self.reuse_buffers:
+            self.frame_pool.release(annotated_frame)
 
     def reinitialize(self):
-        print("GestureDetector: Reinitializing MediaPipe Hands...")
+        log.info("Reinitializing MediaPipe Hands...")
+        self.roi = None
+        self.predictor.reset()
         if hasattr(self, 'hands') and self.hands is not None:
             try:
                 self.hands.close()
             except Exception as e:
-                print(f"Warning (hands.close): {e}")
+                log.warning("hands.close failed: %s", e)
         try:
             self.hands = self.mp_hands.Hands(
                 static_image_mode=False,
@@ -41,99 +99,209 @@ class GestureDetector:
                 min_detection_confidence=0.7,
                 min_tracking_confidence=0.7
             )
-            print("GestureDetector: MediaPipe Hands reinitialized successfully")
-        except Exception as e:
-            print(f"[ERROR] Failed to reinitialize MediaPipe Hands: {e}")
-            print("[ERROR] Stack trace:")
-            traceback.print_exc()
+            log.info("MediaPipe Hands reinitialized successfully")
+        except Exception:
+            log.exception("Failed to reinitialize MediaPipe Hands")
             self.hands = None
 
-    def detect_landmarks(self, frame):
-        print("[DEBUG] Starting detect_landmarks...")
-        print("[DEBUG] Frame shape:", frame.shape)
-        print("[DEBUG] Frame dtype:", frame.dtype)
-
-        if self.hands is None:
-            print("[ERROR] MediaPipe Hands not initialized")
-            return {"pose": [], "left_hand": [], "right_hand": []}, frame.copy()
+    def reset(self):
+        """Forget the tracked stream (cached hands, ROI, predictions) before the detector serves another one"""
+        self.last_landmarks = None
+        self.last_detection_time = 0
+        self.roi = None
+        self.predictor.reset()
+        self.rate_controller.reset()
+        # MediaPipe solutions restart their tracking graph on reset()
+        if self.hands is not None and hasattr(self.hands, "reset"):
+            self.hands.reset()
 
-        # Preprocess frame to improve detection
-        try:
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            print("[DEBUG] Frame converted to RGB, shape:", frame_rgb.shape)
-        except Exception as e:
-            print(f"[ERROR] Failed to convert frame to RGB: {e}")
-            print("[ERROR] Stack trace:")
-            traceback.print_exc()
-            return {"pose": [], "left_hand": [], "right_hand": []}, frame.copy()
+    def _prepare_input(self, frame, region, max_size):
+        """
+        RGB, contrast-adjusted MediaPipe input for a frame region, downscaled to
+        max_size on its long side. Returns (input, buffers to release).
+        """
+        buffers = []
+        if region is not None:
+            x0, y0, x1, y1 = region
+            frame = frame[y0:y1, x0:x1]
+        if max_size:
+            height, width = frame.shape[:2]
+            scale = max_size / max(height, width)
+            if scale < 1.0:
+                size = (max(int(width * scale), 1), max(int(height * scale), 1))
+                buffers.append(self._buffer((size[1], size[0], 3)))
+                frame = cv2.resize(frame, size, dst=buffers[-1], interpolation=cv2.INTER_AREA)
+        buffers.append(self._buffer(frame.shape))
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=buffers[-1])
+        cv2.LUT(frame_rgb, self.CONTRAST_LUT, dst=frame_rgb)  # Increase contrast
+        return frame_rgb, buffers
 
+    def _process(self, frame, region, max_size):
         try:
-            frame_rgb = cv2.convertScaleAbs(frame_rgb, alpha=1.2, beta=10)  # Increase contrast
-            print("[DEBUG] Frame contrast adjusted")
-        except Exception as e:
-            print(f"[ERROR] Failed to adjust frame contrast: {e}")
-            print("[ERROR] Stack trace:")
-            traceback.print_exc()
-            return {"pose": [], "left_hand": [], "right_hand": []}, frame.copy()
+            frame_rgb, buffers = self._prepare_input(frame, region, max_size)
+            log.debug("Detection input prepared, shape: %s", frame_rgb.shape)
+        except Exception:
+            frame_log.exception("Failed to prepare detection input")
+            return None
 
         try:
             results = self.hands.process(frame_rgb)
-            print("[DEBUG] MediaPipe processing completed")
-        except Exception as e:
-            print(f"[ERROR] MediaPipe processing failed: {e}")
-            print("[ERROR] Stack trace:")
-            traceback.print_exc()
-            return {"pose": [], "left_hand": [], "right_hand": []}, frame.copy()
-
-        annotated_frame = frame.copy()
-        landmarks_dict = {"pose": [], "left_hand": [], "right_hand": []}
+            log.debug("MediaPipe processing completed")
+            return results
+        except Exception:
+            frame_log.exception("MediaPipe processing failed")
+            return None
+        finally:
+            for buffer in buffers:
+                self.frame_pool.release(buffer)
+
+    def _update_roi(self, points, width, height):
+        """Square region around all detected hands plus the margin, clipped to the frame"""
+        xs = points[:, :, 0] * width
+        ys = points[:, :, 1] * height
+        center_x = (xs.min() + xs.max()) / 2
+        center_y = (ys.min() + ys.max()) / 2
+        side = max(xs.max() - xs.min(), ys.max() - ys.min()) * (1 + 2 * self.roi_margin)
+        half = max(side, self.MIN_ROI_SIZE) / 2
+        x0 = int(max(center_x - half, 0))
+        y0 = int(max(center_y - half, 0))
+        x1 = int(min(center_x + half, width))
+        y1 = int(min(center_y + half, height))
+        self.roi = (x0, y0, x1, y1) if x1 - x0 >= 2 and y1 - y0 >= 2 else None
+
+    def draw_landmarks(self, image, landmarks):
+        """Draw full-frame normalized landmarks (e.g. remapped from an ROI) onto image"""
+        height, width = image.shape[:2]
+        for hand_points in landmarks.points:
+            pixels = np.rint(hand_points[:, :2] * (width, height)).astype(np.int32)
+            for start, end in self.mp_hands.HAND_CONNECTIONS:
+                cv2.line(image, tuple(pixels[start]), tuple(pixels[end]), (245, 245, 245), 2)
+            for x, y in pixels:
+                cv2.circle(image, (int(x), int(y)), 4, (48, 48, 255), -1)
+
+    def detect_landmarks(self, frame, annotate=True):
+        """
+        Detect hands in a BGR frame. Returns (LandmarkFrame, annotated frame);
+        the annotated frame is None when annotate is False. In buffer-reusing
+        mode the annotated frame is recycled a few calls later.
+        """
+        log.debug("Starting detect_landmarks, frame shape %s, dtype %s", frame.shape, frame.dtype)
+
+        if self.hands is None:
+            frame_log.error("MediaPipe Hands not initialized")
+            return LandmarkFrame.empty(), self._annotation(frame, annotate)
+
+        if self.idle_gate is not None:
+            action = self.idle_gate.check(frame, time.time())
+            if action == IdleGate.SKIP:
+                return LandmarkFrame.empty(), self._annotation(frame, annotate)
+            if action == IdleGate.SCAN:
+                results = self._process(frame, None, self.idle_gate.scan_size)
+                if results is None or not results.multi_hand_landmarks:
+                    return LandmarkFrame.empty(), self._annotation(frame, annotate)
+                self.idle_gate.wake(time.time(), "hand scan")
+
+        if not self.rate_controller.should_detect():
+            return self._predict_landmarks(frame, annotate)
+
+        start = time.perf_counter()
+        landmarks, annotated_frame = self._detect(frame, annotate)
+        self.rate_controller.record_detection(time.perf_counter() - start)
+        if self.idle_gate is not None:
+            self.idle_gate.observe(landmarks.has_hands, time.time())
+        log.debug("detect_landmarks completed")
+        return landmarks, annotated_frame
+
+    def _predict_landmarks(self, frame, annotate):
+        """Landmarks for a frame the detector skips, extrapolated from recent detections"""
+        annotated_frame = self._annotation(frame, annotate)
+        now = time.time()
+        prediction = self.predictor.predict(now)
+        if prediction is None:
+            if self.last_landmarks is not None and now - self.last_detection_time < 0.5:
+                return self.last_landmarks, annotated_frame
+            return LandmarkFrame.empty(), annotated_frame
+        points, is_left = prediction
+        landmarks = LandmarkFrame(points, is_left, now)
+        if annotated_frame is not None:
+            self.draw_landmarks(annotated_frame, landmarks)
+        if self.roi_tracking:
+            height, width = frame.shape[:2]
+            self._update_roi(landmarks.points, width, height)
+        log.debug("Detection skipped, using predicted landmarks")
+        return landmarks, annotated_frame
+
+    def _detect(self, frame, annotate):
+        height, width = frame.shape[:2]
+        region = self.roi if self.roi_tracking else None
+        results = self._process(frame, region, self.detection_size if region else self.search_size)
+        if results is not None and region is not None and not results.multi_hand_landmarks:
+            # Tracking lost: search the whole frame before giving up on this frame
+            log.debug("Hand left the ROI, falling back to a full-frame search")
+            region = self.roi = None
+            results = self._process(frame, None, self.search_size)
+        if results is None:
+            return LandmarkFrame.empty(), self._annotation(frame, annotate)
+
+        annotated_frame = self._annotation(frame, annotate)
+        landmarks = LandmarkFrame.empty()
         
         if results.multi_hand_landmarks:
+            hand_count = len(results.multi_hand_landmarks)
+            points = np.empty((hand_count, 21, 3), dtype=np.float32)
+            is_left = np.ones(hand_count, dtype=bool)
             for idx, hand_landmarks in enumerate(results.multi_hand_landmarks):
-                handedness = "left_hand"
                 if results.multi_handedness and len(results.multi_handedness) > idx:
-                    handedness = "left_hand" if results.multi_handedness[idx].classification[0].label == "Left" else "right_hand"
-                print(f"[DEBUG] Detected {handedness} with {len(hand_landmarks.landmark)} landmarks")
-                for i, landmark in enumerate(hand_landmarks.landmark):
-                    landmarks_dict[handedness].append({
-                        "x": landmark.x,
-                        "y": landmark.y,
-                        "z": landmark.z
-                    })
-                self.mp_drawing.draw_landmarks(
-                    annotated_frame,
-                    hand_landmarks,
-                    self.mp_hands.HAND_CONNECTIONS,
-                    self.mp_drawing_styles.get_default_hand_landmarks_style(),
-                    self.mp_drawing_styles.get_default_hand_connections_style()
-                )
-            self.last_landmarks = landmarks_dict
-            self.last_detection_time = time.time()
+                    is_left[idx] = results.multi_handedness[idx].classification[0].label == "Left"
+                log.debug("Detected %s hand with %d landmarks", "left" if is_left[idx] else "right", len(hand_landmarks.landmark))
+                points[idx] = [(landmark.x, landmark.y, landmark.z) for landmark in hand_landmarks.landmark]
+                if region is None and annotated_frame is not None:
+                    self.mp_drawing.draw_landmarks(
+                        annotated_frame,
+                        hand_landmarks,
+                        self.mp_hands.HAND_CONNECTIONS,
+                        self.mp_drawing_styles.get_default_hand_landmarks_style(),
+                        self.mp_drawing_styles.get_default_hand_connections_style()
+                    )
+            if region is not None:
+                # Landmarks are normalized to the crop; map them back to the full frame
+                x0, y0, x1, y1 = region
+                crop_width = x1 - x0
+                points[:, :, 0] = (points[:, :, 0] * crop_width + x0) / width
+                points[:, :, 1] = (points[:, :, 1] * (y1 - y0) + y0) / height
+                points[:, :, 2] *= crop_width / width
+            landmarks = LandmarkFrame(points, is_left)
+            if region is not None and annotated_frame is not None:
+                self.draw_landmarks(annotated_frame, landmarks)
+            if self.roi_tracking:
+                self._update_roi(points, width, height)
+            self.predictor.update(landmarks)
+            self.last_landmarks = landmarks
+            self.last_detection_time = landmarks.timestamp
         elif time.time() - self.last_detection_time < 0.5:
-            landmarks_dict = self.last_landmarks
-            print("[DEBUG] Using cached landmarks from last detection")
+            landmarks = self.last_landmarks
+            self.predictor.reset()
+            log.debug("Using cached landmarks from last detection")
         else:
-            print("[DEBUG] No hands detected in frame")
-
-        print("[DEBUG] detect_landmarks completed, returning landmarks_dict")
-        return landmarks_dict, annotated_frame
-
-    def get_landmark_features(self, landmarks_dict):
-        print("[DEBUG] Extracting features from landmarks_dict")
-        features = []
-        for hand in ['left_hand', 'right_hand']:
-            if hand in landmarks_dict and landmarks_dict[hand]:
-                print(f"[DEBUG] Processing {hand} with {len(landmarks_dict[hand])} landmarks")
-                for lm in landmarks_dict[hand]:
-                    features.extend([lm['x'], lm['y']])  # Exclude z-coordinate
-        features_array = np.array(features)
-        print("[DEBUG] Extracted features shape:", features_array.shape)
+            self.predictor.reset()
+            log.debug("No hands detected in frame")
+
+        return landmarks, annotated_frame
+
+    def get_landmark_features(self, landmarks):
+        log.debug("Extracting features from landmarks")
+        if isinstance(landmarks, dict):
+            landmarks = LandmarkFrame.from_dict(landmarks)
+        # Left hands first, then right hands, excluding the z-coordinate
+        order = np.argsort(~landmarks.is_left, kind="stable")
+        features_array = landmarks.points[order, :, :2].reshape(-1)
+        log.debug("Extracted features shape: %s", features_array.shape)
         return features_array
 
     def release(self):
-        print("GestureDetector: Releasing MediaPipe Hands...")
+        log.info("Releasing MediaPipe Hands...")
         if hasattr(self, 'hands') and self.hands is not None:
             try:
                 self.hands.close()
             except Exception as e:
-                print(f"Warning (hands.close): {e}")
\ No newline at end of file
+                log.warning("hands.close failed: %s", e)
\ No newline at end of file
@@ -0,0 +1,111 @@
+import cv2
+import numpy as np
+import time
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+
+class IdleGate:
+    """
+    Idle mode for the hand detector. After `idle_after` seconds without a
+    hand, frames are only compared against the previous one on a tiny
+    grayscale thumbnail; a low-resolution hand scan runs every
+    `scan_interval` seconds. Motion or a hand found by a scan wakes the
+    detector back to full-rate tracking, and the time from that wake-up to
+    the first tracked hand is recorded as the wake-up latency.
+    """
+
+    TRACK = "track"
+    SCAN = "scan"
+    SKIP = "skip"
+
+    def __init__(self, idle_after=10.0, scan_interval=0.25, scan_size=256,
+                 pixel_threshold=25, motion_fraction=0.01, thumbnail_size=(64, 36)):
+        self.idle_after = idle_after
+        self.scan_interval = scan_interval
+        self.scan_size = scan_size
+        self.pixel_threshold = pixel_threshold
+        self.motion_fraction = motion_fraction
+        self.thumbnail_size = thumbnail_size
+        self.idle = False
+        self.wakeups = 0
+        self.false_wakeups = 0
+        # Running wake-up latency stats; a long-lived installation wakes up indefinitely often
+        self.wake_latency_count = 0
+        self.wake_latency_total = 0.0
+        self.last_wake_latency = None
+        self.idle_time = 0.0
+        self._last_hand_time = time.time()
+        self._idle_since = None
+        self._last_scan = 0.0
+        self._wake_time = None
+        self._wake_reason = None
+        self._previous = None
+        self._spare = None
+
+    def _motion(self, frame):
+        """True when the frame differs enough from the previous idle frame"""
+        width, height = self.thumbnail_size
+        previous = self._previous
+        small = cv2.resize(frame, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        current = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._spare)
+        self._previous, self._spare = current, previous
+        if previous is None:
+            return False
+        changed = np.count_nonzero(cv2.absdiff(current, previous) > self.pixel_threshold)
+        return changed > self.motion_fraction * width * height
+
+    def check(self, frame, now):
+        """What the detector should do with this frame: TRACK, SCAN or SKIP"""
+        if not self.idle:
+            return self.TRACK
+        if self._motion(frame):
+            self.wake(now, "motion")
+            return self.TRACK
+        if now - self._last_scan >= self.scan_interval:
+            self._last_scan = now
+            return self.SCAN
+        return self.SKIP
+
+    def wake(self, now, reason):
+        self.idle = False
+        self.wakeups += 1
+        self.idle_time += now - self._idle_since
+        self._wake_time = now
+        self._wake_reason = reason
+        self._last_hand_time = now
+        log.info("Woke up on %s", reason)
+
+    def observe(self, has_hands, now):
+        """Report the outcome of a full-rate detection"""
+        if has_hands:
+            self._last_hand_time = now
+            if self._wake_time is not None:
+                latency = now - self._wake_time
+                self.wake_latency_count += 1
+                self.wake_latency_total += latency
+                self.last_wake_latency = latency
+                log.info("Hand tracked %.1f ms after waking on %s", latency * 1000, self._wake_reason)
+                self._wake_time = None
+        elif now - self._last_hand_time > self.idle_after:
+            if self._wake_time is not None:
+                self.false_wakeups += 1
+                self._wake_time = None
+            self.idle = True
+            self._idle_since = now
+            self._last_scan = now
+            self._previous = None
+            log.info("No hands for %gs, entering idle scan", self.idle_after)
+
+    def stats(self):
+        idle_time = self.idle_time + (time.time() - self._idle_since if self.idle else 0.0)
+        return {
+            "idle": self.idle,
+            "idle_time_s": idle_time,
+            "wakeups": self.wakeups,
+            "false_wakeups": self.false_wakeups,
+            "last_wake_latency_ms": self.last_wake_latency * 1000 if self.wake_latency_count else None,
+            "mean_wake_latency_ms": (self.wake_latency_total / self.wake_latency_count * 1000
+                                     if self.wake_latency_count else None),
+        }
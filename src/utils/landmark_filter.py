@@ -0,0 +1,115 @@
+import math
+import numpy as np
+
+
+def _smoothing_factor(cutoff, dt):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class LandmarkPredictor:
+    """
+    Constant-velocity extrapolation of hand landmarks between detector runs.
+    The velocity is the One Euro filter's derivative estimate: a low-passed
+    finite difference of consecutive detections, so jitter in single
+    detections does not throw the prediction off.
+    """
+
+    def __init__(self, d_cutoff=1.0, max_horizon=0.1):
+        self.d_cutoff = d_cutoff
+        self.max_horizon = max_horizon
+        self.reset()
+
+    def reset(self):
+        self._points = None
+        self._is_left = None
+        self._velocity = None
+        self._timestamp = None
+
+    @property
+    def has_state(self):
+        return self._points is not None
+
+    def update(self, landmarks):
+        """Feed a detected LandmarkFrame"""
+        if not landmarks.has_hands:
+            self.reset()
+            return
+        points = landmarks.points
+        same_hands = (
+            self._points is not None
+            and self._points.shape == points.shape
+            and np.array_equal(self._is_left, landmarks.is_left)
+        )
+        dt = landmarks.timestamp - self._timestamp if same_hands else 0.0
+        if dt > 0:
+            velocity = (points - self._points) / dt
+            alpha = _smoothing_factor(self.d_cutoff, dt)
+            self._velocity += alpha * (velocity - self._velocity)
+        elif not same_hands:
+            self._velocity = np.zeros_like(points)
+        self._points = points.copy()
+        self._is_left = landmarks.is_left.copy()
+        self._timestamp = landmarks.timestamp
+
+    def predict(self, timestamp):
+        """(points, is_left) extrapolated to timestamp, or None without a tracked hand"""
+        if self._points is None:
+            return None
+        dt = min(max(timestamp - self._timestamp, 0.0), self.max_horizon)
+        return self._points + self._velocity * dt, self._is_left.copy()
+
+
+class DetectionRateController:
+    """
+    Decides on which frames the full detector runs. With a fixed interval it
+    runs every `interval` frames; in adaptive mode the interval is raised
+    while the detector's cost spread over the interval exceeds the target
+    frame time, and lowered again once one fewer skipped frame would fit.
+    """
+
+    def __init__(self, interval=1, adaptive=False, target_frame_time=1 / 60, max_interval=3, smoothing=0.2):
+        self.interval = max(int(interval), 1)
+        self.adaptive = adaptive
+        self.target_frame_time = target_frame_time
+        self.max_interval = max(max_interval, self.interval)
+        self.smoothing = smoothing
+        self.detect_cost = None
+        self.detected = 0
+        self.predicted = 0
+        self._frames_since_detection = None
+
+    def reset(self):
+        """Detect on the next frame; the learned detection cost and interval are kept"""
+        self._frames_since_detection = None
+
+    def should_detect(self):
+        """Advance one frame; True when this frame should run full detection"""
+        if self._frames_since_detection is None or self._frames_since_detection + 1 >= self.interval:
+            self._frames_since_detection = 0
+            self.detected += 1
+            return True
+        self._frames_since_detection += 1
+        self.predicted += 1
+        return False
+
+    def record_detection(self, duration):
+        """Report how long a full detection took"""
+        if self.detect_cost is None:
+            self.detect_cost = duration
+        else:
+            self.detect_cost += self.smoothing * (duration - self.detect_cost)
+        if not self.adaptive:
+            return
+        if self.detect_cost / self.interval > self.target_frame_time and self.interval < self.max_interval:
+            self.interval += 1
+        elif self.interval > 1 and self.detect_cost / (self.interval - 1) < 0.8 * self.target_frame_time:
+            self.interval -= 1
+
+    def stats(self):
+        return {
+            "interval": self.interval,
+            "detect_cost_ms": (self.detect_cost or 0.0) * 1000,
+            "detected": self.detected,
+            "predicted": self.predicted,
+        }
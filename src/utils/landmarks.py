@@ -0,0 +1,89 @@
+import itertools
+import time
+import numpy as np
+
+NUM_HAND_LANDMARKS = 21
+HAND_KEYS = ("left_hand", "right_hand")
+
+_frame_ids = itertools.count(1)
+
+
+class LandmarkFrame:
+    """
+    Hand landmarks for one video frame, stored as a float32 (hands, 21, 3)
+    array of normalized x, y, z coordinates plus a per-hand handedness flag
+    """
+
+    __slots__ = ("points", "is_left", "timestamp", "frame_id")
+
+    def __init__(self, points=None, is_left=None, timestamp=None):
+        if points is None:
+            points = np.empty((0, NUM_HAND_LANDMARKS, 3), dtype=np.float32)
+        self.points = np.asarray(points, dtype=np.float32).reshape(-1, NUM_HAND_LANDMARKS, 3)
+        if is_left is None:
+            is_left = np.zeros(len(self.points), dtype=bool)
+        self.is_left = np.asarray(is_left, dtype=bool).reshape(-1)
+        if len(self.is_left) != len(self.points):
+            raise ValueError(f"Got {len(self.points)} hands but {len(self.is_left)} handedness flags")
+        self.timestamp = time.time() if timestamp is None else timestamp
+        # Unique per constructed frame, so a replayed frame keeps its identity
+        self.frame_id = next(_frame_ids)
+
+    @classmethod
+    def empty(cls, timestamp=None):
+        return cls(timestamp=timestamp)
+
+    def __len__(self):
+        return len(self.points)
+
+    def __repr__(self):
+        hands = ", ".join("left" if left else "right" for left in self.is_left)
+        return f"LandmarkFrame(id={self.frame_id}, hands=[{hands}], timestamp={self.timestamp:.3f})"
+
+    @property
+    def has_hands(self):
+        return len(self.points) > 0
+
+    def hand(self, hand_key):
+        """Return the (21, 3) points of the first hand matching 'left_hand' or 'right_hand', or None"""
+        want_left = hand_key == "left_hand"
+        for idx, is_left in enumerate(self.is_left):
+            if is_left == want_left:
+                return self.points[idx]
+        return None
+
+    def select_hand(self):
+        """Pick the hand used for classification: left hand first, then right. Returns (hand_key, points)"""
+        for hand_key in HAND_KEYS:
+            points = self.hand(hand_key)
+            if points is not None:
+                return hand_key, points
+        return None, None
+
+    def to_dict(self):
+        """Legacy {"pose", "left_hand", "right_hand"} dict-of-lists form, for serialization"""
+        landmarks_dict = {"pose": [], "left_hand": [], "right_hand": []}
+        for points, is_left in zip(self.points, self.is_left):
+            hand_key = "left_hand" if is_left else "right_hand"
+            landmarks_dict[hand_key].extend(
+                {"x": float(x), "y": float(y), "z": float(z)} for x, y, z in points
+            )
+        return landmarks_dict
+
+    @classmethod
+    def from_dict(cls, landmarks, timestamp=None):
+        """Build a frame from the legacy dict form; hands without exactly 21 landmarks are dropped"""
+        points = []
+        is_left = []
+        for hand_key in HAND_KEYS:
+            hand_landmarks = landmarks.get(hand_key) if landmarks else None
+            if not hand_landmarks or len(hand_landmarks) != NUM_HAND_LANDMARKS:
+                continue
+            if isinstance(hand_landmarks[0], dict):
+                points.append([(lm["x"], lm["y"], lm.get("z", 0.0)) for lm in hand_landmarks])
+            else:
+                points.append([(lm.x, lm.y, getattr(lm, "z", 0.0)) for lm in hand_landmarks])
+            is_left.append(hand_key == "left_hand")
+        if not points:
+            return cls.empty(timestamp)
+        return cls(np.array(points, dtype=np.float32), is_left, timestamp)
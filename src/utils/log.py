@@ -0,0 +1,122 @@
+"""
+Project-wide logging on top of the standard logging module.
+
+Modules take a logger with get_logger(__name__) and pass format arguments
+instead of pre-formatted strings, so a disabled debug message costs one
+level check:
+
+    log = get_logger(__name__)
+    log.debug("Frame shape: %s", frame.shape)
+
+Messages emitted on every frame go through get_frame_logger(), whose
+repeats of the same message are rate limited. Levels are set per module
+with configure(), e.g. from a --log-level "info,gesture_Detection=debug"
+switch.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+ROOT = "aeromix"
+DEFAULT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+def _logger_name(name):
+    # Scripts run from src/ import modules as "utils.x" or "ml.x"; keep the last part
+    if name == "__main__":
+        name = os.path.splitext(os.path.basename(sys.argv[0]))[0] or "main"
+    short = name.rsplit(".", 1)[-1]
+    return f"{ROOT}.{short}"
+
+
+def get_logger(name):
+    """Logger for a module, named aeromix.<module>"""
+    return logging.getLogger(_logger_name(name))
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Drops repeats of the same message (same format string and level) within
+    `interval` seconds; the next one that passes reports how many were dropped
+    """
+
+    def __init__(self, interval=1.0):
+        super().__init__()
+        self.interval = interval
+        self._last = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.msg, record.levelno)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last.get(key, float("-inf")) < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._last[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar suppressed)"
+        return True
+
+
+def get_frame_logger(name, interval=1.0):
+    """
+    Rate-limited child logger (aeromix.<module>.frame) for per-frame messages.
+    It inherits the module's level unless one is set for it explicitly.
+    """
+    logger = logging.getLogger(_logger_name(name) + ".frame")
+    if not any(isinstance(f, RateLimitFilter) for f in logger.filters):
+        logger.addFilter(RateLimitFilter(interval))
+    return logger
+
+
+def parse_levels(spec):
+    """
+    Parse "info" or "warning,gesture_Detection=debug,osc_handler=error" into
+    (default level, {module: level})
+    """
+    default = None
+    module_levels = {}
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "=" in part:
+            module, level = part.split("=", 1)
+            module_levels[module.strip()] = level.strip().upper()
+        else:
+            default = part.upper()
+    return default, module_levels
+
+
+def configure(level="INFO", quiet=False, stream=None, fmt=DEFAULT_FORMAT):
+    """
+    Set up the aeromix log handler. `level` is a level name or a
+    parse_levels() spec; `quiet` raises the default level to WARNING.
+    """
+    default, module_levels = parse_levels(level)
+    default = "WARNING" if quiet else (default or "INFO")
+
+    root = logging.getLogger(ROOT)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(logging.Formatter(fmt))
+    root.addHandler(handler)
+    root.setLevel(default)
+    root.propagate = False
+    for module, module_level in module_levels.items():
+        logging.getLogger(f"{ROOT}.{module}").setLevel(module_level)
+    return root
+
+
+def add_arguments(parser, default_level="info"):
+    """Add the shared --log-level and --quiet switches to an argparse parser"""
+    parser.add_argument('--log-level', type=str, default=default_level,
+                        help='Log level, optionally per module, e.g. "info,gesture_Detection=debug"')
+    parser.add_argument('--quiet', action='store_true',
+                        help='Only log warnings and errors')
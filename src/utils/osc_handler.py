@@ -3,39 +3,49 @@ from pythonosc import dispatcher, osc_server
 from pythonosc import udp_client
 import json
 import threading
+from utils.log import get_logger
+from utils.tracing import tracer
+
+log = get_logger(__name__)
 
 class OSCHandler:
     def __init__(self, receive_ip="127.0.0.1", receive_port=5015,
                  send_ip="127.0.0.1", send_port=5016):
-        print(f"OSCHandler: Initializing with receive_port={receive_port}, send_port={send_port}")
+        log.info("Initializing with receive_port=%s, send_port=%s", receive_port, send_port)
         self.client = udp_client.SimpleUDPClient(send_ip, send_port)
         self.dispatcher = dispatcher.Dispatcher()
-        self.server = osc_server.ThreadingOSCUDPServer(
-            (receive_ip, receive_port), self.dispatcher)
+        # Without a receive port the handler only sends, so it binds nothing
+        self.server = None
+        if receive_port is not None:
+            self.server = osc_server.ThreadingOSCUDPServer(
+                (receive_ip, receive_port), self.dispatcher)
         self.server_thread = None
 
     def add_handler(self, address, handler):
         self.dispatcher.map(address, handler)
-        print(f"handler succesfully added for address: {address}")
+        log.info("handler succesfully added for address: %s", address)
 
     def send_message(self, address, data):
-        print(f"Sending message to address: {address}")
-        print(f"Data: {data}")
-        if isinstance(data, (int, float)):
-            self.client.send_message(address, [data])
-        else:
-            self.client.send_message(address, data)
+        log.debug("Sending message to address: %s, data: %s", address, data)
+        with tracer.span("osc_send"):
+            if isinstance(data, (int, float)):
+                self.client.send_message(address, [data])
+            else:
+                self.client.send_message(address, data)
 
     def start_server(self):
-        print("Starting OSC server...")
+        if self.server is None:
+            log.info("No receive port, OSC server not started")
+            return None
+        log.info("Starting OSC server...")
         self.server_thread = threading.Thread(target=self.server.serve_forever)
         self.server_thread.daemon = True
         self.server_thread.start()
-        print(f"server succesfully started on {self.server.server_address}")
+        log.info("server succesfully started on %s", self.server.server_address)
         return self.server_thread
 
     def stop_server(self):
-        print("Stopping OSC server...")
+        log.info("Stopping OSC server...")
         if self.server:
             self.server.shutdown()
-            print("Server stopped.")
+            log.info("Server stopped.")
@@ -0,0 +1,214 @@
+"""
+Recorded landmark sessions for camera-free replay.
+
+A session is a directory:
+    meta.json       format version, frame count, frame shape, recording start
+    landmarks.bin   fixed-size little-endian records (RECORD_DTYPE), one per frame
+    frames.bin      optional raw BGR uint8 frames, all of the shape in meta.json
+
+Both .bin files are plain arrays, so SessionReader opens them with
+np.memmap and replay never loads a whole session into memory. The frame
+count is taken from the file sizes, so a session cut short by a crash
+still replays up to its last complete record.
+"""
+import json
+import os
+import time
+import numpy as np
+from utils.landmarks import LandmarkFrame, NUM_HAND_LANDMARKS
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+SESSION_VERSION = 1
+MAX_HANDS = 2
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("hand_count", "u1"),
+    ("is_left", "u1", (MAX_HANDS,)),
+    ("points", "<f4", (MAX_HANDS, NUM_HAND_LANDMARKS, 3)),
+])
+META_FILENAME = "meta.json"
+LANDMARKS_FILENAME = "landmarks.bin"
+FRAMES_FILENAME = "frames.bin"
+
+
+class SessionRecorder:
+    """Append detector output (and optionally the frames it ran on) to a session directory"""
+
+    def __init__(self, path, record_frames=False):
+        self.path = path
+        self.record_frames = record_frames
+        os.makedirs(path, exist_ok=True)
+        self.frame_count = 0
+        self.frame_shape = None
+        self.started_at = time.time()
+        self._record = np.zeros(1, dtype=RECORD_DTYPE)
+        self._landmarks_file = open(os.path.join(path, LANDMARKS_FILENAME), "wb")
+        self._frames_file = open(os.path.join(path, FRAMES_FILENAME), "wb") if record_frames else None
+        self._write_meta()
+
+    def write(self, landmarks, frame=None):
+        """Record one frame's LandmarkFrame; hands beyond MAX_HANDS are dropped"""
+        record = self._record[0]
+        hand_count = min(len(landmarks), MAX_HANDS)
+        record["timestamp"] = landmarks.timestamp
+        record["hand_count"] = hand_count
+        record["is_left"][:] = 0
+        record["is_left"][:hand_count] = landmarks.is_left[:hand_count]
+        record["points"][:] = 0.0
+        record["points"][:hand_count] = landmarks.points[:hand_count]
+        self._landmarks_file.write(self._record.tobytes())
+
+        if self._frames_file is not None:
+            if frame is None:
+                raise ValueError("This session records frames, but no frame was given")
+            if self.frame_shape is None:
+                self.frame_shape = tuple(frame.shape)
+                self._write_meta()
+            elif tuple(frame.shape) != self.frame_shape:
+                raise ValueError(f"Frame shape {frame.shape} differs from the session's {self.frame_shape}")
+            self._frames_file.write(np.ascontiguousarray(frame, dtype=np.uint8).data)
+        self.frame_count += 1
+
+    def _write_meta(self):
+        meta = {
+            "version": SESSION_VERSION,
+            "frame_count": self.frame_count,
+            "frame_shape": list(self.frame_shape) if self.frame_shape else None,
+            "has_frames": self.record_frames,
+            "started_at": self.started_at,
+        }
+        tmp_path = os.path.join(self.path, META_FILENAME + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.path, META_FILENAME))
+
+    def close(self):
+        self._landmarks_file.close()
+        if self._frames_file is not None:
+            self._frames_file.close()
+        self._write_meta()
+        log.info("Recorded %d frames to %s", self.frame_count, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
+
+
+class SessionReader:
+    """Memory-mapped read access to a recorded session"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILENAME)) as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != SESSION_VERSION:
+            raise ValueError(f"{path} has unsupported session version {self.meta.get('version')}")
+
+        landmarks_path = os.path.join(path, LANDMARKS_FILENAME)
+        count = os.path.getsize(landmarks_path) // RECORD_DTYPE.itemsize
+        self.records = (np.memmap(landmarks_path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+                        if count else np.zeros(0, dtype=RECORD_DTYPE))
+
+        self.frames = None
+        frame_shape = self.meta.get("frame_shape")
+        frames_path = os.path.join(path, FRAMES_FILENAME)
+        if self.meta.get("has_frames") and frame_shape and os.path.exists(frames_path):
+            frame_size = int(np.prod(frame_shape))
+            frame_count = min(os.path.getsize(frames_path) // frame_size, count)
+            if frame_count:
+                self.frames = np.memmap(frames_path, dtype=np.uint8, mode="r",
+                                        shape=(frame_count, *frame_shape))
+                # Keep landmarks and frames in step if the frame file is shorter
+                self.records = self.records[:frame_count]
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def has_frames(self):
+        return self.frames is not None
+
+    @property
+    def duration(self):
+        if len(self.records) < 2:
+            return 0.0
+        return float(self.records["timestamp"][-1] - self.records["timestamp"][0])
+
+    def landmarks(self, index):
+        """LandmarkFrame of a recorded frame, with its recorded timestamp"""
+        record = self.records[index]
+        hand_count = int(record["hand_count"])
+        return LandmarkFrame(
+            np.array(record["points"][:hand_count]),
+            record["is_left"][:hand_count].astype(bool),
+            float(record["timestamp"]),
+        )
+
+    def frame(self, index):
+        """Recorded BGR frame (a read-only memory-mapped view), or None without frames"""
+        return self.frames[index] if self.frames is not None else None
+
+    def replay(self, speed=1.0):
+        """
+        Yield (index, LandmarkFrame, frame) in order. speed 1.0 paces the
+        replay at the recorded rate, 2.0 at twice that; 0 or None replays as
+        fast as the consumer takes them.
+        """
+        if not len(self.records):
+            return
+        first = float(self.records["timestamp"][0])
+        started = time.perf_counter()
+        for index in range(len(self.records)):
+            if speed:
+                due = (float(self.records["timestamp"][index]) - first) / speed
+                delay = due - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            yield index, self.landmarks(index), self.frame(index)
+
+
+class ReplayCamera:
+    """
+    Stand-in for cv2.VideoCapture that plays back a session's recorded frames,
+    so training and recognition loops run without a webcam
+    """
+
+    def __init__(self, reader, speed=1.0, loop=False):
+        if not reader.has_frames:
+            raise ValueError(f"Session {reader.path} was recorded without frames")
+        self.reader = reader
+        self.speed = speed
+        self.loop = loop
+        self._replay = None
+        self._opened = True
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self, image=None):
+        if not self._opened:
+            return False, None
+        if self._replay is None:
+            self._replay = self.reader.replay(self.speed)
+        try:
+            _, _, frame = next(self._replay)
+        except StopIteration:
+            if not self.loop or not len(self.reader):
+                return False, None
+            self._replay = None
+            return self.read(image)
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, np.array(frame)
+
+    def set(self, prop_id, value):
+        return False
+
+    def release(self):
+        self._opened = False
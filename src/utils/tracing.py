@@ -0,0 +1,244 @@
+"""
+Lightweight per-stage latency tracing.
+
+Durations are recorded into log-linear histograms (in the spirit of
+HdrHistogram), so recording is O(1), memory is fixed and p50/p95/p99 stay
+accurate to a few percent at any magnitude. Each stage keeps a rolling
+window: percentiles cover the current and previous window, so old spikes
+age out instead of dominating the numbers forever.
+
+    from utils.tracing import tracer
+
+    with tracer.span("detect"):
+        ...
+    tracer.begin_frame(captured_at)   # perf_counter() when the frame was captured
+    ...
+    tracer.end_frame("end_to_end")    # records now - captured_at
+
+The frame start is thread-local, so the pipeline's detection thread and
+the API's request threads each trace their own frame.
+"""
+import json
+import threading
+import time
+
+# Recorded unit is microseconds; values below SUB_BUCKETS are exact
+SUB_BUCKET_BITS = 6
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_SUB_BUCKETS = SUB_BUCKETS // 2
+# 2^32 us is a little over an hour; longer durations are clamped
+MAX_SHIFT = 32 - SUB_BUCKET_BITS
+BUCKET_COUNT = SUB_BUCKETS + MAX_SHIFT * HALF_SUB_BUCKETS
+MAX_MICROS = (1 << 32) - 1
+PERCENTILES = (50, 95, 99)
+
+
+def _bucket_index(micros):
+    if micros < SUB_BUCKETS:
+        return micros
+    shift = micros.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKETS + (shift - 1) * HALF_SUB_BUCKETS + (micros >> shift) - HALF_SUB_BUCKETS
+
+
+def _bucket_value(index):
+    """Midpoint of a bucket in microseconds"""
+    if index < SUB_BUCKETS:
+        return float(index)
+    offset = index - SUB_BUCKETS
+    shift = offset // HALF_SUB_BUCKETS + 1
+    low = (offset % HALF_SUB_BUCKETS + HALF_SUB_BUCKETS) << shift
+    return low + (1 << shift) / 2
+
+
+class LatencyHistogram:
+    """Fixed-size log-linear histogram of durations"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds):
+        micros = min(max(int(seconds * 1e6), 0), MAX_MICROS)
+        self.counts[_bucket_index(micros)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, percent):
+        """Duration in seconds at or below which `percent` of the values fall"""
+        if not self.count:
+            return None
+        target = max(percent / 100 * self.count, 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(_bucket_value(index) / 1e6, self.max)
+        return self.max
+
+    def snapshot(self):
+        """Count, mean, min, max and percentiles in milliseconds"""
+        if not self.count:
+            return {"count": 0}
+        snapshot = {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000,
+            "min_ms": self.min * 1000,
+            "max_ms": self.max * 1000,
+        }
+        for percent in PERCENTILES:
+            snapshot[f"p{percent}_ms"] = self.percentile(percent) * 1000
+        return snapshot
+
+
+class RollingHistogram:
+    """
+    Histogram over roughly the last one to two `window` seconds: values go
+    into the current window, which replaces the previous one when it expires
+    """
+
+    def __init__(self, window=60.0):
+        self.window = window
+        self._current = LatencyHistogram()
+        self._previous = LatencyHistogram()
+        self._rotated_at = time.monotonic()
+        self.lifetime_count = 0
+        self._lock = threading.Lock()
+
+    def _rotate(self, now):
+        if now - self._rotated_at >= self.window:
+            self._previous, self._current = self._current, self._previous
+            self._current.reset()
+            if now - self._rotated_at >= 2 * self.window:
+                self._previous.reset()
+            self._rotated_at = now
+
+    def record(self, seconds):
+        with self._lock:
+            self._rotate(time.monotonic())
+            self._current.record(seconds)
+            self.lifetime_count += 1
+
+    def snapshot(self):
+        with self._lock:
+            self._rotate(time.monotonic())
+            merged = LatencyHistogram()
+            merged.merge(self._previous)
+            merged.merge(self._current)
+            lifetime_count = self.lifetime_count
+        snapshot = merged.snapshot()
+        snapshot["lifetime_count"] = lifetime_count
+        return snapshot
+
+
+class _Span:
+    __slots__ = ("tracer", "stage", "start")
+
+    def __init__(self, tracer, stage):
+        self.tracer = tracer
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.tracer.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Named stage histograms plus a thread-local frame start for end-to-end latency"""
+
+    def __init__(self, window=60.0, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _histogram(self, stage):
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._stages.setdefault(stage, RollingHistogram(self.window))
+        return histogram
+
+    def record(self, stage, seconds):
+        if self.enabled:
+            self._histogram(stage).record(seconds)
+
+    def span(self, stage):
+        """Context manager that records the duration of its block under stage"""
+        return _Span(self, stage) if self.enabled else _NULL_SPAN
+
+    def begin_frame(self, started_at=None):
+        """Mark the perf_counter() time the current thread's frame started (e.g. was captured)"""
+        self._local.frame_start = time.perf_counter() if started_at is None else started_at
+
+    def end_frame(self, stage="end_to_end"):
+        """Record the time since begin_frame() under stage, if a frame is open on this thread"""
+        started_at = getattr(self._local, "frame_start", None)
+        if started_at is not None:
+            self.record(stage, time.perf_counter() - started_at)
+
+    def snapshot(self):
+        with self._lock:
+            stages = list(self._stages.items())
+        return {stage: histogram.snapshot() for stage, histogram in sorted(stages)}
+
+    def to_json(self):
+        return json.dumps(self.snapshot())
+
+    def report(self):
+        """Human-readable table of the current percentiles"""
+        lines = [f"{'stage':<28}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for stage, snapshot in self.snapshot().items():
+            if not snapshot["count"]:
+                continue
+            lines.append(
+                f"{stage:<28}{snapshot['count']:>8}{snapshot['p50_ms']:>10.2f}"
+                f"{snapshot['p95_ms']:>10.2f}{snapshot['p99_ms']:>10.2f}{snapshot['max_ms']:>10.2f}"
+            )
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+
+
+# Process-wide tracer shared by the app, the detector and the API
+tracer = Tracer()
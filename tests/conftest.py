@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The code runs from src/ with absolute imports (utils.x, ml.x)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,25 @@
+from api_common import COOLDOWN_SECONDS, SESSION_VOTE_THRESHOLD, ClientSession
+
+
+def test_gesture_fires_only_after_winning_the_vote():
+    session = ClientSession()
+    fired = [session.try_fire("volume_up", 0.0) for _ in range(SESSION_VOTE_THRESHOLD)]
+    assert fired == [False] * (SESSION_VOTE_THRESHOLD - 1) + [True]
+    assert session.state()["dominant_gesture"] == "volume_up"
+    assert session.state()["last_gesture"] == "volume_up"
+
+
+def test_stray_recognition_does_not_fire():
+    session = ClientSession()
+    for _ in range(SESSION_VOTE_THRESHOLD):
+        session.try_fire("volume_up", 0.0)
+    assert not session.try_fire("bass_up", COOLDOWN_SECONDS * 2)
+    assert session.state()["last_gesture"] == "volume_up"
+
+
+def test_cooldown_holds_back_a_confirmed_gesture():
+    session = ClientSession()
+    for _ in range(SESSION_VOTE_THRESHOLD):
+        session.try_fire("volume_up", 0.0)
+    assert not session.try_fire("volume_up", COOLDOWN_SECONDS / 2)
+    assert session.try_fire("volume_up", COOLDOWN_SECONDS * 2)
@@ -0,0 +1,66 @@
+import threading
+import time
+import pytest
+from utils.detector_pool import DetectorPool, PoolExhausted
+
+
+class Detector:
+    def __init__(self):
+        self.resets = 0
+        self.released = False
+
+    def reset(self):
+        self.resets += 1
+
+    def release(self):
+        self.released = True
+
+
+def test_session_gets_its_own_detector_back():
+    pool = DetectorPool(Detector, size=2)
+    with pool.checkout("a") as first:
+        pass
+    with pool.checkout("b") as other:
+        assert other is not first
+    with pool.checkout("a") as again:
+        assert again is first
+    assert first.resets == 0
+    assert pool.stats()["affinity_hits"] == 1
+
+
+def test_detector_is_reset_for_another_session():
+    pool = DetectorPool(Detector, size=1)
+    with pool.checkout("a") as detector:
+        pass
+    with pool.checkout("b") as same:
+        assert same is detector
+    assert detector.resets == 1
+    assert pool.stats()["resets"] == 1
+
+
+def test_checkout_times_out_when_exhausted():
+    pool = DetectorPool(Detector, size=1)
+    detector = pool.acquire("a")
+    started = time.monotonic()
+    with pytest.raises(PoolExhausted):
+        pool.acquire("b", timeout=0.1)
+    assert time.monotonic() - started >= 0.1
+    pool.release(detector, "a")
+    assert pool.acquire("b", timeout=0.1) is detector
+
+
+def test_waiter_gets_released_detector():
+    pool = DetectorPool(Detector, size=1)
+    detector = pool.acquire("a")
+    threading.Timer(0.05, pool.release, (detector, "a")).start()
+    assert pool.acquire("b", timeout=2.0) is detector
+    assert pool.stats()["waits"] == 1
+
+
+def test_close_releases_idle_detectors():
+    pool = DetectorPool(Detector, size=2)
+    pool.prewarm(2)
+    detectors = list(pool._idle)
+    pool.close()
+    assert all(detector.released for detector in detectors)
+    assert pool.stats()["created"] == 0
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from ml.classifier import GestureClassifier
+from ml.features import FeatureCache, extract_features
+from utils.landmarks import LandmarkFrame
+
+CLASSIFIERS = 8
+
+
+def hand():
+    return np.random.default_rng(0).random((21, 3)).astype(np.float32)
+
+
+@pytest.fixture
+def classifiers():
+    cache = FeatureCache()
+    return cache, [GestureClassifier(feature_cache=cache) for _ in range(CLASSIFIERS)]
+
+
+def test_classifiers_share_one_extraction_per_frame(classifiers):
+    cache, models = classifiers
+    landmarks = LandmarkFrame(hand()[np.newaxis], [False])
+    results = [model.preprocess_landmarks(landmarks) for model in models]
+    assert (cache.misses, cache.hits) == (1, CLASSIFIERS - 1)
+    np.testing.assert_array_equal(results[0], extract_features(hand()))
+
+
+def test_legacy_dict_frame_is_converted_once(classifiers):
+    cache, models = classifiers
+    landmarks = {"right_hand": [{"x": float(x), "y": float(y), "z": float(z)} for x, y, z in hand()]}
+    for model in models:
+        model.preprocess_landmarks(landmarks)
+    assert (cache.misses, cache.hits) == (1, CLASSIFIERS - 1)
+
+
+def test_new_frame_misses(classifiers):
+    cache, models = classifiers
+    for _ in range(2):
+        landmarks = LandmarkFrame(hand()[np.newaxis], [False])
+        for model in models:
+            model.preprocess_landmarks(landmarks)
+    assert (cache.misses, cache.hits) == (2, 2 * (CLASSIFIERS - 1))
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from ml.classifier import GestureClassifier
+from ml.features import FEATURE_COUNT, extract_features
+from utils.landmarks import LandmarkFrame
+
+
+def reference_features(landmarks):
+    """The original dict-based GestureClassifier.preprocess_landmarks, kept to pin the feature layout"""
+    if landmarks.get("left_hand") and len(landmarks["left_hand"]) == 21:
+        hand = landmarks["left_hand"]
+    elif landmarks.get("right_hand") and len(landmarks["right_hand"]) == 21:
+        hand = landmarks["right_hand"]
+    else:
+        return np.array([])
+    wrist_x, wrist_y = hand[0]["x"], hand[0]["y"]
+    x_values = [lm["x"] for lm in hand]
+    y_values = [lm["y"] for lm in hand]
+    x_range = max(0.001, max(x_values) - min(x_values))
+    y_range = max(0.001, max(y_values) - min(y_values))
+    features = []
+    for lm in hand:
+        features.extend([(lm["x"] - wrist_x) / x_range, (lm["y"] - wrist_y) / y_range])
+    thumb_tip, index_tip, middle_tip = hand[4], hand[8], hand[12]
+    features.extend([
+        np.sqrt((thumb_tip["x"] - index_tip["x"]) ** 2 + (thumb_tip["y"] - index_tip["y"]) ** 2) / x_range,
+        np.sqrt((index_tip["x"] - middle_tip["x"]) ** 2 + (index_tip["y"] - middle_tip["y"]) ** 2) / x_range,
+    ])
+    for tip_idx in [4, 8, 12, 16, 20]:
+        tip = hand[tip_idx]
+        features.append(np.sqrt((tip["x"] - wrist_x) ** 2 + (tip["y"] - wrist_y) ** 2) / x_range)
+    return np.array(features).reshape(1, -1)
+
+
+def hand_dicts(points):
+    return [{"x": float(x), "y": float(y), "z": float(z)} for x, y, z in points]
+
+
+def sample_hands():
+    rng = np.random.default_rng(0)
+    hands = [rng.random((21, 3)).astype(np.float32) for _ in range(20)]
+    # A small hand far from the origin, and one with no horizontal extent (clamped range)
+    hands.append((0.8 + rng.random((21, 3)) * 0.05).astype(np.float32))
+    flat = rng.random((21, 3)).astype(np.float32)
+    flat[:, 0] = 0.5
+    hands.append(flat)
+    return hands
+
+
+@pytest.mark.parametrize("index", range(len(sample_hands())))
+def test_extract_features_matches_reference(index):
+    points = sample_hands()[index]
+    expected = reference_features({"right_hand": hand_dicts(points)})
+    features = extract_features(points)
+    assert features.shape == (1, FEATURE_COUNT)
+    np.testing.assert_allclose(features, expected, rtol=1e-4, atol=1e-4)
+
+
+def test_batch_matches_single_hands():
+    hands = np.stack(sample_hands())
+    np.testing.assert_array_equal(extract_features(hands), np.concatenate([extract_features(hand) for hand in hands]))
+
+
+def test_preprocess_prefers_left_hand_like_reference():
+    left, right = sample_hands()[:2]
+    landmarks = {"pose": [], "left_hand": hand_dicts(left), "right_hand": hand_dicts(right)}
+    features = GestureClassifier().preprocess_landmarks(LandmarkFrame.from_dict(landmarks))
+    np.testing.assert_allclose(features, reference_features(landmarks), rtol=1e-4, atol=1e-4)
+
+
+def test_no_hand_gives_no_features():
+    assert GestureClassifier().preprocess_landmarks(LandmarkFrame.empty()).size == 0
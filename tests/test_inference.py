@@ -0,0 +1,47 @@
+import glob
+import os
+import pickle
+import numpy as np
+import pytest
+from ml.inference import CompiledMLP
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model", "trained")
+MODEL_PATHS = sorted(glob.glob(os.path.join(MODEL_DIR, "*_model.pkl")))
+# CompiledMLP runs in float32, scikit-learn in float64
+TOLERANCE = 1e-5
+
+
+def load(model_path):
+    with open(model_path, "rb") as f:
+        model_data = pickle.load(f)
+    return model_data["model"], model_data["scaler"]
+
+
+def sample_rows(scaler, count=256):
+    """Feature rows spread around the distribution the scaler was fitted on"""
+    rng = np.random.default_rng(0)
+    return scaler.mean_ + rng.standard_normal((count, len(scaler.mean_))) * scaler.scale_ * 2
+
+
+@pytest.mark.parametrize("model_path", MODEL_PATHS, ids=os.path.basename)
+def test_predict_proba_matches_sklearn(model_path):
+    model, scaler = load(model_path)
+    engine = CompiledMLP.from_sklearn(model, scaler)
+    X = sample_rows(scaler)
+    expected = model.predict_proba(scaler.transform(X))
+    np.testing.assert_allclose(engine.predict_proba(X), expected, atol=TOLERANCE)
+    np.testing.assert_array_equal(engine.classes_, model.classes_)
+
+
+@pytest.mark.parametrize("model_path", MODEL_PATHS, ids=os.path.basename)
+def test_predict_proba_row_matches_sklearn(model_path):
+    model, scaler = load(model_path)
+    engine = CompiledMLP.from_sklearn(model, scaler)
+    X = sample_rows(scaler, count=32)
+    expected = model.predict_proba(scaler.transform(X))
+    for row, expected_row in zip(X, expected):
+        np.testing.assert_allclose(engine.predict_proba_row(row), expected_row, atol=TOLERANCE)
+
+
+def test_shipped_models_found():
+    assert MODEL_PATHS, f"No models in {MODEL_DIR}"
@@ -0,0 +1,67 @@
+import glob
+import os
+import pickle
+import shutil
+import numpy as np
+import pytest
+from ml.classifier import GestureClassifier
+from ml.features import FEATURE_COUNT, FEATURE_VERSION
+from ml.model_format import convert_pickle, discover_models, load_compiled_model, read_header
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model", "trained")
+MODEL_PATH = sorted(glob.glob(os.path.join(MODEL_DIR, "*_model.pkl")))[0]
+GESTURE_NAME = os.path.basename(MODEL_PATH)[:-len("_model.pkl")]
+
+
+@pytest.fixture
+def pickled(tmp_path):
+    path = tmp_path / os.path.basename(MODEL_PATH)
+    shutil.copy(MODEL_PATH, path)
+    return str(path)
+
+
+def test_round_trip_matches_pickle(pickled):
+    amx_path = convert_pickle(pickled)
+    header = read_header(amx_path)
+    assert header["gesture_name"] == GESTURE_NAME
+    assert header["feature_version"] == FEATURE_VERSION
+
+    with open(pickled, "rb") as f:
+        model_data = pickle.load(f)
+    model, scaler = model_data["model"], model_data["scaler"]
+    engine = load_compiled_model(amx_path, header)
+    np.testing.assert_array_equal(engine.classes_, model.classes_.astype(str))
+    rng = np.random.default_rng(0)
+    X = scaler.mean_ + rng.standard_normal((64, len(scaler.mean_))) * scaler.scale_
+    np.testing.assert_allclose(engine.predict_proba(X), model.predict_proba(scaler.transform(X)), atol=1e-5)
+
+
+def test_compiled_model_loads_lazily_in_classifier(pickled):
+    amx_path = convert_pickle(pickled)
+    classifier = GestureClassifier(amx_path)
+    assert classifier.gesture_name == GESTURE_NAME
+    assert classifier.engine is None
+    features = np.zeros((1, FEATURE_COUNT), dtype=np.float32)
+    classifier.predict_with_confidence(features)
+    assert classifier.engine is not None
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "bogus_model.amx"
+    path.write_bytes(b"not a model")
+    with pytest.raises(ValueError):
+        read_header(str(path))
+
+
+def test_discover_prefers_newer_of_compiled_and_pickle(pickled):
+    amx_path = convert_pickle(pickled)
+    os.utime(pickled, (1000, 1000))
+    os.utime(amx_path, (2000, 2000))
+    assert discover_models(os.path.dirname(pickled)) == {GESTURE_NAME: amx_path}
+
+    # A pickle retrained after the compiled model was written wins
+    os.utime(pickled, (3000, 3000))
+    assert discover_models(os.path.dirname(pickled)) == {GESTURE_NAME: pickled}
+
+    os.remove(amx_path)
+    assert discover_models(os.path.dirname(pickled)) == {GESTURE_NAME: pickled}
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("mediapipe")
+pytest.importorskip("pygame")
+pytest.importorskip("pythonosc")
+
+from main import AeroMixApp
+from ml.classifier import GestureClassifier
+from ml.features import extract_features
+from utils.landmarks import LandmarkFrame, NUM_HAND_LANDMARKS
+from utils.session import SessionRecorder
+
+FPS = 30.0
+# (label, frames): two bursts of the gesture, 1s apart, between neutral poses
+SCRIPT = [("neutral", 20), ("volume_up", 15), ("neutral", 30), ("volume_up", 15), ("neutral", 10)]
+
+
+def poses():
+    rng = np.random.default_rng(0)
+    return {label: rng.random((NUM_HAND_LANDMARKS, 3)) for label in ("neutral", "volume_up")}
+
+
+def jittered(pose, rng):
+    return pose + rng.normal(0, 0.005, pose.shape)
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    rng = np.random.default_rng(1)
+    X, y = [], []
+    for label, pose in poses().items():
+        for _ in range(60):
+            X.append(extract_features(jittered(pose, rng)).flatten())
+            y.append(label)
+    classifier = GestureClassifier()
+    assert classifier.train(np.array(X), np.array(y))
+    path = tmp_path / "model"
+    path.mkdir()
+    classifier.save_model(str(path / "volume_up_model.pkl"))
+    return str(path)
+
+
+@pytest.fixture
+def session(tmp_path):
+    rng = np.random.default_rng(2)
+    hand_poses = poses()
+    path = str(tmp_path / "session")
+    index = 0
+    with SessionRecorder(path) as recorder:
+        for label, frames in SCRIPT:
+            for _ in range(frames):
+                points = jittered(hand_poses[label], rng)[np.newaxis]
+                recorder.write(LandmarkFrame(points, [False], 1000.0 + index / FPS))
+                index += 1
+    return path
+
+
+@pytest.fixture
+def app(model_dir):
+    app = AeroMixApp(model_dir=model_dir, headless=True)
+    yield app
+    app.shutdown()
+
+
+def test_replay_fires_recorded_gestures(app, session):
+    fired = app.run_replay(session, speed=0)
+    # The vote needs 7 of 10 frames; the second burst wins at once since neutral frames cast no vote
+    assert [(index, gesture) for index, _, gesture in fired] == [(26, "volume_up"), (65, "volume_up")]
+    assert fired[0][1] == pytest.approx(1000.0 + 26 / FPS)
+
+
+def test_replay_is_repeatable(app, session):
+    assert app.run_replay(session, speed=0) == app.run_replay(session, speed=0)
+
+
+def test_headless_apps_run_side_by_side(app, model_dir):
+    other = AeroMixApp(model_dir=model_dir, headless=True)
+    try:
+        assert app.osc_handler.server is None and other.osc_handler.server is None
+    finally:
+        other.shutdown()
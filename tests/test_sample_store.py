@@ -0,0 +1,43 @@
+import os
+import numpy as np
+import pytest
+from ml.sample_store import SampleStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SampleStore(str(tmp_path / "samples"))
+
+
+def samples(count, label="wave"):
+    return np.arange(count * 3, dtype=np.float32).reshape(count, 3), [label] * count
+
+
+def test_appends_are_loaded_in_order(store):
+    store.append("wave", *samples(2))
+    store.append("wave", *samples(3, "neutral"))
+    X, y = store.load("wave")
+    assert X.shape == (5, 3)
+    assert list(y) == ["wave"] * 2 + ["neutral"] * 3
+    assert [os.path.basename(path) for path in store.segments("wave")] == ["segment_000001.npz", "segment_000002.npz"]
+
+
+def test_stale_temp_file_is_ignored(store):
+    store.append("wave", *samples(2))
+    gesture_dir = os.path.dirname(store.segments("wave")[0])
+    # A crash mid-append leaves a partial temp file, and older versions named theirs *.tmp.npz
+    for name in (".segment_000002.tmp", "segment_000002.npz.tmp.npz"):
+        with open(os.path.join(gesture_dir, name), "wb") as f:
+            f.write(b"partial")
+
+    assert store.count("wave") == 2
+    path = store.append("wave", *samples(1))
+    assert os.path.basename(path) == "segment_000002.npz"
+    X, _ = store.load("wave")
+    assert len(X) == 3
+    assert store.gestures() == ["wave"]
+
+
+def test_empty_append_writes_nothing(store):
+    assert store.append("wave", np.empty((0, 3)), []) is None
+    assert store.segments("wave") == []